@@ -0,0 +1,83 @@
+-- Agent Forge cache_stats Migration: atomic hit/miss increments
+-- Brings an existing database in line with database/schema.sql and
+-- scripts/create_supabase_schema.sql for the write-behind metrics buffer
+
+-- =============================================================================
+-- The buffer flushes counters through increment_cache_stats, an
+-- INSERT ... ON CONFLICT (cache_type, period_start) upsert. That needs:
+-- - a period_start column (missing from tables created by database/schema.sql)
+-- - a unique (cache_type, period_start) index, which cannot be built while the
+--   old SELECT-then-INSERT writers have left duplicate rows behind
+-- Duplicates are merged into the oldest row of each group, keeping the totals.
+-- Safe to run more than once.
+-- =============================================================================
+
+BEGIN;
+
+-- =============================================================================
+-- STEP 1: period_start column
+-- =============================================================================
+
+-- Added without a default first, so existing rows are not all stamped with NOW()
+ALTER TABLE public.cache_stats ADD COLUMN IF NOT EXISTS period_start TIMESTAMP WITH TIME ZONE;
+
+UPDATE public.cache_stats
+SET period_start = COALESCE(created_at, NOW())
+WHERE period_start IS NULL;
+
+ALTER TABLE public.cache_stats ALTER COLUMN period_start SET DEFAULT NOW();
+
+-- =============================================================================
+-- STEP 2: Merge duplicate (cache_type, period_start) rows
+-- =============================================================================
+
+UPDATE public.cache_stats AS c
+SET hit_count = d.total_hits,
+    miss_count = d.total_misses
+FROM (
+    SELECT
+        id,
+        ROW_NUMBER() OVER w AS row_number,
+        SUM(COALESCE(hit_count, 0)) OVER (PARTITION BY cache_type, period_start) AS total_hits,
+        SUM(COALESCE(miss_count, 0)) OVER (PARTITION BY cache_type, period_start) AS total_misses,
+        COUNT(*) OVER (PARTITION BY cache_type, period_start) AS group_size
+    FROM public.cache_stats
+    WINDOW w AS (PARTITION BY cache_type, period_start ORDER BY created_at, id)
+) AS d
+WHERE c.id = d.id AND d.row_number = 1 AND d.group_size > 1;
+
+DELETE FROM public.cache_stats AS c
+USING (
+    SELECT
+        id,
+        ROW_NUMBER() OVER (PARTITION BY cache_type, period_start ORDER BY created_at, id) AS row_number
+    FROM public.cache_stats
+) AS d
+WHERE c.id = d.id AND d.row_number > 1;
+
+-- =============================================================================
+-- STEP 3: Unique index and increment function
+-- =============================================================================
+
+-- One counter row per cache type and day, so increments can upsert atomically
+CREATE UNIQUE INDEX IF NOT EXISTS idx_cache_stats_type_period_unique ON public.cache_stats(cache_type, period_start);
+
+-- Apply a batch of buffered hit/miss counts in one round trip
+-- p_increments: [{"cache_type": "...", "period_start": "YYYY-MM-DD", "hits": n, "misses": m}, ...]
+CREATE OR REPLACE FUNCTION increment_cache_stats(p_increments JSONB)
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO public.cache_stats (cache_type, period_start, hit_count, miss_count)
+    SELECT
+        inc->>'cache_type',
+        (inc->>'period_start')::TIMESTAMP WITH TIME ZONE,
+        COALESCE((inc->>'hits')::INTEGER, 0),
+        COALESCE((inc->>'misses')::INTEGER, 0)
+    FROM jsonb_array_elements(p_increments) AS inc
+    ON CONFLICT (cache_type, period_start) DO UPDATE SET
+        hit_count = cache_stats.hit_count + EXCLUDED.hit_count,
+        miss_count = cache_stats.miss_count + EXCLUDED.miss_count;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMIT;
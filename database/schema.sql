@@ -131,6 +131,7 @@ CREATE TABLE public.cache_stats (
     total_requests INTEGER GENERATED ALWAYS AS (hit_count + miss_count) STORED,
     avg_response_time_ms FLOAT,
     cache_size_mb FLOAT,
+    period_start TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     last_updated TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
@@ -219,6 +220,9 @@ CREATE INDEX workflow_lookup_usage_idx ON public.workflow_lookup(usage_count DES
 CREATE INDEX workflow_lookup_embedding_idx ON public.workflow_lookup 
     USING ivfflat (embedding vector_cosine_ops) WITH (lists = 100);
 
+-- One cache_stats counter row per cache type and day, so increments can upsert atomically
+CREATE UNIQUE INDEX idx_cache_stats_type_period_unique ON public.cache_stats(cache_type, period_start);
+
 -- AI usage logs indexes
 CREATE INDEX ai_usage_logs_workflow_id_idx ON public.ai_usage_logs(workflow_id);
 CREATE INDEX ai_usage_logs_provider_idx ON public.ai_usage_logs(provider);
@@ -388,6 +392,25 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- Apply a batch of buffered cache hit/miss counts in one round trip (write-behind metrics buffer)
+-- p_increments: [{"cache_type": "...", "period_start": "YYYY-MM-DD", "hits": n, "misses": m}, ...]
+CREATE OR REPLACE FUNCTION increment_cache_stats(p_increments JSONB)
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO public.cache_stats (cache_type, period_start, hit_count, miss_count)
+    SELECT
+        inc->>'cache_type',
+        (inc->>'period_start')::TIMESTAMP WITH TIME ZONE,
+        COALESCE((inc->>'hits')::INTEGER, 0),
+        COALESCE((inc->>'misses')::INTEGER, 0)
+    FROM jsonb_array_elements(p_increments) AS inc
+    ON CONFLICT (cache_type, period_start) DO UPDATE SET
+        hit_count = cache_stats.hit_count + EXCLUDED.hit_count,
+        miss_count = cache_stats.miss_count + EXCLUDED.miss_count,
+        last_updated = NOW();
+END;
+$$ LANGUAGE plpgsql;
+
 -- Apply update triggers
 CREATE TRIGGER update_workflow_updated_at 
     BEFORE UPDATE ON public.workflow 
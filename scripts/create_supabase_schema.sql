@@ -283,4 +283,25 @@ CREATE INDEX IF NOT EXISTS idx_cache_stats_period ON cache_stats(period_start, p
 CREATE INDEX IF NOT EXISTS idx_ai_usage_provider ON ai_usage_logs(provider);
 CREATE INDEX IF NOT EXISTS idx_ai_usage_model ON ai_usage_logs(model);
 CREATE INDEX IF NOT EXISTS idx_ai_usage_date ON ai_usage_logs(created_at);
-CREATE INDEX IF NOT EXISTS idx_ai_usage_workflow ON ai_usage_logs(workflow_id); 
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS idx_ai_usage_workflow ON ai_usage_logs(workflow_id); 
+-- One counter row per cache type and day, so increments can upsert atomically
+-- (existing databases: run database/cache_stats_migration.sql, which merges duplicate rows first)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_cache_stats_type_period_unique ON cache_stats(cache_type, period_start);
+
+-- Apply a batch of buffered hit/miss counts in one round trip
+-- p_increments: [{"cache_type": "...", "period_start": "YYYY-MM-DD", "hits": n, "misses": m}, ...]
+CREATE OR REPLACE FUNCTION increment_cache_stats(p_increments JSONB)
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO cache_stats (cache_type, period_start, hit_count, miss_count)
+    SELECT
+        inc->>'cache_type',
+        (inc->>'period_start')::TIMESTAMP WITH TIME ZONE,
+        COALESCE((inc->>'hits')::INTEGER, 0),
+        COALESCE((inc->>'misses')::INTEGER, 0)
+    FROM jsonb_array_elements(p_increments) AS inc
+    ON CONFLICT (cache_type, period_start) DO UPDATE SET
+        hit_count = cache_stats.hit_count + EXCLUDED.hit_count,
+        miss_count = cache_stats.miss_count + EXCLUDED.miss_count;
+END;
+$$ LANGUAGE plpgsql;
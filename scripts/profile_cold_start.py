@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Cold Start Profile
+Measures what a fresh serverless instance pays before answering /api/health:
+framework import, application import and the first request, each in a new
+interpreter. Also lists the slowest application modules from -X importtime.
+
+Usage: python scripts/profile_cold_start.py [--runs 5] [--budget-ms 200] [--top 15]
+Exits non-zero when the median application cold start exceeds the budget.
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+# Add project root to path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+# Heavy optional modules that must not load just to serve /api/health
+DEFERRED_MODULES = ["sqlalchemy.ext.asyncio", "numpy", "anthropic", "openai", "supabase", "redis"]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import fastapi, fastapi.testclient
+framework = time.perf_counter()
+from src.main import app
+imported = time.perf_counter()
+client = fastapi.testclient.TestClient(app)
+response = client.get("/api/health")
+done = time.perf_counter()
+print(json.dumps({
+    "framework_ms": (framework - start) * 1000,
+    "app_import_ms": (imported - framework) * 1000,
+    "first_request_ms": (done - imported) * 1000,
+    "status": response.status_code,
+    "deferred_loaded": [m for m in %r if m in sys.modules]
+}))
+""" % (DEFERRED_MODULES,)
+
+
+def run_probe() -> dict:
+    """One cold start in a fresh interpreter"""
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def slowest_modules(top: int) -> list:
+    """(cumulative ms, module) for the slowest src.* imports"""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import src.main"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, module = line.split("|", 2)
+        module = module.strip()
+        if module.startswith("src.") and cumulative.strip().isdigit():
+            rows.append((int(cumulative) / 1000, module))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Profile /api/health cold start")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("COLD_START_BUDGET_MS", "200")))
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    probes = [run_probe() for _ in range(args.runs)]
+    median = {key: statistics.median(p[key] for p in probes)
+              for key in ("framework_ms", "app_import_ms", "first_request_ms")}
+    app_cold_start = median["app_import_ms"] + median["first_request_ms"]
+
+    print(f"⏱️  Cold start over {args.runs} runs (median)")
+    print(f"  framework import:  {median['framework_ms']:8.1f} ms")
+    print(f"  app import:        {median['app_import_ms']:8.1f} ms")
+    print(f"  first /api/health: {median['first_request_ms']:8.1f} ms")
+    print(f"  app cold start:    {app_cold_start:8.1f} ms (budget {args.budget_ms:.0f} ms)")
+
+    print(f"\n📦 Slowest application modules (cumulative)")
+    for ms, module in slowest_modules(args.top):
+        print(f"  {ms:8.1f} ms  {module}")
+
+    deferred = sorted({m for p in probes for m in p["deferred_loaded"]})
+    if deferred:
+        print(f"\n❌ Loaded at startup but should be lazy: {', '.join(deferred)}")
+    if any(p["status"] != 200 for p in probes):
+        print("\n❌ /api/health did not return 200")
+        return 1
+
+    if app_cold_start > args.budget_ms or deferred:
+        return 1
+    print("\n✅ Within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
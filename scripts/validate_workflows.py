@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Batch Workflow Validation
+Validates every stored workflow state across a process pool, writes the results
+to validation_logs in batches and prints an aggregated compliance report.
+
+Usage: python scripts/validate_workflows.py [--page-size 500] [--workers N] [--inline]
+                                             [--no-logs] [--output report.json] [--strict]
+Exits non-zero with --strict when any workflow is non-compliant or failed to validate.
+"""
+
+import os
+import sys
+import json
+import asyncio
+import argparse
+
+# Add project root to path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+from src.services.batch_validation import batch_validator, DEFAULT_PAGE_SIZE
+
+
+async def run(args: argparse.Namespace) -> dict:
+    async def progress(done: int, total: int) -> None:
+        print(f"  validated {done}/{total} workflows", flush=True)
+
+    return await batch_validator.validate_all(
+        page_size=args.page_size,
+        workers=args.workers,
+        use_process_pool=False if args.inline else None,
+        write_logs=not args.no_logs,
+        progress=progress
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Validate all stored workflows")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--inline", action="store_true", help="Validate in this process instead of a process pool")
+    parser.add_argument("--no-logs", action="store_true", help="Do not write validation_logs rows")
+    parser.add_argument("--output", help="Write the full JSON report to this file")
+    parser.add_argument("--strict", action="store_true", help="Exit 1 if any workflow is non-compliant")
+    args = parser.parse_args()
+
+    print("🔍 Validating stored workflows...")
+    report = asyncio.run(run(args))
+
+    print(f"\n📊 Compliance report ({report['throughput']['elapsed_seconds']}s, "
+          f"{report['throughput']['workflows_per_second']} workflows/s)")
+    print(f"  validated:      {report['workflows_validated']}")
+    print(f"  valid:          {report['valid_count']} ({report['validity_rate']}%)")
+    print(f"  compliant:      {report['compliant_count']} ({report['compliance_rate']}%)")
+    print(f"  failed:         {report['failed_count']}")
+    print(f"  logs written:   {report['validation_logs_written']}")
+
+    if report["top_errors"]:
+        print("\n❌ Most common errors")
+        for issue in report["top_errors"][:10]:
+            print(f"  {issue['count']:6d}  {issue['validator']}: {issue['message']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Report written to {args.output}")
+
+    if args.strict and (report["non_compliant_count"] or report["failed_count"]):
+        return 1
+    print("\n✅ Done")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
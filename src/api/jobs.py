@@ -0,0 +1,51 @@
+# src/api/jobs.py
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import JSONResponse
+from typing import Dict, Any
+import logging
+from src.services.job_manager import job_manager
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api", tags=["jobs"])
+
+def job_accepted(job: Dict[str, Any]) -> JSONResponse:
+    """202 response for an endpoint that queued a background job"""
+    return JSONResponse(
+        status_code=202,
+        content={
+            "job_id": job["id"],
+            "kind": job["kind"],
+            "status": job["status"],
+            "status_url": f"/api/jobs/{job['id']}",
+            "cancel_url": f"/api/jobs/{job['id']}/cancel",
+            "created_at": job["created_at"]
+        }
+    )
+
+@router.get("/jobs")
+async def list_jobs(limit: int = Query(50, ge=1, le=500)):
+    """List recent background jobs, newest first"""
+    jobs = await job_manager.list(limit)
+    return {
+        "jobs": [{key: value for key, value in job.items() if key != "result"} for job in jobs],
+        "count": len(jobs),
+        "manager": job_manager.stats()
+    }
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Get status, progress and (once finished) the result of a background job"""
+    job = await job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running background job"""
+    job = await job_manager.cancel(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    logger.info(f"🛑 Cancellation requested for job {job_id}")
+    return job
@@ -1,18 +1,26 @@
 # src/api/workflows.py
-from fastapi import APIRouter, HTTPException, Body, Depends, Query
+from fastapi import APIRouter, HTTPException, Body, Query, Header
+from fastapi.responses import StreamingResponse
 from typing import Optional, Dict, Any, List
 from datetime import datetime, timedelta
+import asyncio
 import logging
 import uuid
 from src.services.state_generator import state_generator
 from src.services.validation import validator
+from src.services.batch_validation import batch_validator
 from src.utils.database_hybrid import db_service
-from src.models.schemas import StateGenerationOptions
-from src.models.connection import get_db, AsyncSessionLocal
-from sqlalchemy.ext.asyncio import AsyncSession
+from src.models.schemas import StateGenerationOptions, BatchStateGenerationRequest
 import json
 from src.services.csv_processor import csv_processor
 from src.services.lookup_service import lookup_service
+from src.services.job_manager import job_manager
+from src.services.workflow_context import WorkflowContext
+from src.services.enhanced_lookup_service import structural_match_cache, invalidate_structural_cache
+from src.services.embedding_cache import get_embedding_cache
+from src.api.jobs import job_accepted
+from src.utils.deadline import Deadline
+from src.utils.streaming import format_stream_event, STREAM_MEDIA_TYPES
 import os
 
 logger = logging.getLogger(__name__)
@@ -22,7 +30,9 @@ router = APIRouter(prefix="/api", tags=["workflows"])
 @router.post("/workflows/{workflow_id}/generate-state")
 async def generate_workflow_state(
     workflow_id: str,
-    options: Optional[StateGenerationOptions] = Body(default=None)
+    options: Optional[StateGenerationOptions] = Body(default=None),
+    background: bool = Query(False, description="Run as a background job and return its id immediately"),
+    deadline_ms: Optional[int] = Header(None, alias="X-Request-Deadline-Ms", gt=0)
 ):
     """
     Generate Agent Forge-compatible workflow state using AI with intelligent RAG caching.
@@ -33,68 +43,241 @@ async def generate_workflow_state(
     - Cost optimization through reduced AI calls
     - Learning system that improves over time
     - Semantic understanding with embeddings
+    
+    Large workflows can be generated with background=true; poll GET /api/jobs/{job_id}.
+    
+    A latency budget (options.deadline_ms or the X-Request-Deadline-Ms header) makes
+    generation degrade from AI to cached adaptation to rule-based fallback instead of
+    waiting on a slow model.
     """
+    # Use default options if none provided
+    if not options:
+        options = StateGenerationOptions()
+    if options.deadline_ms is None and deadline_ms is not None:
+        options.deadline_ms = deadline_ms
+    
+    if background:
+        job = await job_manager.submit(
+            "generate_state",
+            lambda job: build_generate_state_response(workflow_id, options),
+            params={"workflow_id": workflow_id}
+        )
+        return job_accepted(job)
+    
     try:
-        logger.info(f"Generating state for workflow {workflow_id}")
-        
-        # Use default options if none provided
-        if not options:
-            options = StateGenerationOptions()
-        
-        # Generate state with intelligent RAG caching
-        generated_state = await state_generator.generate_workflow_state(workflow_id)
-        
-        # Validate the generated state
-        validation_report = await validator.validate_state(generated_state, workflow_id)
-        
-        # Save to database if valid and requested
-        if validation_report.overall_valid and options.include_suggestions:
-            await db_service.update_workflow_state(workflow_id, generated_state)
-            logger.info(f"State saved for workflow {workflow_id}")
-        
-        # Analyze pattern
-        pattern = await state_generator.analyze_workflow_pattern(workflow_id)
-        
-        # Extract detected patterns from validation metadata
-        detected_patterns = []
-        for result in validation_report.validation_results:
-            if result.validator_name == "validate_workflow_patterns" and result.metadata:
-                detected_patterns = result.metadata.get('detected_patterns', [])
-        
-        # Check if this was cached
-        cache_info = generated_state.get('metadata', {})
-        is_cached = cache_info.get('adapted_from_cache', False)
-        match_type = cache_info.get('adaptation_method', 'structural')
-        
-        return {
-            "workflow_id": workflow_id,
-            "generated_state": generated_state,
-            "validation_report": validation_report.dict(),
-            "agent_forge_pattern": pattern,
-            "agent_forge_patterns": detected_patterns,
-            "cache_info": {
-                "used_cache": is_cached,
-                "similarity_score": cache_info.get('similarity_score'),
-                "cache_performance": cache_info.get('cache_performance'),
-                "ai_adapted": cache_info.get('ai_adapted', False),
-                "match_type": match_type
-            },
-            "generation_metadata": {
-                "model": "claude-3-sonnet" if not is_cached else "cached+adapted",
-                "platform": "agent-forge",
-                "timestamp": datetime.utcnow().isoformat(),
-                "options": options.dict(),
-                "intelligent_caching": "enabled",
-                "rag_enhanced": "enabled"
-            }
-        }
-        
+        return await build_generate_state_response(workflow_id, options)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         logger.error(f"Error generating state: {e}")
         raise HTTPException(status_code=500, detail=f"State generation failed: {str(e)}")
 
+@router.post("/workflows/generate-state:batch")
+async def generate_workflow_states_batch(
+    request: BatchStateGenerationRequest,
+    background: bool = Query(False, description="Run as a background job and return its id immediately")
+):
+    """
+    Generate states for many workflows in one call.
+    
+    Workflows and blocks are fetched with in_() queries, workflows sharing a
+    lookup key are generated once, distinct patterns run with bounded
+    concurrency, and valid states are written back with bulk upserts.
+    """
+    if background:
+        job = await job_manager.submit(
+            "generate_state_batch",
+            lambda job: build_batch_generate_state_response(request),
+            params={"workflow_count": len(request.workflow_ids)}
+        )
+        return job_accepted(job)
+    
+    try:
+        return await build_batch_generate_state_response(request)
+    except Exception as e:
+        logger.error(f"Error generating states in batch: {e}")
+        raise HTTPException(status_code=500, detail=f"Batch state generation failed: {str(e)}")
+
+async def build_batch_generate_state_response(request: BatchStateGenerationRequest) -> Dict[str, Any]:
+    """Fetch, generate, validate and bulk-save states for many workflows"""
+    start_time = datetime.utcnow()
+    workflow_ids = list(dict.fromkeys(request.workflow_ids))
+    
+    workflows = await db_service.get_workflows_with_blocks(workflow_ids)
+    blocks_by_workflow = {workflow_id: workflow.pop('blocks') for workflow_id, workflow in workflows.items()}
+    
+    states = await state_generator.generate_workflow_states_batch(
+        workflows,
+        blocks_by_workflow,
+        concurrency=request.concurrency
+    )
+    
+    results = []
+    states_to_save = {}
+    for workflow_id in workflow_ids:
+        if workflow_id not in workflows:
+            results.append({"workflow_id": workflow_id, "status": "not_found"})
+            continue
+        
+        generated_state = states[workflow_id]
+        validation_report = await validator.validate_state(generated_state, workflow_id)
+        if validation_report.overall_valid and request.options.include_suggestions:
+            states_to_save[workflow_id] = generated_state
+        
+        metadata = generated_state.get('metadata', {})
+        result = {
+            "workflow_id": workflow_id,
+            "status": "generated",
+            "valid": validation_report.overall_valid,
+            "agent_forge_compliance": validation_report.agent_forge_compliance,
+            "agent_forge_pattern": await state_generator.analyze_workflow_pattern(
+                workflow_id, {**workflows[workflow_id], "blocks": blocks_by_workflow.get(workflow_id, [])}
+            ),
+            "used_cache": metadata.get('adapted_from_cache', False),
+            "shared_with": metadata.get('batch_shared_with'),
+            "errors": [error for r in validation_report.validation_results for error in r.errors]
+        }
+        if request.include_states:
+            result["generated_state"] = generated_state
+        results.append(result)
+    
+    saved = await db_service.update_workflow_states(states_to_save) if states_to_save else 0
+    
+    generated = [r for r in results if r["status"] == "generated"]
+    return {
+        "requested": len(workflow_ids),
+        "generated": len(generated),
+        "not_found": len(workflow_ids) - len(generated),
+        "valid": sum(1 for r in generated if r["valid"]),
+        "saved": saved,
+        "distinct_patterns": len({r["workflow_id"] for r in generated if not r["shared_with"]}),
+        "duration_seconds": (datetime.utcnow() - start_time).total_seconds(),
+        "results": results
+    }
+
+@router.post("/workflows/{workflow_id}/generate-state/stream")
+async def stream_workflow_state(
+    workflow_id: str,
+    options: Optional[StateGenerationOptions] = Body(default=None),
+    format: str = Query("sse", pattern="^(sse|ndjson)$", description="sse (text/event-stream) or ndjson")
+):
+    """
+    Streaming variant of generate-state for the editor UI.
+    
+    Events, in order: started, workflow, cache (hit/miss decision), block (each
+    AI-generated block as soon as it is complete), state, validation, saved,
+    pattern, done. Failures are reported as an error event.
+    """
+    if not options:
+        options = StateGenerationOptions()
+    
+    queue: asyncio.Queue = asyncio.Queue()
+    
+    async def emit(event: str, data: Dict[str, Any]) -> None:
+        await queue.put((event, data))
+    
+    async def produce() -> None:
+        try:
+            await emit("started", {"workflow_id": workflow_id, "timestamp": datetime.utcnow().isoformat()})
+            context = WorkflowContext(workflow_id, db_service)
+            generated_state = await state_generator.generate_workflow_state(workflow_id, emit=emit, context=context)
+            await emit("state", {"generated_state": generated_state})
+            
+            validation_report = await validator.validate_state(generated_state, workflow_id)
+            await emit("validation", validation_report.dict())
+            
+            if validation_report.overall_valid and options.include_suggestions:
+                await db_service.update_workflow_state(workflow_id, generated_state)
+                await emit("saved", {"workflow_id": workflow_id})
+            
+            pattern = await state_generator.analyze_workflow_pattern(workflow_id, context=context)
+            await emit("pattern", {"agent_forge_pattern": pattern})
+            await emit("done", {"workflow_id": workflow_id, "timestamp": datetime.utcnow().isoformat()})
+        except Exception as e:
+            logger.error(f"Error streaming state for {workflow_id}: {e}")
+            await emit("error", {"detail": str(e)})
+        finally:
+            await queue.put(None)
+    
+    async def event_stream():
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                yield format_stream_event(*item, fmt=format)
+        finally:
+            # Client disconnected: stop generating for it
+            if not producer.done():
+                producer.cancel()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type=STREAM_MEDIA_TYPES[format],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def build_generate_state_response(workflow_id: str, options: StateGenerationOptions) -> Dict[str, Any]:
+    """Generate, validate and optionally save a workflow state"""
+    logger.info(f"Generating state for workflow {workflow_id}")
+    
+    # Generate state with intelligent RAG caching, within the latency budget if one applies
+    # The request context loads the workflow and blocks once for every step below
+    context = WorkflowContext(workflow_id, db_service)
+    deadline = Deadline.from_budget(options.deadline_ms or state_generator.default_deadline_ms)
+    generated_state = await state_generator.generate_workflow_state(workflow_id, deadline=deadline, context=context)
+    
+    # Validate the generated state
+    validation_report = await validator.validate_state(generated_state, workflow_id)
+    
+    # Save to database if valid and requested
+    if validation_report.overall_valid and options.include_suggestions:
+        await db_service.update_workflow_state(workflow_id, generated_state)
+        logger.info(f"State saved for workflow {workflow_id}")
+    
+    # Analyze pattern (from the already-loaded context)
+    pattern = await state_generator.analyze_workflow_pattern(workflow_id, context=context)
+    
+    # Extract detected patterns from validation metadata
+    detected_patterns = []
+    for result in validation_report.validation_results:
+        if result.validator_name == "validate_workflow_patterns" and result.metadata:
+            detected_patterns = result.metadata.get('detected_patterns', [])
+    
+    # Check if this was cached
+    cache_info = generated_state.get('metadata', {})
+    is_cached = cache_info.get('adapted_from_cache', False)
+    match_type = cache_info.get('adaptation_method', 'structural')
+    generation_tiers = cache_info.get('generation_tiers') or {}
+    
+    return {
+        "workflow_id": workflow_id,
+        "generated_state": generated_state,
+        "validation_report": validation_report.dict(),
+        "agent_forge_pattern": pattern,
+        "agent_forge_patterns": detected_patterns,
+        "cache_info": {
+            "used_cache": is_cached,
+            "similarity_score": cache_info.get('similarity_score'),
+            "cache_performance": cache_info.get('cache_performance'),
+            "ai_adapted": cache_info.get('ai_adapted', False),
+            "match_type": match_type,
+            "hybrid_search": cache_info.get('hybrid_search')
+        },
+        "generation_metadata": {
+            "model": "claude-3-sonnet" if not is_cached else "cached+adapted",
+            "platform": "agent-forge",
+            "timestamp": datetime.utcnow().isoformat(),
+            "options": options.dict(),
+            "intelligent_caching": "enabled",
+            "rag_enhanced": "enabled",
+            "served_by": generation_tiers.get('served_by'),
+            "deadline_ms": generation_tiers.get('budget_ms'),
+            "tier_timings_ms": generation_tiers.get('tier_timings_ms')
+        }
+    }
+
 @router.get("/workflows/cache/stats")
 async def get_cache_statistics():
     """
@@ -118,21 +301,21 @@ async def get_cache_statistics():
         if db_service.use_database:
             try:
                 # Get most used patterns
-                most_used = db_service.client.table('workflow_lookup').select(
+                most_used = await db_service.run_query(db_service.client.table('workflow_lookup').select(
                     'workflow_type',
                     'usage_count',
                     'block_count',
                     'avg_generation_time'
-                ).order('usage_count', desc=True).limit(5).execute()
+                ).order('usage_count', desc=True).limit(5))
                 
                 stats["most_used_patterns"] = most_used.data if most_used.data else []
                 
                 # Get recent activity
-                recent = db_service.client.table('workflow_lookup').select(
+                recent = await db_service.run_query(db_service.client.table('workflow_lookup').select(
                     'workflow_type',
                     'created_at',
                     'last_used_at'
-                ).order('last_used_at', desc=True).limit(10).execute()
+                ).order('last_used_at', desc=True).limit(10))
                 
                 stats["recent_activity"] = recent.data if recent.data else []
                 
@@ -147,7 +330,15 @@ async def get_cache_statistics():
                 "similarity_threshold": 0.8,
                 "ai_adaptation_enabled": True,
                 "database_connected": db_service.use_database,
-                "openai_embeddings": bool(os.getenv("OPENAI_API_KEY"))
+                "openai_embeddings": bool(os.getenv("OPENAI_API_KEY")),
+                "l1_cache": structural_match_cache.stats(),
+                "embedding_cache": get_embedding_cache().stats(),
+                "validation_cache": validator.report_cache.stats() if validator.report_cache is not None else None,
+                "request_coalescing": {
+                    "by_workflow": state_generator.workflow_flights.stats(),
+                    "by_lookup_key": state_generator.lookup_flights.stats(),
+                    "deadline_generations": state_generator.generation_flights.stats()
+                }
             },
             "performance_benefits": {
                 "speed_improvement": "5-10x faster for cached patterns",
@@ -193,28 +384,54 @@ async def clear_cache(
             if workflow_type:
                 query = query.eq('workflow_type', workflow_type)
             
-            result = query.execute()
+            result = await db_service.run_query(query)
+            l1_cleared = invalidate_structural_cache()
             
             return {
                 "message": f"Cleared cache entries older than {older_than_days} days",
                 "workflow_type_filter": workflow_type,
                 "entries_deleted": len(result.data) if result.data else 0,
+                "l1_entries_cleared": l1_cleared,
                 "cleared_at": datetime.utcnow().isoformat()
             }
         else:
+            invalidate_structural_cache()
+            
+            # Offline patterns live in the mock cache and the local vector index (persisted at shutdown)
+            from src.services.vector_index import get_local_vector_index, save_local_vector_index
+            index = get_local_vector_index()
+            vectors_removed = 0
+            if index is not None:
+                if workflow_type:
+                    vectors_removed = index.remove([
+                        item_id for item_id, payload in zip(index.ids, index.payloads)
+                        if payload.get('workflow_type') == workflow_type
+                    ])
+                else:
+                    vectors_removed = index.clear()
+                if vectors_removed:
+                    save_local_vector_index()
+            
             # Clear mock cache
             if hasattr(db_service, 'mock_lookup_cache'):
-                cleared_count = len(db_service.mock_lookup_cache)
-                db_service.mock_lookup_cache.clear()
+                keys = [
+                    key for key, entry in db_service.mock_lookup_cache.items()
+                    if not workflow_type or entry.get('workflow_type') == workflow_type
+                ]
+                for key in keys:
+                    del db_service.mock_lookup_cache[key]
                 return {
                     "message": "Cleared mock cache",
-                    "entries_deleted": cleared_count,
+                    "workflow_type_filter": workflow_type,
+                    "entries_deleted": len(keys),
+                    "vector_index_entries_removed": vectors_removed,
                     "note": "Using mock data (no database connection)"
                 }
             else:
                 return {
-                    "message": "No cache to clear",
-                    "entries_deleted": 0
+                    "message": "No cache to clear" if not vectors_removed else "Cleared local vector index",
+                    "entries_deleted": 0,
+                    "vector_index_entries_removed": vectors_removed
                 }
             
     except Exception as e:
@@ -228,22 +445,13 @@ async def find_similar_cached_workflows(workflow_id: str):
     Useful for understanding what patterns are available.
     """
     try:
-        # Get the workflow data
-        workflow = await db_service.get_workflow(workflow_id)
+        # Get the workflow data (workflow and blocks in one query)
+        workflow = await db_service.get_workflow_with_blocks(workflow_id)
         if not workflow:
             raise HTTPException(status_code=404, detail="Workflow not found")
         
-        blocks = await db_service.get_workflow_blocks(workflow_id)
-        
         # Prepare input data
-        input_data = {
-            'workflow_id': workflow_id,
-            'workflow_type': state_generator._determine_workflow_type(workflow, blocks),
-            'name': workflow.get('name', ''),
-            'description': workflow.get('description', ''),
-            'blocks': blocks,
-            'edges': state_generator._infer_edges_from_positions(blocks)
-        }
+        input_data = state_generator.build_input_data(workflow_id, workflow, workflow['blocks'])
         
         # Use enhanced lookup service for hybrid search
         from src.services.enhanced_lookup_service import EnhancedLookupService
@@ -284,52 +492,78 @@ async def find_similar_cached_workflows(workflow_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/workflows/cache/preload")
-async def preload_common_patterns():
+async def preload_common_patterns(
+    background: bool = Query(False, description="Run as a background job and return its id immediately")
+):
     """
     Preload common workflow patterns into the RAG cache.
     Useful for warming up the cache with popular templates.
     """
+    if background:
+        job = await job_manager.submit("cache_preload", lambda job: preload_templates(job.report))
+        return job_accepted(job)
+    
     try:
-        from src.services.templates import template_service
-        from src.services.enhanced_lookup_service import EnhancedLookupService
-        
-        enhanced_lookup = EnhancedLookupService(db_service, os.getenv("OPENAI_API_KEY"))
-        preloaded_count = 0
-        templates = template_service.get_all_templates()
-        
-        for template_name, template_data in templates.items():
-            try:
-                # Generate state for this template
-                template_workflow_data = template_data.get('template_data', {})
-                
-                # Create a mock workflow ID for the template
-                template_workflow_id = f"template_{template_name}"
-                
-                # Generate and cache the state with embedding
-                generated_state = await state_generator.generate_workflow_state(
-                    template_workflow_id, 
-                    template_workflow_data
-                )
-                
-                preloaded_count += 1
-                logger.info(f"Preloaded template: {template_name}")
-                
-            except Exception as template_error:
-                logger.warning(f"Failed to preload template {template_name}: {template_error}")
-                continue
-        
-        return {
-            "message": "RAG cache preloading completed",
-            "templates_processed": len(templates),
-            "patterns_preloaded": preloaded_count,
-            "cache_status": "warmed_up",
-            "next_generations": "Will be significantly faster with semantic understanding"
-        }
-        
+        return await preload_templates()
     except Exception as e:
         logger.error(f"Error preloading cache: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def preload_templates(progress=None) -> Dict[str, Any]:
+    """Generate and cache state for every template, reporting (done, total) progress"""
+    from src.services.templates import template_service
+    
+    preloaded_count = 0
+    templates = template_service.get_all_templates()
+    
+    # Embed every template description in one batched call up front
+    lookup = state_generator.lookup_service
+    descriptions = []
+    for template_name, template_data in templates.items():
+        try:
+            template_workflow_data = template_data.get('template_data', {})
+            input_data = state_generator.build_input_data(
+                f"template_{template_name}",
+                template_workflow_data,
+                template_workflow_data.get('blocks', [])
+            )
+            descriptions.append(await lookup.create_semantic_description(input_data))
+        except Exception as describe_error:
+            logger.debug(f"Skipping pre-embedding for template {template_name}: {describe_error}")
+    if descriptions:
+        await lookup.generate_embeddings(descriptions)
+    
+    for index, (template_name, template_data) in enumerate(templates.items(), start=1):
+        try:
+            # Generate state for this template
+            template_workflow_data = template_data.get('template_data', {})
+            
+            # Create a mock workflow ID for the template
+            template_workflow_id = f"template_{template_name}"
+            
+            # Generate and cache the state with embedding
+            generated_state = await state_generator.generate_workflow_state(
+                template_workflow_id, 
+                template_workflow_data
+            )
+            
+            preloaded_count += 1
+            logger.info(f"Preloaded template: {template_name}")
+            
+        except Exception as template_error:
+            logger.warning(f"Failed to preload template {template_name}: {template_error}")
+        
+        if progress:
+            await progress(index, len(templates))
+    
+    return {
+        "message": "RAG cache preloading completed",
+        "templates_processed": len(templates),
+        "patterns_preloaded": preloaded_count,
+        "cache_status": "warmed_up",
+        "next_generations": "Will be significantly faster with semantic understanding"
+    }
+
 @router.post("/workflows/semantic-search")
 async def semantic_workflow_search(query: str = Body(..., embed=True)):
     """
@@ -343,12 +577,11 @@ async def semantic_workflow_search(query: str = Body(..., embed=True)):
     This endpoint uses embeddings to find semantically similar workflows.
     """
     try:
-        if not os.getenv("OPENAI_API_KEY"):
-            raise HTTPException(status_code=400, detail="OpenAI API key required for semantic search")
-        
         # Use enhanced lookup service for semantic search
         from src.services.enhanced_lookup_service import EnhancedLookupService
         enhanced_lookup = EnhancedLookupService(db_service, os.getenv("OPENAI_API_KEY"))
+        if not enhanced_lookup.embedding_provider:
+            raise HTTPException(status_code=400, detail="An embedding provider is required for semantic search")
         
         # Create semantic description from query
         semantic_desc = f"User query: {query}"
@@ -357,38 +590,43 @@ async def semantic_workflow_search(query: str = Body(..., embed=True)):
         if not embedding:
             raise HTTPException(status_code=500, detail="Failed to generate embedding")
         
-        # Search semantically
+        # Search semantically (pgvector, or the local vector index offline)
         if db_service.use_database:
-            semantic_results = db_service.client.rpc(
+            semantic_results = await db_service.run_query(db_service.client.rpc(
                 'search_similar_workflows_semantic',
                 {
                     'query_embedding': embedding,
                     'match_threshold': 0.75,
                     'match_count': 5
                 }
-            ).execute()
+            ))
+            results = semantic_results.data or []
+        else:
+            results = enhanced_lookup.search_local_index(embedding, match_threshold=0.75, match_count=5)
+        
+        if results:
+            matches = []
+            for result in results:
+                matches.append({
+                    "similarity_score": f"{result['similarity_score']:.2%}",
+                    "semantic_description": result['semantic_description'],
+                    "workflow_type": result['generated_state'].get('metadata', {}).get('workflow_type', 'unknown')
+                })
             
-            if semantic_results.data and len(semantic_results.data) > 0:
-                matches = []
-                for result in semantic_results.data:
-                    matches.append({
-                        "similarity_score": f"{result['similarity_score']:.2%}",
-                        "semantic_description": result['semantic_description'],
-                        "workflow_type": result['generated_state'].get('metadata', {}).get('workflow_type', 'unknown')
-                    })
-                
-                return {
-                    "query": query,
-                    "matches_found": len(matches),
-                    "semantic_matches": matches,
-                    "message": f"Found {len(matches)} semantically similar workflows"
-                }
+            return {
+                "query": query,
+                "matches_found": len(matches),
+                "semantic_matches": matches,
+                "message": f"Found {len(matches)} semantically similar workflows",
+                "embedding_cache": get_embedding_cache().stats()
+            }
         
         return {
             "query": query,
             "matches_found": 0,
             "semantic_matches": [],
-            "message": "No semantic matches found"
+            "message": "No semantic matches found",
+            "embedding_cache": get_embedding_cache().stats()
         }
         
     except HTTPException:
@@ -403,12 +641,12 @@ async def get_marketplace_preview(workflow_id: str):
     Preview how workflow would appear in Agent Forge marketplace
     """
     try:
-        # Get workflow data
-        workflow = await db_service.get_workflow(workflow_id)
+        # Get workflow data (workflow and blocks in one query)
+        workflow = await db_service.get_workflow_with_blocks(workflow_id)
         if not workflow:
             raise HTTPException(status_code=404, detail="Workflow not found")
         
-        blocks = await db_service.get_workflow_blocks(workflow_id)
+        blocks = workflow['blocks']
         state = workflow.get('state', {})
         
         if isinstance(state, str):
@@ -654,15 +892,53 @@ async def validate_workflow_state(workflow_id: str):
         logger.error(f"Error validating state: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/workflows/validate:batch")
+async def validate_all_workflows(
+    page_size: int = Query(500, ge=1, le=5000, description="Workflows fetched per page"),
+    workers: Optional[int] = Query(None, ge=1, le=64, description="Validation worker processes"),
+    process_pool: Optional[bool] = Query(None, description="Validate on worker processes"),
+    write_logs: bool = Query(True, description="Write per-validator results to validation_logs"),
+    background: bool = Query(False, description="Run as a background job and return its id immediately")
+):
+    """
+    Validate every stored workflow and return an aggregated compliance report
+    
+    States are streamed in keyset pages, validated across a process pool and
+    logged to validation_logs with bulk inserts. Use background=true for large
+    tenants and poll GET /api/jobs/{job_id}.
+    """
+    async def run_validation(progress=None):
+        return await batch_validator.validate_all(
+            page_size=page_size,
+            workers=workers,
+            use_process_pool=process_pool,
+            write_logs=write_logs,
+            progress=progress
+        )
+    
+    if background:
+        job = await job_manager.submit(
+            "validate_batch",
+            lambda job: run_validation(job.report),
+            params={"page_size": page_size, "write_logs": write_logs}
+        )
+        return job_accepted(job)
+    
+    try:
+        return await run_validation()
+    except Exception as e:
+        logger.error(f"Error in batch validation: {e}")
+        raise HTTPException(status_code=500, detail=f"Batch validation failed: {str(e)}")
+
 @router.get("/workflows/{workflow_id}/state")
 async def get_workflow_state(workflow_id: str):
     """Get current workflow state"""
     try:
-        workflow = await db_service.get_workflow(workflow_id)
+        workflow = await db_service.get_workflow_with_blocks(workflow_id)
         if not workflow:
             raise HTTPException(status_code=404, detail="Workflow not found")
         
-        blocks = await db_service.get_workflow_blocks(workflow_id)
+        blocks = workflow['blocks']
         
         return {
             "workflow_id": workflow_id,
@@ -673,6 +949,8 @@ async def get_workflow_state(workflow_id: str):
             "block_types": list(set(b['type'] for b in blocks))
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting workflow state: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -794,7 +1072,15 @@ def create_lead_gen_template(customization: Dict[str, Any]) -> Dict[str, Any]:
 # End of workflows.py - duplicate routes removed to fix FastAPI operation ID conflicts 
 
 @router.post("/csv/process")
-async def process_csv_workflows(force_reprocess: bool = False):
+async def process_csv_workflows(
+    force_reprocess: bool = False,
+    bulk: bool = Query(False, description="Use batched upserts with resumable checkpoints"),
+    batch_size: int = Query(500, ge=1, le=5000, description="Rows per upsert in bulk mode"),
+    resume: bool = Query(True, description="Resume a previously interrupted bulk migration"),
+    workers: Optional[int] = Query(None, ge=1, le=64, description="Concurrent migration workers"),
+    process_pool: Optional[bool] = Query(None, description="Build state JSON on worker processes"),
+    background: bool = Query(False, description="Run as a background job and return its id immediately")
+):
     """
     ONE-TIME MIGRATION: Process CSV input data → Supabase output tables
     
@@ -806,12 +1092,49 @@ async def process_csv_workflows(force_reprocess: bool = False):
     
     Args:
         force_reprocess: If true, will reprocess even existing workflows (for testing)
+        bulk: If true, upsert in batches and checkpoint progress after each batch
+        batch_size: Number of rows per upsert call in bulk mode
+        resume: In bulk mode, continue after the last checkpointed workflow
+        workers: Max workflows migrated concurrently (defaults to CSV_MIGRATION_WORKERS)
+        process_pool: Offload CPU-bound state generation to a process pool
+        background: Queue the migration as a job; poll GET /api/jobs/{job_id}
     """
+    async def run_migration(progress=None):
+        # Run the migration with duplicate prevention
+        if bulk:
+            return await csv_processor.process_workflows_bulk(
+                batch_size=batch_size,
+                resume=resume,
+                force_reprocess=force_reprocess,
+                workers=workers,
+                use_process_pool=process_pool,
+                progress=progress
+            )
+        return await csv_processor.process_workflows_from_csv(
+            force_reprocess=force_reprocess,
+            workers=workers,
+            use_process_pool=process_pool,
+            progress=progress
+        )
+    
+    if background:
+        async def migration_job(job):
+            migration_result = await run_migration(job.report)
+            if isinstance(migration_result, dict) and migration_result.get("status") == "error":
+                raise RuntimeError(migration_result.get("error", "CSV migration failed"))
+            return migration_result
+        
+        job = await job_manager.submit(
+            "csv_migration",
+            migration_job,
+            params={"bulk": bulk, "batch_size": batch_size, "force_reprocess": force_reprocess, "resume": resume}
+        )
+        return job_accepted(job)
+    
     try:
         logger.info("🚀 Starting ONE-TIME CSV migration...")
         
-        # Run the migration with duplicate prevention
-        migration_result = await csv_processor.process_workflows_from_csv(force_reprocess=force_reprocess)
+        migration_result = await run_migration()
         
         # Handle different result types
         if isinstance(migration_result, dict):
@@ -899,8 +1222,9 @@ async def reset_migration():
     try:
         if csv_processor.db.use_database:
             # Clear output tables
-            csv_processor.db.client.table("workflow_blocks").delete().neq("id", "").execute()
-            csv_processor.db.client.table("workflow").delete().neq("id", "").execute()
+            await csv_processor.db.run_query(csv_processor.db.client.table("workflow_blocks").delete().neq("id", ""))
+            await csv_processor.db.run_query(csv_processor.db.client.table("workflow").delete().neq("id", ""))
+            csv_processor.clear_checkpoint()
             
             return {
                 "message": "Migration state reset - output tables cleared",
@@ -912,6 +1236,7 @@ async def reset_migration():
             # Clear mock data
             csv_processor.db.mock_workflows.clear()
             csv_processor.db.mock_blocks.clear()
+            csv_processor.clear_checkpoint()
             
             return {
                 "message": "Migration state reset - mock data cleared",
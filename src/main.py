@@ -45,9 +45,27 @@ async def lifespan(app: FastAPI):
     else:
         logger.info("🔄 OpenAI embeddings disabled (no API key)")
     
+    from src.services.metrics_buffer import metrics_buffer
+    metrics_buffer.start()
+    
     yield
     
     logger.info("🔄 Agent Forge State Generator shutting down...")
+    
+    from src.services.job_manager import job_manager
+    await job_manager.shutdown()
+    
+    # Flush buffered cache_stats / ai_usage_logs before the database goes away
+    await metrics_buffer.stop()
+    
+    from src.services.vector_index import save_local_vector_index
+    save_local_vector_index()
+    
+    from src.services.embedding_cache import get_embedding_cache
+    get_embedding_cache().save()
+    
+    from src.utils.database_hybrid import db_service
+    await db_service.shutdown()
 
 # Create FastAPI application
 app = FastAPI(
@@ -82,6 +100,13 @@ except ImportError as e:
     logger.warning(f"⚠️ Could not import workflows router: {e}")
     logger.info("🔄 Running in minimal mode")
 
+try:
+    from src.api.jobs import router as jobs_router
+    app.include_router(jobs_router)
+    logger.info("✅ Jobs router included")
+except ImportError as e:
+    logger.warning(f"⚠️ Could not import jobs router: {e}")
+
 # Pydantic models for demo API
 class WorkflowRowsData(BaseModel):
     id: str
@@ -202,7 +227,7 @@ async def get_random_workflow():
             # Fetch a random workflow
             try:
                 # Get workflow count
-                response = db_service.client.table("workflow_rows").select("id").execute()
+                response = await db_service.run_query(db_service.client.table("workflow_rows").select("id"))
                 workflow_ids = [item['id'] for item in response.data] if response.data else []
                 
                 if workflow_ids:
@@ -210,12 +235,12 @@ async def get_random_workflow():
                     random_workflow_id = random.choice(workflow_ids)
                     
                     # Fetch the workflow
-                    workflow_response = db_service.client.table("workflow_rows").select("*").eq("id", random_workflow_id).execute()
+                    workflow_response = await db_service.run_query(db_service.client.table("workflow_rows").select("*").eq("id", random_workflow_id))
                     workflow_data = workflow_response.data[0] if workflow_response.data else None
                     
                     if workflow_data:
                         # Fetch associated blocks
-                        blocks_response = db_service.client.table("workflow_blocks_rows").select("*").eq("workflow_id", random_workflow_id).execute()
+                        blocks_response = await db_service.run_query(db_service.client.table("workflow_blocks_rows").select("*").eq("workflow_id", random_workflow_id))
                         blocks_data = blocks_response.data if blocks_response.data else []
                         
                         return {
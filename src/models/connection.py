@@ -1,11 +1,21 @@
 # src/models/connection.py
 import os
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+import logging
+from sqlalchemy.engine import make_url
 from dotenv import load_dotenv
 
+try:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession, AsyncEngine
+except ImportError:  # sqlalchemy[asyncio] (greenlet) not installed
+    create_async_engine = None
+    async_sessionmaker = None
+    AsyncSession = None
+    AsyncEngine = None
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Get database URL from environment
 DATABASE_URL = os.getenv("DATABASE_URL")
 
@@ -13,26 +23,52 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if DATABASE_URL and DATABASE_URL.startswith("postgresql://"):
     DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
 
-# Create async engine
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=True,  # Set to False in production
-    pool_pre_ping=True,
-    pool_size=5,
-    max_overflow=10
-)
+
+def create_engine_from_env(database_url: str = None):
+    """
+    Create the async engine with pool and statement-cache settings from the environment
+
+    Returns None when no URL is configured or the asyncio extras are missing.
+    asyncpg prepares every statement it runs and keeps up to
+    DATABASE_STATEMENT_CACHE_SIZE of them per connection, so repeated queries
+    skip the parse/plan step; set it to 0 behind pgbouncer in transaction mode.
+    """
+    database_url = database_url or DATABASE_URL
+    if not database_url:
+        return None
+    if create_async_engine is None:
+        logger.warning("❌ sqlalchemy[asyncio] not installed, async engine unavailable")
+        return None
+
+    url = make_url(database_url)
+    if url.get_backend_name() == "postgresql" and url.get_driver_name() == "asyncpg":
+        url = url.update_query_dict({
+            "prepared_statement_cache_size": os.getenv("DATABASE_STATEMENT_CACHE_SIZE", "500")
+        })
+
+    return create_async_engine(
+        url,
+        echo=os.getenv("DATABASE_ECHO", "false").lower() == "true",
+        pool_pre_ping=True,
+        pool_size=int(os.getenv("DATABASE_POOL_SIZE", "10")),
+        max_overflow=int(os.getenv("DATABASE_MAX_OVERFLOW", "20")),
+        pool_timeout=float(os.getenv("DATABASE_POOL_TIMEOUT", "30")),
+        pool_recycle=int(os.getenv("DATABASE_POOL_RECYCLE", "1800"))
+    )
+
+
+# Create async engine (None without DATABASE_URL)
+engine = create_engine_from_env()
 
 # Create async session factory
-AsyncSessionLocal = sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False
-)
+AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False) if engine is not None else None
 
 async def get_db():
     """Dependency for FastAPI endpoints"""
+    if AsyncSessionLocal is None:
+        raise RuntimeError("DATABASE_URL is not configured")
     async with AsyncSessionLocal() as session:
         try:
             yield session
         finally:
-            await session.close() 
\ No newline at end of file
+            await session.close()
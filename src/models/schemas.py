@@ -90,6 +90,13 @@ class StateGenerationOptions(BaseModel):
     optimization_goal: str = "efficiency"
     include_suggestions: bool = True
     use_ai_enhancement: bool = True
+    deadline_ms: Optional[int] = Field(default=None, gt=0, description="Latency budget for generation; degrades to cached/rule-based tiers when exceeded")
+
+class BatchStateGenerationRequest(BaseModel):
+    workflow_ids: List[str] = Field(..., min_length=1, max_length=10000)
+    options: StateGenerationOptions = Field(default_factory=StateGenerationOptions)
+    concurrency: int = Field(default=8, ge=1, le=64, description="Distinct patterns generated at the same time")
+    include_states: bool = False
 
 class ValidationResult(BaseModel):
     validator_name: str
@@ -0,0 +1,308 @@
+"""
+Batch Validation Service
+Validate every stored workflow state in one run and aggregate a compliance report
+
+Workflow states are streamed from the database in keyset pages, each page is
+split across a process pool (validation is CPU-bound, so threads would share
+one GIL), and per-validator results are written to validation_logs with bulk
+inserts instead of one round trip per workflow.
+"""
+import os
+import json
+import time
+import asyncio
+import logging
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple, Callable, Awaitable
+
+from src.utils.database_hybrid import db_service
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 500
+DEFAULT_LOG_BATCH_SIZE = 1000
+TOP_ISSUES = 20
+MAX_LISTED_WORKFLOWS = 100
+
+# validation_logs.validation_type for each validator ('schema', 'business_rules', 'compliance')
+SCHEMA_VALIDATORS = {
+    "validate_schema",
+    "validate_block_types",
+    "validate_position_bounds",
+    "validate_subblock_structure"
+}
+COMPLIANCE_VALIDATOR = "agent_forge_compliance"
+
+ProgressCallback = Callable[[int, Optional[int]], Awaitable[None]]
+
+
+def _decode_state(state: Any) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """(state, None) or (None, reason) mirroring POST /workflows/{id}/validate"""
+    if not state:
+        return None, "Workflow has no state"
+    if isinstance(state, str):
+        try:
+            state = json.loads(state)
+        except json.JSONDecodeError:
+            return None, "Invalid state format"
+    return state, None
+
+
+async def _validate_items(items: List[Tuple[str, Any]]) -> List[Dict[str, Any]]:
+    from src.services.validation import validator
+
+    outcomes = []
+    for workflow_id, raw_state in items:
+        start = time.perf_counter()
+        state, error = _decode_state(raw_state)
+        report = None
+        if state is not None:
+            try:
+                report = (await validator.validate_state(state, workflow_id)).dict()
+            except Exception as e:
+                error = f"Validation failed: {str(e)}"
+        outcomes.append({
+            "workflow_id": workflow_id,
+            "report": report,
+            "error": error,
+            "execution_time_ms": int((time.perf_counter() - start) * 1000)
+        })
+    return outcomes
+
+
+def validate_states(items: List[Tuple[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Validate (workflow_id, state) pairs and return one outcome dict per pair
+
+    Module-level so a chunk of a page can be shipped to a ProcessPoolExecutor
+    worker; reports come back as plain dicts.
+    """
+    return asyncio.run(_validate_items(items))
+
+
+def validation_log_rows(outcome: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """validation_logs rows for one workflow: one per validator plus an overall compliance row"""
+    report = outcome["report"]
+    if report is None:
+        return []
+
+    rows = []
+    for result in report["validation_results"]:
+        name = result["validator_name"].lstrip("_")
+        rows.append({
+            "workflow_id": outcome["workflow_id"],
+            "validation_type": "schema" if name in SCHEMA_VALIDATORS else "business_rules",
+            "validator_name": name,
+            "passed": result["valid"],
+            "score": None,
+            "error_details": result["errors"],
+            "warnings": result["warnings"],
+            "execution_time_ms": outcome["execution_time_ms"]
+        })
+
+    summary = report["summary"]
+    score = summary["passed_validators"] / summary["total_validators"] * 100 if summary["total_validators"] else 0.0
+    rows.append({
+        "workflow_id": outcome["workflow_id"],
+        "validation_type": "compliance",
+        "validator_name": COMPLIANCE_VALIDATOR,
+        "passed": report["agent_forge_compliance"],
+        "score": round(score, 1),
+        "error_details": [
+            result["validator_name"].lstrip("_") for result in report["validation_results"] if not result["valid"]
+        ],
+        "warnings": [],
+        "execution_time_ms": outcome["execution_time_ms"]
+    })
+    return rows
+
+
+class ComplianceReport:
+    """Running aggregate of validation outcomes across a batch run"""
+
+    def __init__(self):
+        self.validated = 0
+        self.valid = 0
+        self.compliant = 0
+        self.failed: List[Dict[str, Any]] = []
+        self.non_compliant: List[str] = []
+        self.validators: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"passed": 0, "failed": 0, "errors": 0, "warnings": 0}
+        )
+        self.errors: Counter = Counter()
+        self.warnings: Counter = Counter()
+
+    def add(self, outcome: Dict[str, Any]) -> None:
+        report = outcome["report"]
+        if report is None:
+            self.failed.append({"workflow_id": outcome["workflow_id"], "error": outcome["error"]})
+            return
+
+        self.validated += 1
+        self.valid += report["overall_valid"]
+        if report["agent_forge_compliance"]:
+            self.compliant += 1
+        else:
+            self.non_compliant.append(outcome["workflow_id"])
+
+        for result in report["validation_results"]:
+            name = result["validator_name"].lstrip("_")
+            stats = self.validators[name]
+            stats["passed" if result["valid"] else "failed"] += 1
+            stats["errors"] += len(result["errors"])
+            stats["warnings"] += len(result["warnings"])
+            self.errors.update((name, message) for message in result["errors"])
+            self.warnings.update((name, message) for message in result["warnings"])
+
+    def to_dict(self) -> Dict[str, Any]:
+        def rate(count: int) -> float:
+            return round(count / self.validated * 100, 1) if self.validated else 0.0
+
+        def top(counter: Counter) -> List[Dict[str, Any]]:
+            return [
+                {"validator": name, "message": message, "count": count}
+                for (name, message), count in counter.most_common(TOP_ISSUES)
+            ]
+
+        return {
+            "workflows_validated": self.validated,
+            "valid_count": self.valid,
+            "compliant_count": self.compliant,
+            "non_compliant_count": self.validated - self.compliant,
+            "failed_count": len(self.failed),
+            "validity_rate": rate(self.valid),
+            "compliance_rate": rate(self.compliant),
+            "validators": dict(sorted(self.validators.items())),
+            "top_errors": top(self.errors),
+            "top_warnings": top(self.warnings),
+            "non_compliant_workflows": self.non_compliant[:MAX_LISTED_WORKFLOWS],
+            "failed_workflows": self.failed[:MAX_LISTED_WORKFLOWS]
+        }
+
+
+class BatchValidator:
+    """Validate all stored workflows across a process pool"""
+
+    def __init__(self):
+        self.db = db_service
+        self.workers = int(os.getenv("BATCH_VALIDATION_WORKERS", str(os.cpu_count() or 4)))
+        self.use_process_pool = os.getenv("BATCH_VALIDATION_PROCESS_POOL", "true").lower() == "true"
+
+    async def validate_all(
+        self,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        workers: Optional[int] = None,
+        use_process_pool: Optional[bool] = None,
+        write_logs: bool = True,
+        log_batch_size: int = DEFAULT_LOG_BATCH_SIZE,
+        progress: Optional[ProgressCallback] = None
+    ) -> Dict[str, Any]:
+        """
+        Validate every stored workflow and return an aggregated compliance report
+
+        Args:
+            page_size: Workflows fetched per keyset page
+            workers: Worker processes (defaults to BATCH_VALIDATION_WORKERS)
+            use_process_pool: Validate on worker processes instead of inline
+            write_logs: Write per-validator results to validation_logs
+            log_batch_size: validation_logs rows buffered per bulk insert
+            progress: Awaited with (workflows_done, total) after each page
+        """
+        page_size = max(1, int(page_size))
+        workers = max(1, int(workers or self.workers))
+        if use_process_pool is None:
+            use_process_pool = self.use_process_pool
+        start_time = time.perf_counter()
+
+        compliance = ComplianceReport()
+        pending_logs: List[Dict[str, Any]] = []
+        logs = {"written": 0, "failed": 0}
+        process_pool = ProcessPoolExecutor(max_workers=workers) if use_process_pool else None
+
+        async def flush_logs() -> None:
+            rows = pending_logs[:]
+            pending_logs.clear()
+            try:
+                written = await self.db.insert_validation_logs(rows)
+            except Exception as e:
+                logger.error(f"Failed to write {len(rows)} validation_logs rows: {e}")
+                written = 0
+            logs["written"] += written
+            logs["failed"] += len(rows) - written
+
+        try:
+            logger.info(f"🔍 Starting batch validation (page_size={page_size}, workers={workers})...")
+            total = await self.db.get_workflow_count()
+            done = 0
+            error = None
+
+            try:
+                async for page in self.db.iter_workflow_states(page_size):
+                    items = [(row["id"], row.get("state")) for row in page]
+                    for outcome in await self._validate_page(items, workers, process_pool):
+                        compliance.add(outcome)
+                        if write_logs:
+                            pending_logs.extend(validation_log_rows(outcome))
+
+                    if len(pending_logs) >= log_batch_size:
+                        await flush_logs()
+
+                    done += len(page)
+                    if progress:
+                        await progress(done, total)
+                    logger.info(f"📋 Validated {done}/{total} workflows")
+            except Exception as e:
+                # Report what was validated, but never as a complete audit
+                logger.error(f"❌ Batch validation stopped after {done}/{total} workflows: {e}")
+                error = str(e)
+
+            if pending_logs:
+                await flush_logs()
+
+            complete = error is None and done >= total
+            if error is None and not complete:
+                logger.warning(f"⚠️ Batch validation saw {done} of {total} workflows")
+            elapsed = max(time.perf_counter() - start_time, 1e-9)
+            return {
+                "message": "Batch validation completed" if complete else "Batch validation incomplete",
+                "status": "success" if complete else "incomplete",
+                "error": error,
+                "workflows_expected": total,
+                **compliance.to_dict(),
+                "validation_logs_written": logs["written"],
+                "validation_logs_failed": logs["failed"],
+                "page_size": page_size,
+                "workers": workers,
+                "validation": "process_pool" if use_process_pool else "inline",
+                "throughput": {
+                    "elapsed_seconds": round(elapsed, 3),
+                    "workflows_per_second": round(done / elapsed, 1)
+                },
+                "timestamp": datetime.utcnow().isoformat() + "Z"
+            }
+        finally:
+            if process_pool is not None:
+                process_pool.shutdown(wait=False)
+
+    async def _validate_page(
+        self,
+        items: List[Tuple[str, Any]],
+        workers: int,
+        process_pool: Optional[ProcessPoolExecutor]
+    ) -> List[Dict[str, Any]]:
+        """Validate a page inline, or as one chunk per worker process"""
+        if process_pool is None:
+            return await _validate_items(items)
+
+        loop = asyncio.get_running_loop()
+        chunk_size = -(-len(items) // workers)
+        chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+        results = await asyncio.gather(
+            *(loop.run_in_executor(process_pool, validate_states, chunk) for chunk in chunks)
+        )
+        return [outcome for chunk_outcomes in results for outcome in chunk_outcomes]
+
+# Global instance
+batch_validator = BatchValidator()
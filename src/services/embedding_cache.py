@@ -0,0 +1,259 @@
+"""
+Embedding Cache
+Content-addressed cache of embeddings: sha256(model + semantic text) → vector.
+
+Two tiers:
+- memory: LRU with a byte budget (hot descriptions)
+- disk (optional, EMBEDDING_CACHE_PATH): fixed-size float32 slots in a
+  memory-mapped file, one slot per key hash, each tagged with its key digest
+  so several API worker processes can share the same file
+
+Both the lookup service and /workflows/semantic-search go through the same
+process-wide instance, so a description is embedded once, not once per miss
+and again on store.
+"""
+import os
+import mmap
+import struct
+import hashlib
+import logging
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: slots are still checksummed, but not locked across processes
+    fcntl = None
+from typing import Dict, Any, List, Optional
+
+from src.utils.lru_cache import LRUTTLCache
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DIM = 1536
+DEFAULT_MEMORY_BYTES = 64 * 1024 * 1024
+DEFAULT_DISK_ENTRIES = 100_000
+NEVER_EXPIRES = float("inf")
+
+# Slot file layout: header (magic, dim, capacity, entries), then per slot sha256 digest + float32 vector
+HEADER = struct.Struct("<4sIIQ")
+HEADER_SIZE = 32
+ENTRIES_OFFSET = 12
+SLOTS_MAGIC = b"EMB1"
+DIGEST_SIZE = 32
+EMPTY_DIGEST = bytes(DIGEST_SIZE)
+
+
+def embedding_key(text: str, model: str) -> str:
+    """Stable content hash for a text under a given embedding model"""
+    return hashlib.sha256(f"{model}\x00{text}".encode("utf-8")).hexdigest()
+
+
+class DiskEmbeddingStore:
+    """
+    Fixed-slot float32 vectors in a memory-mapped file, shareable across processes
+
+    A key always maps to the same slot (its hash modulo the capacity), so there
+    is no in-memory index to go stale: every API worker opening the same path
+    sees the others' writes. Each slot stores the key digest next to the
+    vector and reads check it, so a slot taken over by a colliding key, or half
+    written when a process died, is a miss rather than another key's vector.
+    Slot and header updates hold a POSIX record lock (where fcntl exists).
+    """
+
+    def __init__(self, path: str, dim: int = EMBEDDING_DIM, capacity: int = DEFAULT_DISK_ENTRIES):
+        self.path = path
+        self.dim = dim
+        self.record_size = DIGEST_SIZE + dim * 4
+        self._vector_format = f"<{dim}f"
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+        slots_path = os.path.join(path, "embeddings.slots")
+        self._file = open(slots_path, "a+b")
+        self._lock_range(fcntl.LOCK_EX if fcntl else None, 0, 0)
+        try:
+            self._file.seek(0)
+            header = self._file.read(HEADER.size)
+            if len(header) < HEADER.size:
+                # New file: the first process to open it fixes dim and capacity
+                self._file.truncate(0)
+                self._file.write(HEADER.pack(SLOTS_MAGIC, dim, capacity, 0))
+                self._file.truncate(HEADER_SIZE + capacity * self.record_size)
+                self._file.flush()
+            else:
+                magic, file_dim, capacity, _ = HEADER.unpack(header)
+                if magic != SLOTS_MAGIC or file_dim != dim:
+                    raise ValueError(f"{slots_path} holds dim {file_dim} vectors, expected {dim}")
+        finally:
+            self._lock_range(fcntl.LOCK_UN if fcntl else None, 0, 0)
+
+        self.capacity = capacity
+        size = HEADER_SIZE + capacity * self.record_size
+        self._mmap = mmap.mmap(self._file.fileno(), size)
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return HEADER.unpack_from(self._mmap, 0)[3]
+
+    def get(self, key: str) -> Optional[List[float]]:
+        digest = bytes.fromhex(key)
+        offset = self._offset(key)
+        with self._lock:
+            self._lock_range(fcntl.LOCK_SH if fcntl else None, offset, self.record_size)
+            try:
+                if self._mmap[offset:offset + DIGEST_SIZE] != digest:
+                    return None
+                return list(struct.unpack_from(self._vector_format, self._mmap, offset + DIGEST_SIZE))
+            finally:
+                self._lock_range(fcntl.LOCK_UN if fcntl else None, offset, self.record_size)
+
+    def set(self, key: str, vector: List[float]) -> bool:
+        if len(vector) != self.dim:
+            return False
+        digest = bytes.fromhex(key)
+        offset = self._offset(key)
+        with self._lock:
+            self._lock_range(fcntl.LOCK_EX if fcntl else None, offset, self.record_size)
+            try:
+                previous = self._mmap[offset:offset + DIGEST_SIZE]
+                # Clear the digest first so a crash mid-write leaves an empty slot
+                self._mmap[offset:offset + DIGEST_SIZE] = EMPTY_DIGEST
+                struct.pack_into(self._vector_format, self._mmap, offset + DIGEST_SIZE, *vector)
+                self._mmap[offset:offset + DIGEST_SIZE] = digest
+            finally:
+                self._lock_range(fcntl.LOCK_UN if fcntl else None, offset, self.record_size)
+            if previous == EMPTY_DIGEST:
+                self._add_entries(1)
+            elif previous != digest:
+                self.evictions += 1
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._lock_range(fcntl.LOCK_EX if fcntl else None, 0, 0)
+            try:
+                for slot in range(self.capacity):
+                    offset = HEADER_SIZE + slot * self.record_size
+                    self._mmap[offset:offset + DIGEST_SIZE] = EMPTY_DIGEST
+                struct.pack_into("<Q", self._mmap, ENTRIES_OFFSET, 0)
+            finally:
+                self._lock_range(fcntl.LOCK_UN if fcntl else None, 0, 0)
+
+    def save(self) -> None:
+        """Flush written vectors to disk"""
+        with self._lock:
+            self._mmap.flush()
+
+    def close(self) -> None:
+        self.save()
+        self._mmap.close()
+        self._file.close()
+
+    def _offset(self, key: str) -> int:
+        return HEADER_SIZE + int(key[:16], 16) % self.capacity * self.record_size
+
+    def _add_entries(self, count: int) -> None:
+        self._lock_range(fcntl.LOCK_EX if fcntl else None, ENTRIES_OFFSET, 8)
+        try:
+            entries = struct.unpack_from("<Q", self._mmap, ENTRIES_OFFSET)[0]
+            struct.pack_into("<Q", self._mmap, ENTRIES_OFFSET, entries + count)
+        finally:
+            self._lock_range(fcntl.LOCK_UN if fcntl else None, ENTRIES_OFFSET, 8)
+
+    def _lock_range(self, operation: Optional[int], offset: int, length: int) -> None:
+        """Lock ``length`` bytes at ``offset`` (0 = to end of file) against other processes"""
+        if operation is not None:
+            fcntl.lockf(self._file.fileno(), operation, length, offset)
+
+
+class EmbeddingCache:
+    """Memory LRU in front of an optional memory-mapped disk store"""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        memory_bytes: int = DEFAULT_MEMORY_BYTES,
+        disk_entries: int = DEFAULT_DISK_ENTRIES,
+        dim: int = EMBEDDING_DIM
+    ):
+        self.memory = LRUTTLCache(
+            max_bytes=memory_bytes,
+            ttl_seconds=NEVER_EXPIRES,
+            max_entries=max(1, memory_bytes // (dim * 8)) * 2,
+            size_of=lambda vector: len(vector) * 8
+        )
+        self.disk: Optional[DiskEmbeddingStore] = None
+        if path:
+            try:
+                self.disk = DiskEmbeddingStore(path, dim=dim, capacity=disk_entries)
+                logger.info(f"✅ Embedding cache spilling to {path} ({len(self.disk)} vectors on disk)")
+            except Exception as e:
+                logger.warning(f"❌ Embedding cache disk tier unavailable ({e}), using memory only")
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def get(self, text: str, model: str) -> Optional[List[float]]:
+        key = embedding_key(text, model)
+        vector = self.memory.get(key)
+        if vector is not None:
+            self.memory_hits += 1
+            return vector
+        if self.disk is not None:
+            vector = self.disk.get(key)
+            if vector is not None:
+                self.disk_hits += 1
+                self.memory.set(key, vector)
+                return vector
+        self.misses += 1
+        return None
+
+    def set(self, text: str, model: str, vector: List[float]) -> None:
+        key = embedding_key(text, model)
+        self.memory.set(key, vector)
+        if self.disk is not None:
+            self.disk.set(key, vector)
+        self.writes += 1
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def save(self) -> None:
+        if self.disk is not None:
+            self.disk.save()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        hits = self.memory_hits + self.disk_hits
+        return {
+            "hits": hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "writes": self.writes,
+            "memory_entries": len(self.memory),
+            "memory_bytes": self.memory.current_bytes,
+            "memory_evictions": self.memory.evictions,
+            "disk_entries": len(self.disk) if self.disk is not None else 0,
+            "disk_evictions": self.disk.evictions if self.disk is not None else 0,
+            "disk_path": self.disk.path if self.disk is not None else None
+        }
+
+
+_embedding_cache: Optional[EmbeddingCache] = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Process-wide embedding cache configured from the environment"""
+    global _embedding_cache
+    if _embedding_cache is None:
+        _embedding_cache = EmbeddingCache(
+            path=os.getenv("EMBEDDING_CACHE_PATH") or None,
+            memory_bytes=int(os.getenv("EMBEDDING_CACHE_MEMORY_BYTES", str(DEFAULT_MEMORY_BYTES))),
+            disk_entries=int(os.getenv("EMBEDDING_CACHE_DISK_ENTRIES", str(DEFAULT_DISK_ENTRIES)))
+        )
+    return _embedding_cache
@@ -0,0 +1,143 @@
+"""
+Embedding Providers
+Pluggable text → vector backends for RAG lookups.
+
+- OpenAIEmbeddingProvider: text-embedding-3-small, many texts per API call
+- HashedNgramEmbeddingProvider: deterministic, offline hashed word/char n-gram
+  vectors projected to the same 1536 dims, so pgvector and the local index
+  schema work unchanged without an API key
+
+Vectors from different providers live in different spaces; keep one provider
+per deployment (EMBEDDING_PROVIDER) so stored and query embeddings match.
+With a database configured, local vectors are only used when chosen
+explicitly: pgvector rows don't record which provider wrote them, so a
+silent fallback would mix both spaces in one search.
+"""
+import os
+import re
+import math
+import hashlib
+import logging
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DIM = 1536
+OPENAI_MAX_BATCH = 2048  # inputs per embeddings.create request
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+class EmbeddingProvider(ABC):
+    """Interface: embed one text or a batch of texts"""
+
+    name = "base"
+    model = "base"
+    dim = EMBEDDING_DIM
+    billable = False
+
+    async def embed(self, text: str) -> List[float]:
+        return (await self.embed_many([text]))[0]
+
+    @abstractmethod
+    async def embed_many(self, texts: List[str]) -> List[List[float]]:
+        ...
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """OpenAI embeddings with request batching"""
+
+    name = "openai"
+    billable = True
+
+    def __init__(self, client: Any, model: str = "text-embedding-3-small", batch_size: int = OPENAI_MAX_BATCH):
+        self.client = client
+        self.model = model
+        self.batch_size = min(batch_size, OPENAI_MAX_BATCH)
+
+    async def embed_many(self, texts: List[str]) -> List[List[float]]:
+        vectors: List[List[float]] = []
+        for offset in range(0, len(texts), self.batch_size):
+            chunk = texts[offset:offset + self.batch_size]
+            response = await self.client.embeddings.create(model=self.model, input=chunk)
+            # The API returns items with an index; don't rely on response order
+            ordered = sorted(response.data, key=lambda item: getattr(item, "index", 0))
+            vectors.extend(item.embedding for item in ordered)
+        return vectors
+
+
+class HashedNgramEmbeddingProvider(EmbeddingProvider):
+    """
+    Deterministic local embeddings via the hashing trick
+
+    Word unigrams/bigrams and character trigrams are hashed (blake2b, stable
+    across processes) into ``dim`` signed buckets with sublinear TF weights,
+    then L2-normalised so cosine similarity reflects shared n-grams.
+    """
+
+    name = "local"
+    model = "hashed-ngram-v1"
+
+    def __init__(self, dim: int = EMBEDDING_DIM, char_ngram: int = 3):
+        self.dim = dim
+        self.char_ngram = char_ngram
+
+    async def embed_many(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_sync(text) for text in texts]
+
+    def embed_sync(self, text: str) -> List[float]:
+        vector = [0.0] * self.dim
+        for feature, count in self._features(text).items():
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dim
+            sign = 1.0 if digest[4] & 1 else -1.0
+            vector[bucket] += sign * (1.0 + math.log(count))
+
+        norm = math.sqrt(sum(value * value for value in vector))
+        if norm:
+            vector = [value / norm for value in vector]
+        return vector
+
+    def _features(self, text: str) -> Counter:
+        tokens = _TOKEN_RE.findall((text or "").lower())
+        features: Counter = Counter(f"w:{token}" for token in tokens)
+        features.update(f"b:{a}_{b}" for a, b in zip(tokens, tokens[1:]))
+        n = self.char_ngram
+        for token in tokens:
+            padded = f"#{token}#"
+            features.update(f"c:{padded[i:i + n]}" for i in range(max(1, len(padded) - n + 1)))
+        return features
+
+
+def create_embedding_provider(
+    openai_client: Optional[Any] = None,
+    use_database: bool = False
+) -> Optional[EmbeddingProvider]:
+    """
+    Pick a provider from EMBEDDING_PROVIDER: "openai", "local", "none" or "auto"
+    (default: OpenAI when a client is configured, otherwise local hashing)
+
+    With ``use_database`` and no OpenAI client, "auto" and "openai" disable
+    embeddings instead of falling back to local vectors.
+    """
+    choice = os.getenv("EMBEDDING_PROVIDER", "auto").lower()
+
+    if choice == "none":
+        return None
+    if choice == "openai" or (choice == "auto" and openai_client is not None):
+        if openai_client is not None:
+            return OpenAIEmbeddingProvider(openai_client)
+        if use_database:
+            logger.error("❌ EMBEDDING_PROVIDER=openai but no OpenAI client; semantic lookups disabled")
+            return None
+        logger.warning("❌ EMBEDDING_PROVIDER=openai but no OpenAI client, using local embeddings")
+        return HashedNgramEmbeddingProvider()
+    if choice == "auto" and use_database:
+        logger.error(
+            "❌ No OpenAI client for database embeddings; semantic lookups disabled "
+            "(set EMBEDDING_PROVIDER=local to store local embeddings instead)"
+        )
+        return None
+    return HashedNgramEmbeddingProvider()
@@ -5,10 +5,33 @@ from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime
 import logging
 import asyncio
+import os
 import time
+from src.utils.lru_cache import LRUTTLCache
+from src.services.metrics_buffer import metrics_buffer
+from src.services.embeddings import create_embedding_provider
+from src.services.embedding_cache import get_embedding_cache
+from src.utils.lazy import LazyClient, module_available
 
 logger = logging.getLogger(__name__)
 
+# L1 tier in front of workflow_lookup, keyed by generate_lookup_key. Module-level so
+# it is shared by every EnhancedLookupService instance (the API builds one per request).
+structural_match_cache = LRUTTLCache(
+    max_bytes=int(os.getenv("LOOKUP_L1_MAX_BYTES", str(32 * 1024 * 1024))),
+    ttl_seconds=float(os.getenv("LOOKUP_L1_TTL_SECONDS", "300"))
+)
+
+def _create_openai_client(api_key: str):
+    import openai
+    return openai.AsyncOpenAI(api_key=api_key)
+
+async def _timed(coro) -> Tuple[Any, float]:
+    """Await a coroutine and return (result, elapsed milliseconds)"""
+    start = time.perf_counter()
+    result = await coro
+    return result, round((time.perf_counter() - start) * 1000, 2)
+
 class EnhancedLookupService:
     """Enhanced lookup service with RAG capabilities"""
     
@@ -21,20 +44,28 @@ class EnhancedLookupService:
         # Initialize OpenAI client if key provided
         self.openai_client = None
         if openai_api_key:
-            try:
-                import openai
-                self.openai_client = openai.AsyncOpenAI(api_key=openai_api_key)
+            if module_available("openai"):
+                # openai is imported and the client built on the first embedding request
+                self.openai_client = LazyClient("OpenAI", lambda: _create_openai_client(openai_api_key))
                 logger.info("✅ OpenAI embeddings enabled for RAG")
-            except ImportError:
+            else:
                 logger.warning("❌ OpenAI library not installed, embeddings disabled")
         else:
             logger.info("🔄 OpenAI embeddings disabled (no API key)")
+        
+        # "parallel" runs structural and semantic lookups concurrently; "sequential" is structural-first
+        self.hybrid_search_mode = os.getenv("LOOKUP_HYBRID_MODE", "parallel").lower()
+        
+        # Local hashed n-gram embeddings are used when OpenAI isn't available (offline, or chosen explicitly)
+        self.embedding_provider = create_embedding_provider(self.openai_client, db_service.use_database)
+        if self.embedding_provider:
+            self.embedding_model = self.embedding_provider.model
 
     async def log_ai_usage(self, provider: str, model: str, operation_type: str, 
                           workflow_id: Optional[str] = None, token_count: Optional[int] = None, 
                           cost_estimate: Optional[float] = None, response_time: Optional[float] = None, 
                           status: str = "success", error_message: Optional[str] = None):
-        """Log AI usage to the ai_usage_logs table"""
+        """Log AI usage to the ai_usage_logs table (write-behind)"""
         try:
             if self.db_service.use_database:
                 log_data = {
@@ -50,92 +81,85 @@ class EnhancedLookupService:
                     "created_at": datetime.utcnow().isoformat()
                 }
                 
-                result = self.db_service.client.table('ai_usage_logs').insert(log_data).execute()
+                # Buffered; written in batches by the metrics flush loop
+                metrics_buffer.record_ai_usage(log_data)
                 logger.debug(f"AI usage logged: {provider}/{model} - {operation_type}")
         except Exception as e:
             logger.error(f"Failed to log AI usage: {e}")
 
     async def log_cache_stats(self, cache_type: str, hit: bool):
-        """Log cache hit/miss to the cache_stats table"""
+        """Log cache hit/miss to the cache_stats table (write-behind)"""
         try:
             if self.db_service.use_database:
-                # Try to find existing stats for today
-                today = datetime.utcnow().date().isoformat()
-                
-                # Check if we have stats for today
-                existing = self.db_service.client.table('cache_stats').select(
-                    'id', 'hit_count', 'miss_count'
-                ).eq('cache_type', cache_type).eq('period_start', today).execute()
-                
-                if existing.data:
-                    # Update existing record
-                    record = existing.data[0]
-                    if hit:
-                        new_hit_count = record['hit_count'] + 1
-                        new_miss_count = record['miss_count']
-                    else:
-                        new_hit_count = record['hit_count']
-                        new_miss_count = record['miss_count'] + 1
-                    
-                    self.db_service.client.table('cache_stats').update({
-                        'hit_count': new_hit_count,
-                        'miss_count': new_miss_count
-                    }).eq('id', record['id']).execute()
-                else:
-                    # Create new record
-                    self.db_service.client.table('cache_stats').insert({
-                        'cache_type': cache_type,
-                        'hit_count': 1 if hit else 0,
-                        'miss_count': 0 if hit else 1,
-                        'period_start': today
-                    }).execute()
-                    
+                # Aggregated in memory and flushed as atomic increments
+                metrics_buffer.record_cache_event(cache_type, hit)
                 logger.debug(f"Cache stats logged: {cache_type} - {'HIT' if hit else 'MISS'}")
         except Exception as e:
             logger.error(f"Failed to log cache stats: {e}")
     
     async def generate_embedding(self, text: str) -> Optional[List[float]]:
         """Generate embedding for workflow description"""
-        if not self.openai_client:
-            logger.warning("OpenAI client not initialized - no API key")
+        embeddings = await self.generate_embeddings([text])
+        return embeddings[0] if embeddings else None
+    
+    async def generate_embeddings(self, texts: List[str]) -> Optional[List[List[float]]]:
+        """Generate embeddings for many descriptions with one provider call"""
+        if not self.embedding_provider:
+            logger.warning("No embedding provider configured")
             return None
-            
+        
+        # Content-addressed: identical descriptions share one vector across requests and restarts
+        cache = get_embedding_cache()
+        model = self.embedding_provider.model
+        embeddings = [cache.get(text, model) for text in texts]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if not missing:
+            return embeddings
+        
+        # Deduplicate so repeated descriptions are embedded once
+        unique_texts = list(dict.fromkeys(texts[i] for i in missing))
+        
         start_time = time.time()
         try:
-            logger.info(f"Generating embedding for text: {text[:50]}...")
-            response = await self.openai_client.embeddings.create(
-                model=self.embedding_model,
-                input=text
-            )
+            logger.info(f"Generating {len(unique_texts)} embedding(s) with {self.embedding_provider.name} provider")
+            vectors = await self.embedding_provider.embed_many(unique_texts)
             response_time = (time.time() - start_time) * 1000  # Convert to milliseconds
             
-            # Estimate cost (OpenAI text-embedding-3-small: $0.00002 per 1K tokens)
-            token_count = len(text.split()) * 1.3  # Rough token estimation
-            cost_estimate = (token_count / 1000) * 0.00002
+            if self.embedding_provider.billable:
+                # Estimate cost (OpenAI text-embedding-3-small: $0.00002 per 1K tokens)
+                token_count = sum(len(text.split()) for text in unique_texts) * 1.3  # Rough token estimation
+                cost_estimate = (token_count / 1000) * 0.00002
+                
+                # Log AI usage (one row per batched call)
+                await self.log_ai_usage(
+                    provider=self.embedding_provider.name,
+                    model=self.embedding_model,
+                    operation_type="embedding",
+                    token_count=int(token_count),
+                    cost_estimate=cost_estimate,
+                    response_time=response_time,
+                    status="success"
+                )
             
-            # Log AI usage
-            await self.log_ai_usage(
-                provider="openai",
-                model=self.embedding_model,
-                operation_type="embedding",
-                token_count=int(token_count),
-                cost_estimate=cost_estimate,
-                response_time=response_time,
-                status="success"
-            )
+            by_text = dict(zip(unique_texts, vectors))
+            for text, vector in by_text.items():
+                cache.set(text, model, vector)
+            for i in missing:
+                embeddings[i] = by_text[texts[i]]
             
             logger.info("✅ Embedding generated successfully")
-            return response.data[0].embedding
+            return embeddings
         except Exception as e:
             response_time = (time.time() - start_time) * 1000
-            await self.log_ai_usage(
-                provider="openai",
-                model=self.embedding_model,
-                operation_type="embedding",
-                response_time=response_time,
-                status="error",
-                error_message=str(e)
-            )
+            if self.embedding_provider.billable:
+                await self.log_ai_usage(
+                    provider=self.embedding_provider.name,
+                    model=self.embedding_model,
+                    operation_type="embedding",
+                    response_time=response_time,
+                    status="error",
+                    error_message=str(e)
+                )
             logger.error(f"❌ Error generating embedding: {e}")
             logger.error(f"Error type: {type(e).__name__}")
             return None
@@ -200,10 +224,17 @@ class EnhancedLookupService:
             
             logger.info(f"Looking for similar workflows: type={workflow_type}, blocks={block_count}")
             
+            lookup_key = self.generate_lookup_key(workflow_data)
             if self.db_service.use_database:
+                # L1 hit: served from process memory without touching Postgres
+                cached = structural_match_cache.get(lookup_key)
+                if cached is not None:
+                    logger.info(f"⚡ L1 cache hit for lookup key {lookup_key}")
+                    return cached["match"]
+                
                 # Use database function for similarity search
                 try:
-                    result = self.db_service.client.rpc(
+                    result = await self.db_service.run_query(self.db_service.client.rpc(
                         'find_similar_workflows',
                         {
                             'p_workflow_type': workflow_type,
@@ -211,7 +242,7 @@ class EnhancedLookupService:
                             'p_block_count': block_count,
                             'p_similarity_threshold': self.similarity_threshold
                         }
-                    ).execute()
+                    ))
                     
                     if result.data and len(result.data) > 0:
                         best_match = result.data[0]
@@ -219,15 +250,22 @@ class EnhancedLookupService:
                             logger.info(f"Found similar workflow with {best_match['similarity_score']:.2%} similarity")
                             
                             # Update usage count
-                            self.db_service.client.table('workflow_lookup').update({
+                            await self.db_service.run_query(self.db_service.client.table('workflow_lookup').update({
                                 'usage_count': best_match['usage_count'] + 1,
                                 'last_used_at': datetime.utcnow().isoformat()
-                            }).eq('id', best_match['lookup_id']).execute()
+                            }).eq('id', best_match['lookup_id']))
                             
-                            return (
+                            match = (
                                 best_match['generated_state'],
                                 best_match['similarity_score']
                             )
+                            structural_match_cache.set(lookup_key, {"match": match, "rpc_hit": True})
+                            return match
+                    
+                    # Below-threshold results are cached too; any store invalidates them
+                    match = await self._mock_similarity_search(workflow_data)
+                    structural_match_cache.set(lookup_key, {"match": match, "rpc_hit": False})
+                    return match
                 except Exception as db_error:
                     logger.warning(f"Database lookup failed, using fallback: {db_error}")
             
@@ -243,7 +281,7 @@ class EnhancedLookupService:
         workflow_data: Dict[str, Any]
     ) -> Optional[Tuple[Dict[str, Any], float]]:
         """Find similar workflows using semantic embeddings"""
-        if not self.openai_client or not self.db_service.use_database:
+        if not self.embedding_provider:
             return None
             
         try:
@@ -254,15 +292,19 @@ class EnhancedLookupService:
             if not embedding:
                 return None
             
+            if not self.db_service.use_database:
+                # Offline: search the in-process index instead of pgvector
+                return self._search_local_index(embedding)
+            
             # Semantic search
-            semantic_results = self.db_service.client.rpc(
+            semantic_results = await self.db_service.run_query(self.db_service.client.rpc(
                 'search_similar_workflows_semantic',
                 {
                     'query_embedding': embedding,
                     'match_threshold': 0.75,
                     'match_count': 5
                 }
-            ).execute()
+            ))
             
             if semantic_results.data and len(semantic_results.data) > 0:
                 best_semantic = semantic_results.data[0]
@@ -277,45 +319,129 @@ class EnhancedLookupService:
         
         return None
     
+    def _search_local_index(
+        self,
+        embedding: List[float],
+        match_threshold: float = 0.75
+    ) -> Optional[Tuple[Dict[str, Any], float]]:
+        """Best cosine match from the local vector index, mirroring search_similar_workflows_semantic"""
+        matches = self.search_local_index(embedding, match_threshold, match_count=1)
+        if not matches:
+            return None
+        return (matches[0]['generated_state'], matches[0]['similarity_score'])
+    
+    def search_local_index(
+        self,
+        embedding: List[float],
+        match_threshold: float = 0.75,
+        match_count: int = 5
+    ) -> List[Dict[str, Any]]:
+        """Local vector index matches, shaped like search_similar_workflows_semantic rows"""
+        from src.services.vector_index import get_local_vector_index  # numpy loads on first semantic lookup
+        index = get_local_vector_index()
+        if index is None:
+            return []
+        return [
+            {
+                'lookup_key': payload.get('lookup_key', item_id),
+                'workflow_type': payload.get('workflow_type'),
+                'semantic_description': payload.get('semantic_description'),
+                'generated_state': payload['generated_state'],
+                'similarity_score': score
+            }
+            for item_id, score, payload in index.search(embedding, k=match_count, threshold=match_threshold)
+        ]
+    
     async def find_similar_workflows_hybrid(
         self, 
         workflow_data: Dict[str, Any]
     ) -> Optional[Tuple[Dict[str, Any], float, str]]:
         """Hybrid search: structural + semantic with cache statistics"""
+        start_time = time.perf_counter()
+        if self.hybrid_search_mode == "parallel":
+            structural_match, semantic_match, search_info = await self._search_parallel(workflow_data)
+        else:
+            structural_match, semantic_match, search_info = await self._search_sequential(workflow_data)
+        search_info["mode"] = self.hybrid_search_mode
+        search_info["total_ms"] = round((time.perf_counter() - start_time) * 1000, 2)
         
-        # 1. Try structural match first (fast)
-        structural_match = await self.find_similar_workflows_structural(workflow_data)
-        
+        # 1. High confidence structural match
         if structural_match and structural_match[1] >= 0.9:
-            # High confidence structural match
             await self.log_cache_stats("structural_match", hit=True)
             logger.info(f"✅ Structural cache hit: {structural_match[1]:.1%} similarity")
-            return (*structural_match, "structural")
-        
-        # 2. Try semantic search if available
-        semantic_match = await self.find_similar_workflows_semantic(workflow_data)
+            return self._with_search_info(structural_match, "structural", search_info)
         
+        # 2. High confidence semantic match
         if semantic_match and semantic_match[1] >= 0.85:
-            # High confidence semantic match
             await self.log_cache_stats("semantic_match", hit=True)
             logger.info(f"✅ Semantic cache hit: {semantic_match[1]:.1%} similarity")
-            return (*semantic_match, "semantic")
+            return self._with_search_info(semantic_match, "semantic", search_info)
         
         # 3. Return best available match
         if structural_match:
             await self.log_cache_stats("structural_match", hit=True)
             logger.info(f"✅ Lower confidence structural hit: {structural_match[1]:.1%}")
-            return (*structural_match, "structural")
+            return self._with_search_info(structural_match, "structural", search_info)
         elif semantic_match:
             await self.log_cache_stats("semantic_match", hit=True)
             logger.info(f"✅ Lower confidence semantic hit: {semantic_match[1]:.1%}")
-            return (*semantic_match, "semantic")
+            return self._with_search_info(semantic_match, "semantic", search_info)
         
         # Cache miss - log it
         await self.log_cache_stats("overall", hit=False)
-        logger.info("❌ Cache miss - no similar workflow found")
+        logger.info(f"❌ Cache miss - no similar workflow found ({search_info['total_ms']}ms)")
         return None
     
+    async def _search_sequential(self, workflow_data: Dict[str, Any]) -> Tuple[Any, Any, Dict[str, Any]]:
+        """Structural first (fast); semantic only when it isn't a high-confidence hit"""
+        structural_match, structural_ms = await _timed(self.find_similar_workflows_structural(workflow_data))
+        search_info = {"structural_ms": structural_ms, "semantic_ms": None, "semantic_cancelled": False}
+        if structural_match and structural_match[1] >= 0.9:
+            return structural_match, None, search_info
+        
+        semantic_match, search_info["semantic_ms"] = await _timed(self.find_similar_workflows_semantic(workflow_data))
+        return structural_match, semantic_match, search_info
+    
+    async def _search_parallel(self, workflow_data: Dict[str, Any]) -> Tuple[Any, Any, Dict[str, Any]]:
+        """
+        Run both branches concurrently
+        
+        A structural hit >= 0.9 cancels the semantic branch; otherwise both are
+        awaited so the result is identical to the sequential mode, but a miss
+        costs max(structural, semantic) instead of their sum.
+        """
+        structural_task = asyncio.create_task(_timed(self.find_similar_workflows_structural(workflow_data)))
+        semantic_task = asyncio.create_task(_timed(self.find_similar_workflows_semantic(workflow_data)))
+        search_info = {"structural_ms": None, "semantic_ms": None, "semantic_cancelled": False}
+        
+        try:
+            structural_match, search_info["structural_ms"] = await structural_task
+            if structural_match and structural_match[1] >= 0.9 and not semantic_task.done():
+                semantic_task.cancel()
+                search_info["semantic_cancelled"] = True
+                await asyncio.gather(semantic_task, return_exceptions=True)
+                return structural_match, None, search_info
+            
+            semantic_match, search_info["semantic_ms"] = await semantic_task
+            return structural_match, semantic_match, search_info
+        finally:
+            for task in (structural_task, semantic_task):
+                if not task.done():
+                    task.cancel()
+    
+    @staticmethod
+    def _with_search_info(
+        match: Tuple[Dict[str, Any], float],
+        match_type: str,
+        search_info: Dict[str, Any]
+    ) -> Tuple[Dict[str, Any], float, str]:
+        """Attach branch timings to a copy of the matched state's metadata"""
+        state, score = match
+        if isinstance(state, dict):
+            # Shallow copy: the matched state may be shared through the L1 cache
+            state = {**state, "metadata": {**(state.get("metadata") or {}), "hybrid_search": search_info}}
+        return (state, score, match_type)
+    
     async def _mock_similarity_search(self, workflow_data: Dict[str, Any]) -> Optional[Tuple[Dict[str, Any], float]]:
         """Mock similarity search for development/fallback"""
         # Simple pattern matching for common workflow types
@@ -380,7 +506,7 @@ class EnhancedLookupService:
             }
             
             # Add semantic description and embedding if available
-            if self.openai_client:
+            if self.embedding_provider:
                 semantic_desc = await self.create_semantic_description(input_data)
                 lookup_data['semantic_description'] = semantic_desc
                 
@@ -390,11 +516,12 @@ class EnhancedLookupService:
             
             if self.db_service.use_database:
                 # Store in database
-                result = self.db_service.client.table('workflow_lookup').upsert(
+                result = await self.db_service.run_query(self.db_service.client.table('workflow_lookup').upsert(
                     lookup_data,
                     on_conflict='lookup_key'
-                ).execute()
+                ))
                 
+                invalidate_structural_cache(lookup_key)
                 logger.info(f"Stored workflow pattern with key: {lookup_key}")
             else:
                 # Store in mock cache (in-memory)
@@ -402,6 +529,18 @@ class EnhancedLookupService:
                     self.db_service.mock_lookup_cache = {}
                 
                 self.db_service.mock_lookup_cache[lookup_key] = lookup_data
+                
+                # Make the pattern searchable offline
+                from src.services.vector_index import get_local_vector_index
+                index = get_local_vector_index()
+                if index is not None and lookup_data.get('embedding'):
+                    index.add(lookup_key, lookup_data['embedding'], {
+                        'lookup_key': lookup_key,
+                        'workflow_type': lookup_data['workflow_type'],
+                        'semantic_description': lookup_data.get('semantic_description'),
+                        'generated_state': generated_state
+                    })
+                
                 logger.info(f"Stored workflow pattern in mock cache: {lookup_key}")
             
             return True
@@ -418,11 +557,11 @@ class EnhancedLookupService:
         """Create a temporary record for processing"""
         try:
             if self.db_service.use_database:
-                result = self.db_service.client.table('workflow_temp').insert({
+                result = await self.db_service.run_query(self.db_service.client.table('workflow_temp').insert({
                     'session_id': session_id,
                     'input_data': input_data,
                     'processing_status': 'pending'
-                }).execute()
+                }))
                 
                 return result.data[0]['id']
             else:
@@ -457,9 +596,9 @@ class EnhancedLookupService:
                 update_data['similarity_score'] = similarity_score
             
             if self.db_service.use_database:
-                self.db_service.client.table('workflow_temp').update(
+                await self.db_service.run_query(self.db_service.client.table('workflow_temp').update(
                     update_data
-                ).eq('id', temp_id).execute()
+                ).eq('id', temp_id))
             else:
                 logger.info(f"Mock update temp record: {temp_id}")
             
@@ -526,10 +665,13 @@ class EnhancedLookupService:
         """Get cache performance statistics from cache_stats table"""
         try:
             if self.db_service.use_database:
+                # Write buffered counters first so the numbers are current
+                await metrics_buffer.flush()
+                
                 # Get cache statistics from the database
-                stats_query = self.db_service.client.table('cache_stats').select(
+                stats_query = await self.db_service.run_query(self.db_service.client.table('cache_stats').select(
                     'cache_type', 'hit_count', 'miss_count', 'hit_rate', 'period_start'
-                ).order('period_start', desc=True).limit(30).execute()  # Last 30 days
+                ).order('period_start', desc=True).limit(30))  # Last 30 days
                 
                 if stats_query.data:
                     # Calculate overall stats
@@ -539,9 +681,9 @@ class EnhancedLookupService:
                     overall_hit_rate = (total_hits / total_requests * 100) if total_requests > 0 else 0
                     
                     # Get AI usage stats
-                    ai_stats = self.db_service.client.table('ai_usage_logs').select(
+                    ai_stats = await self.db_service.run_query(self.db_service.client.table('ai_usage_logs').select(
                         'provider', 'operation_type', 'cost_estimate', 'response_time'
-                    ).execute()
+                    ))
                     
                     total_ai_cost = sum(float(row.get('cost_estimate', 0) or 0) for row in ai_stats.data) if ai_stats.data else 0
                     ai_calls_made = len(ai_stats.data) if ai_stats.data else 0
@@ -585,4 +727,14 @@ class EnhancedLookupService:
             
         except Exception as e:
             logger.error(f"Error getting cache statistics: {e}")
-            return {"error": str(e)} 
\ No newline at end of file
+            return {"error": str(e)} 
+
+
+def invalidate_structural_cache(lookup_key: Optional[str] = None) -> int:
+    """Drop L1 entries affected by a workflow_lookup write (all entries if no key)"""
+    if lookup_key is None:
+        return structural_match_cache.clear()
+    # A new pattern can outrank any cached below-threshold result, so those go too
+    return structural_match_cache.invalidate_where(
+        lambda key, entry: key == lookup_key or not entry["rpc_hit"]
+    )
@@ -0,0 +1,185 @@
+"""
+Workflow Graph Analysis
+Linear-time structure checks over a workflow's blocks and edges
+
+The state is turned into an adjacency list once (block ids mapped to
+integers, edges to successor lists) and every analysis is a single O(V+E)
+traversal of it: reachability from starter blocks, strongly connected
+components (Tarjan) for cycle detection, a topological order (Kahn) when the
+graph is acyclic, and dead ends. All traversals are iterative, so long
+agent chains don't hit the recursion limit.
+"""
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional
+
+# Longest id lists included in validator metadata (counts are always exact;
+# topological_order is the first MAX_LISTED_BLOCKS blocks of the order)
+MAX_LISTED_BLOCKS = 50
+TERMINAL_BLOCK_TYPES = ("output",)
+
+
+class WorkflowGraph:
+    """Adjacency-list view of a workflow state"""
+
+    def __init__(self, blocks: Dict[str, Dict[str, Any]], edges: Iterable[Any] = ()):
+        self.ids: List[str] = list(blocks)
+        self.index: Dict[str, int] = {block_id: i for i, block_id in enumerate(self.ids)}
+        self.types: List[Any] = [block.get("type") for block in blocks.values()]
+        self.successors: List[List[int]] = [[] for _ in self.ids]
+        self.in_degree: List[int] = [0] * len(self.ids)
+        self.edge_count = 0
+
+        # Only well-formed edges between existing blocks; the connectivity rule reports the rest
+        for edge in edges:
+            if isinstance(edge, dict):
+                self.add_edge(edge.get("from"), edge.get("to"))
+
+    def add_edge(self, source_id: Any, target_id: Any) -> None:
+        """Add an edge; ignored unless both ends are blocks of this graph"""
+        source = self.index.get(source_id)
+        target = self.index.get(target_id)
+        if source is None or target is None:
+            return
+        self.successors[source].append(target)
+        self.in_degree[target] += 1
+        self.edge_count += 1
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "WorkflowGraph":
+        return cls(state.get("blocks", {}), state.get("edges", []))
+
+    def starters(self) -> List[int]:
+        return [i for i, block_type in enumerate(self.types) if block_type == "starter"]
+
+    def reachable(self, roots: List[int]) -> List[bool]:
+        """Blocks reachable from ``roots`` (iterative DFS)"""
+        seen = [False] * len(self.ids)
+        stack = []
+        for root in roots:
+            if not seen[root]:
+                seen[root] = True
+                stack.append(root)
+        successors = self.successors
+        while stack:
+            node = stack.pop()
+            for target in successors[node]:
+                if not seen[target]:
+                    seen[target] = True
+                    stack.append(target)
+        return seen
+
+    def strongly_connected_components(self) -> List[List[int]]:
+        """Tarjan's algorithm; components come out in reverse topological order"""
+        count = len(self.ids)
+        successors = self.successors
+        index_of = [-1] * count
+        low = [0] * count
+        on_stack = [False] * count
+        stack: List[int] = []
+        components: List[List[int]] = []
+        counter = 0
+
+        for root in range(count):
+            if index_of[root] != -1:
+                continue
+            # (node, position of the next successor to visit)
+            work = [(root, 0)]
+            index_of[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+            while work:
+                node, position = work[-1]
+                targets = successors[node]
+                if position < len(targets):
+                    work[-1] = (node, position + 1)
+                    target = targets[position]
+                    if index_of[target] == -1:
+                        index_of[target] = low[target] = counter
+                        counter += 1
+                        stack.append(target)
+                        on_stack[target] = True
+                        work.append((target, 0))
+                    elif on_stack[target] and index_of[target] < low[node]:
+                        low[node] = index_of[target]
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    if low[node] < low[parent]:
+                        low[parent] = low[node]
+                if low[node] == index_of[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+        return components
+
+    def cycles(self, components: List[List[int]]) -> List[List[int]]:
+        """Components that contain a cycle: more than one block, or a self-loop"""
+        return [
+            component for component in components
+            if len(component) > 1 or component[0] in self.successors[component[0]]
+        ]
+
+    def topological_order(self) -> Optional[List[int]]:
+        """Kahn's algorithm, ties broken by block order; None when the graph has a cycle"""
+        in_degree = list(self.in_degree)
+        queue = deque(i for i, degree in enumerate(in_degree) if degree == 0)
+        order = []
+        successors = self.successors
+        while queue:
+            node = queue.popleft()
+            order.append(node)
+            for target in successors[node]:
+                in_degree[target] -= 1
+                if in_degree[target] == 0:
+                    queue.append(target)
+        return order if len(order) == len(self.ids) else None
+
+    def dead_ends(self) -> List[int]:
+        """Non-terminal blocks with no outgoing edges"""
+        return [
+            i for i, targets in enumerate(self.successors)
+            if not targets and self.types[i] not in TERMINAL_BLOCK_TYPES
+        ]
+
+
+def analyze_graph(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Graph metadata for the connectivity validator"""
+    return analyze(WorkflowGraph.from_state(state))
+
+
+def analyze(graph: WorkflowGraph) -> Dict[str, Any]:
+    """Graph metadata for an already built graph (id lists capped at MAX_LISTED_BLOCKS)"""
+    ids = graph.ids
+
+    def listed(nodes: List[int]) -> List[str]:
+        return [ids[i] for i in sorted(nodes)[:MAX_LISTED_BLOCKS]]
+
+    starters = graph.starters()
+    reachable = graph.reachable(starters)
+    unreachable = [i for i, seen in enumerate(reachable) if not seen]
+    cycles = graph.cycles(graph.strongly_connected_components())
+    order = graph.topological_order() if not cycles else None
+    dead_ends = graph.dead_ends()
+
+    return {
+        "nodes": len(ids),
+        "edges": graph.edge_count,
+        "starter_count": len(starters),
+        "reachable_count": len(ids) - len(unreachable),
+        "unreachable_count": len(unreachable),
+        "unreachable_blocks": listed(unreachable),
+        "has_cycles": bool(cycles),
+        "cycle_count": len(cycles),
+        "cycles": [listed(component) for component in cycles[:MAX_LISTED_BLOCKS]],
+        "topological_order": [ids[i] for i in order[:MAX_LISTED_BLOCKS]] if order is not None else None,
+        "dead_end_count": len(dead_ends),
+        "dead_ends": listed(dead_ends)
+    }
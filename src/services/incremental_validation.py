@@ -0,0 +1,617 @@
+"""
+Incremental Validation
+Re-validate a workflow from its previous validation and a state diff
+
+A ValidationSnapshot keeps what the compiled rules derive from a state:
+per-block findings for the block-level rules, block type and position
+counters, web3 mentions, and edge endpoint/source reference counts. Applying
+a diff re-checks only the added or changed blocks and adjusts the counters
+for the blocks and edges that came and went, so a one-block edit costs a
+handful of dict updates instead of a full pass over the state. Rules the diff
+cannot affect are not re-run at all.
+
+The graph analysis is kept incrementally while the graph is acyclic: a
+topological rank per block (Pearce-Kelly reordering on edge additions),
+the unreachable and dead-end sets, and in-degrees for the listed
+topological order. An edge edit touches only the blocks whose ranks or
+reachability it changes. A cycle-closing edge drops that state and the next
+result runs the full pass; cyclic graphs always do, because the cycle
+listing follows Tarjan's traversal order.
+
+Every merged report is identical to validating the new state from scratch.
+"""
+import heapq
+from collections import Counter, deque
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from pydantic import BaseModel
+
+from src.services.graph_analysis import MAX_LISTED_BLOCKS, TERMINAL_BLOCK_TYPES, WorkflowGraph, analyze
+from src.services.validation_engine import (
+    Findings, check_agent, check_api, check_block_type, check_position,
+    check_starter, check_sub_blocks, block_position, collect_findings, connectivity_result, is_indexable, mentions_web3, patterns_result,
+    scan_edges, schema_result, starters_result, _result
+)
+
+# Rule keys in COMPILED_RULES order
+RULE_KEYS = [
+    "schema", "block_types", "starter_blocks", "agent_configuration", "api_integration",
+    "edge_connectivity", "workflow_patterns", "position_bounds", "subblock_structure"
+]
+BLOCK_RULES = ["block_types", "agent_configuration", "api_integration", "position_bounds", "subblock_structure"]
+TYPED_RULES = {"starter": "starter_blocks", "agent": "agent_configuration", "api": "api_integration"}
+
+
+class StateDiff(BaseModel):
+    """Changes between two saves of a workflow state"""
+    added_blocks: Dict[str, Dict[str, Any]] = {}
+    changed_blocks: Dict[str, Dict[str, Any]] = {}
+    removed_blocks: List[str] = []
+    added_edges: List[Any] = []
+    removed_edges: List[Any] = []
+    # Replaced top-level fields other than blocks and edges (variables, metadata, subflows)
+    fields: Dict[str, Any] = {}
+
+    def is_empty(self) -> bool:
+        return not (self.added_blocks or self.changed_blocks or self.removed_blocks or
+                    self.added_edges or self.removed_edges or self.fields)
+
+
+def apply_diff(state: Dict[str, Any], diff: StateDiff) -> Dict[str, Any]:
+    """
+    New state with the diff applied; ``state`` itself is not modified
+
+    Blocks are removed, then added/changed blocks are written (a changed
+    block keeps its position), then edges are removed (first equal edge) and
+    added at the end.
+    """
+    blocks = dict(state.get("blocks", {}))
+    for block_id in diff.removed_blocks:
+        blocks.pop(block_id, None)
+    blocks.update(diff.added_blocks)
+    blocks.update(diff.changed_blocks)
+
+    edges = list(state.get("edges", []))
+    for edge in diff.removed_edges:
+        if edge in edges:
+            edges.remove(edge)
+    edges.extend(diff.added_edges)
+
+    return {**state, **diff.fields, "blocks": blocks, "edges": edges}
+
+
+class ValidationSnapshot:
+    """Incrementally maintained rule inputs for one workflow state"""
+
+    def __init__(self, state: Dict[str, Any]):
+        self.state = dict(state)
+        self.blocks: Dict[str, Dict[str, Any]] = dict(state.get("blocks", {}))
+        self.edges: List[Any] = list(state.get("edges", []))
+        self.state["blocks"] = self.blocks
+        self.state["edges"] = self.edges
+
+        self.order: Dict[str, int] = {}  # block id -> insertion sequence (dict order)
+        self.next_order = 0
+        self.types: Dict[str, Any] = {}  # block id -> block.get("type"), in block order
+        self.summary_types: Dict[str, Any] = {}  # block id -> block.get("type", "unknown")
+        self.type_counts: Counter = Counter()
+        # Non-empty findings only, except starters (their count and order matter)
+        self.findings: Dict[str, Dict[str, Findings]] = {rule: {} for rule in BLOCK_RULES}
+        self.starters: Dict[str, Findings] = {}
+        self.positions: Counter = Counter()
+        self.duplicate_positions = 0
+        self.web3: Set[str] = set()
+
+        self.endpoints: Counter = Counter()  # from/to ids of well-formed edges
+        self.sources: Counter = Counter()  # edge.get("from") of every dict edge
+        self.malformed_edges = 0
+        self.dangling_refs = 0  # endpoint references to ids that are not blocks
+        self.disconnected = 0  # blocks no well-formed edge refers to
+        # Well-formed edges by endpoint, in edge order (ids need not be blocks)
+        self.out_links: Dict[Any, Tuple[Dict[str, Any], ...]] = {}
+        self.in_links: Dict[Any, Tuple[Dict[str, Any], ...]] = {}
+
+        # Graph analysis state over edges between blocks, seeded by a full pass
+        # below; ranks is None whenever the graph has a cycle
+        self.ranks: Optional[Dict[str, int]] = None  # topological rank
+        self.next_rank = 0
+        self.unreached: Set[str] = set()
+        self.dead_ends: Set[str] = set()
+        self.roots: Set[str] = set()  # blocks with no incoming graph edge
+        self.out_degree: Counter = Counter()
+        self.in_degree: Counter = Counter()
+        self.graph_edges = 0
+
+        for block_id, block in self.blocks.items():
+            self._add_block(block_id, block)
+        for edge in self.edges:
+            self._add_edge(edge)
+        graph = WorkflowGraph(self.blocks, self.edges)
+        order = graph.topological_order()
+        if order is not None:
+            self._seed_graph(graph, order)
+
+    def copy(self) -> "ValidationSnapshot":
+        """Shallow copy of every container, so applying a diff leaves this snapshot intact"""
+        snapshot = ValidationSnapshot.__new__(ValidationSnapshot)
+        snapshot.blocks = dict(self.blocks)
+        snapshot.edges = list(self.edges)
+        snapshot.state = {**self.state, "blocks": snapshot.blocks, "edges": snapshot.edges}
+        snapshot.order = dict(self.order)
+        snapshot.next_order = self.next_order
+        snapshot.types = dict(self.types)
+        snapshot.summary_types = dict(self.summary_types)
+        snapshot.type_counts = self.type_counts.copy()
+        snapshot.findings = {rule: dict(findings) for rule, findings in self.findings.items()}
+        snapshot.starters = dict(self.starters)
+        snapshot.positions = self.positions.copy()
+        snapshot.duplicate_positions = self.duplicate_positions
+        snapshot.web3 = set(self.web3)
+        snapshot.endpoints = self.endpoints.copy()
+        snapshot.sources = self.sources.copy()
+        snapshot.malformed_edges = self.malformed_edges
+        snapshot.dangling_refs = self.dangling_refs
+        snapshot.disconnected = self.disconnected
+        snapshot.out_links = dict(self.out_links)
+        snapshot.in_links = dict(self.in_links)
+        snapshot.ranks = dict(self.ranks) if self.ranks is not None else None
+        snapshot.next_rank = self.next_rank
+        snapshot.unreached = set(self.unreached)
+        snapshot.dead_ends = set(self.dead_ends)
+        snapshot.roots = set(self.roots)
+        snapshot.out_degree = self.out_degree.copy()
+        snapshot.in_degree = self.in_degree.copy()
+        snapshot.graph_edges = self.graph_edges
+        return snapshot
+
+    def apply(self, diff: StateDiff) -> Tuple["ValidationSnapshot", Set[str]]:
+        """(updated copy, keys of the rules whose inputs changed); same steps as apply_diff"""
+        snapshot = self.copy()
+        affected: Set[str] = set()
+
+        for block_id in diff.removed_blocks:
+            if block_id in snapshot.blocks:
+                affected.update(snapshot._block_rules(snapshot.blocks[block_id]), ("edge_connectivity",))
+                snapshot._remove_block(block_id)
+        for block_id, block in list(diff.added_blocks.items()) + list(diff.changed_blocks.items()):
+            affected.update(snapshot._block_rules(block))
+            if block_id in snapshot.blocks:
+                affected.update(snapshot._block_rules(snapshot.blocks[block_id]))
+                snapshot._drop_findings(block_id)
+            else:
+                affected.add("edge_connectivity")
+            snapshot.blocks[block_id] = block
+            snapshot._add_block(block_id, block)
+
+        for edge in diff.removed_edges:
+            if edge in snapshot.edges:
+                snapshot.edges.remove(edge)
+                snapshot._remove_edge(edge)
+                affected.add("edge_connectivity")
+        for edge in diff.added_edges:
+            snapshot.edges.append(edge)
+            snapshot._add_edge(edge)
+            affected.add("edge_connectivity")
+
+        if diff.fields:
+            snapshot.state.update({key: value for key, value in diff.fields.items() if key not in ("blocks", "edges")})
+            affected.update(("schema", "workflow_patterns"))
+        return snapshot, affected
+
+    def result(self, rule: str) -> Dict[str, Any]:
+        """Rule result dict, identical to the compiled rule on the full state"""
+        if rule == "schema":
+            return schema_result(self.state)
+        if rule == "block_types":
+            errors, warnings = self._collect(self.findings["block_types"])
+            return _result("validate_block_types", errors, warnings, {
+                "total_blocks": len(self.blocks),
+                # Built from an iterator like set(by_type) on the defaultdict, so set order matches
+                "block_types": list(set(iter(dict.fromkeys(self.types.values()))))
+            })
+        if rule == "starter_blocks":
+            return starters_result([self.starters[block_id] for block_id in self._in_order(self.starters)])
+        if rule == "agent_configuration":
+            errors, warnings = self._collect(self.findings["agent_configuration"])
+            return _result("validate_agent_configuration", errors, warnings,
+                           {"agent_count": self.type_counts["agent"]})
+        if rule == "api_integration":
+            errors, warnings = self._collect(self.findings["api_integration"])
+            return _result("validate_api_integration", errors, warnings, {"api_count": self.type_counts["api"]})
+        if rule == "edge_connectivity":
+            # Error messages carry edge positions, so invalid edges are re-scanned
+            edge_errors = scan_edges(self.edges, self.blocks)[0] if self.malformed_edges or self.dangling_refs else []
+            # Built like the full path's set difference, so the listed order matches
+            disconnected = set(self.blocks.keys()) - set(self.endpoints) if self.disconnected else set()
+            return connectivity_result(
+                edge_errors,
+                len(self.edges),
+                len(self.blocks),
+                disconnected,
+                [self.blocks[block_id].get("id") for block_id in self._in_order(self.starters)],
+                self.sources,
+                len(self.endpoints),
+                self._analyze_graph()
+            )
+        if rule == "workflow_patterns":
+            return patterns_result(
+                self.state.get("variables", {}), self.type_counts["agent"], self.type_counts["api"], bool(self.web3)
+            )
+        if rule == "position_bounds":
+            errors, warnings = self._collect(self.findings["position_bounds"])
+            if self.duplicate_positions:
+                warnings.append("Some blocks have identical positions (may overlap)")
+            return _result("validate_position_bounds", errors, warnings)
+        if rule == "subblock_structure":
+            errors, _ = self._collect(self.findings["subblock_structure"])
+            return _result("validate_subblock_structure", errors, [])
+        raise KeyError(rule)
+
+    def summary_block_types(self) -> Dict[str, int]:
+        return dict(Counter(self.summary_types.values()))
+
+    def _block_rules(self, block: Dict[str, Any]) -> List[str]:
+        """Rules whose result can change when this block is added, changed or removed"""
+        rules = ["block_types", "position_bounds", "subblock_structure", "workflow_patterns"]
+        block_type = block.get("type")
+        typed_rule = TYPED_RULES.get(block_type)
+        if typed_rule:
+            rules.append(typed_rule)
+        # Starters root the reachability analysis and terminal blocks are not dead ends
+        if block_type == "starter" or block_type in TERMINAL_BLOCK_TYPES:
+            rules.append("edge_connectivity")
+        return rules
+
+    def _in_order(self, block_ids) -> List[str]:
+        return sorted(block_ids, key=self.order.__getitem__)
+
+    def _collect(self, findings: Dict[str, Findings]) -> Findings:
+        return collect_findings(findings[block_id] for block_id in self._in_order(findings))
+
+    def _add_block(self, block_id: str, block: Dict[str, Any]) -> None:
+        """Index a block that is already in self.blocks (new, or re-added after _drop_findings)"""
+        is_new = block_id not in self.order
+        previous_type = self.types.get(block_id)
+        if is_new:
+            self.order[block_id] = self.next_order
+            self.next_order += 1
+            self.dangling_refs -= self.endpoints.get(block_id, 0)
+        block_type = block.get("type")
+        self.types[block_id] = block_type
+        self.summary_types[block_id] = block.get("type", "unknown")
+        self.type_counts[block_type] += 1
+
+        checks = {
+            "block_types": check_block_type(block_id, block),
+            "position_bounds": check_position(block_id, block),
+            "subblock_structure": check_sub_blocks(block_id, block)
+        }
+        if block_type == "agent":
+            checks["agent_configuration"] = check_agent(block)
+        elif block_type == "api":
+            checks["api_integration"] = check_api(block)
+        elif block_type == "starter":
+            self.starters[block_id] = check_starter(block)
+        for rule, (errors, warnings) in checks.items():
+            if errors or warnings:
+                self.findings[rule][block_id] = (errors, warnings)
+
+        position = block_position(block)
+        self.positions[position] += 1
+        if self.positions[position] > 1:
+            self.duplicate_positions += 1
+        if mentions_web3(block):
+            self.web3.add(block_id)
+
+        if is_new:
+            self._add_node(block_id)
+        else:
+            self._retype_node(block_id, previous_type)
+
+    def _drop_findings(self, block_id: str) -> None:
+        """Forget everything derived from a block's current content (its id and order stay)"""
+        block = self.blocks[block_id]
+        self.type_counts[self.types[block_id]] -= 1
+        for findings in self.findings.values():
+            findings.pop(block_id, None)
+        self.starters.pop(block_id, None)
+        position = block_position(block)
+        if self.positions[position] > 1:
+            self.duplicate_positions -= 1
+        self.positions[position] -= 1
+        if not self.positions[position]:
+            del self.positions[position]
+        self.web3.discard(block_id)
+
+    def _remove_block(self, block_id: str) -> None:
+        self._drop_findings(block_id)
+        del self.blocks[block_id]
+        self._remove_node(block_id)
+        del self.order[block_id]
+        del self.types[block_id]
+        del self.summary_types[block_id]
+        self.dangling_refs += self.endpoints.get(block_id, 0)
+
+    def _add_edge(self, edge: Any) -> None:
+        if not isinstance(edge, dict):
+            self.malformed_edges += 1
+            return
+        self.sources[edge.get("from")] += 1
+        if "from" not in edge or "to" not in edge:
+            self.malformed_edges += 1
+            return
+        for endpoint in (edge["from"], edge["to"]):
+            self.endpoints[endpoint] += 1
+            if endpoint not in self.blocks:
+                self.dangling_refs += 1
+            elif self.endpoints[endpoint] == 1:
+                self.disconnected -= 1
+        source, target = edge["from"], edge["to"]
+        self.out_links[source] = self.out_links.get(source, ()) + (edge,)
+        self.in_links[target] = self.in_links.get(target, ()) + (edge,)
+        if source in self.blocks and target in self.blocks:
+            self._link(source, target)
+
+    def _remove_edge(self, edge: Any) -> None:
+        if not isinstance(edge, dict):
+            self.malformed_edges -= 1
+            return
+        _decrement(self.sources, edge.get("from"))
+        if "from" not in edge or "to" not in edge:
+            self.malformed_edges -= 1
+            return
+        for endpoint in (edge["from"], edge["to"]):
+            _decrement(self.endpoints, endpoint)
+            if endpoint not in self.blocks:
+                self.dangling_refs -= 1
+            elif endpoint not in self.endpoints:
+                self.disconnected += 1
+        # Equal edges share endpoints, so the first equal link is the one list.remove dropped
+        source, target = edge["from"], edge["to"]
+        _unlist(self.out_links, source, edge)
+        _unlist(self.in_links, target, edge)
+        if source in self.blocks and target in self.blocks:
+            self._unlink(source, target)
+
+    # Graph analysis
+
+    def _analyze_graph(self) -> Dict[str, Any]:
+        """analyze() on the current graph, from the maintained state when it is acyclic"""
+        if self.ranks is None:
+            graph = WorkflowGraph(self.blocks, self.edges)
+            order = graph.topological_order()
+            if order is None:
+                return analyze(graph)
+            self._seed_graph(graph, order)
+
+        def listed(block_ids: Set[str]) -> List[str]:
+            return heapq.nsmallest(MAX_LISTED_BLOCKS, block_ids, key=self.order.__getitem__)
+
+        return {
+            "nodes": len(self.blocks),
+            "edges": self.graph_edges,
+            "starter_count": self.type_counts["starter"],
+            "reachable_count": len(self.blocks) - len(self.unreached),
+            "unreachable_count": len(self.unreached),
+            "unreachable_blocks": listed(self.unreached),
+            "has_cycles": False,
+            "cycle_count": 0,
+            "cycles": [],
+            "topological_order": self._topological_prefix(),
+            "dead_end_count": len(self.dead_ends),
+            "dead_ends": listed(self.dead_ends)
+        }
+
+    def _seed_graph(self, graph: WorkflowGraph, order: List[int]) -> None:
+        """Graph analysis state from a full pass over an acyclic graph"""
+        ids = graph.ids
+        self.ranks = {ids[node]: rank for rank, node in enumerate(order)}
+        self.next_rank = len(ids)
+        reachable = graph.reachable(graph.starters())
+        self.unreached = {ids[i] for i, seen in enumerate(reachable) if not seen}
+        self.dead_ends = {ids[i] for i in graph.dead_ends()}
+        self.roots = {ids[i] for i, degree in enumerate(graph.in_degree) if not degree}
+        self.out_degree = Counter({ids[i]: len(targets) for i, targets in enumerate(graph.successors)})
+        self.in_degree = Counter(dict(zip(ids, graph.in_degree)))
+        self.graph_edges = graph.edge_count
+
+    def _reset_graph(self) -> None:
+        """Drop the graph analysis state; the next result runs the full pass"""
+        self.ranks = None
+        self.unreached = set()
+        self.dead_ends = set()
+        self.roots = set()
+        self.out_degree = Counter()
+        self.in_degree = Counter()
+
+    def _targets(self, block_id: str) -> List[str]:
+        return [edge["to"] for edge in self.out_links.get(block_id, ()) if edge["to"] in self.blocks]
+
+    def _sources(self, block_id: str) -> List[str]:
+        return [edge["from"] for edge in self.in_links.get(block_id, ()) if edge["from"] in self.blocks]
+
+    def _topological_prefix(self) -> List[str]:
+        """First MAX_LISTED_BLOCKS blocks of Kahn's order (FIFO, ties by block order)"""
+        queue = deque(heapq.nsmallest(MAX_LISTED_BLOCKS, self.roots, key=self.order.__getitem__))
+        remaining: Dict[str, int] = {}
+        order = []
+        while queue and len(order) < MAX_LISTED_BLOCKS:
+            block_id = queue.popleft()
+            order.append(block_id)
+            for target in self._targets(block_id):
+                degree = remaining.get(target, self.in_degree[target]) - 1
+                remaining[target] = degree
+                if not degree:
+                    queue.append(target)
+        return order
+
+    def _add_node(self, block_id: str) -> None:
+        """Graph state for a new block, including existing edges that now reach it"""
+        if not self.endpoints.get(block_id):
+            self.disconnected += 1
+        if self.ranks is None:
+            return
+        self.ranks[block_id] = self.next_rank
+        self.next_rank += 1
+        self.roots.add(block_id)
+        if self.types[block_id] != "starter":
+            self.unreached.add(block_id)
+        if self.types[block_id] not in TERMINAL_BLOCK_TYPES:
+            self.dead_ends.add(block_id)
+        for target in self._targets(block_id):
+            self._link(block_id, target)
+        for source in self._sources(block_id):
+            if source != block_id:
+                self._link(source, block_id)
+
+    def _retype_node(self, block_id: str, previous_type: Any) -> None:
+        """Starters root reachability and terminal blocks are never dead ends"""
+        if self.ranks is None:
+            return
+        block_type = self.types[block_id]
+        if self.out_degree[block_id] or block_type in TERMINAL_BLOCK_TYPES:
+            self.dead_ends.discard(block_id)
+        else:
+            self.dead_ends.add(block_id)
+        if block_type == "starter" and previous_type != "starter":
+            self._reach([block_id])
+        elif previous_type == "starter" and block_type != "starter":
+            self._unreach([block_id])
+
+    def _remove_node(self, block_id: str) -> None:
+        """Drop a block (already gone from self.blocks) and the graph edges it had"""
+        if not self.endpoints.get(block_id):
+            self.disconnected -= 1
+        if self.ranks is None:
+            return
+        # No self-loops while the graph is acyclic, so every link here has another block at its end
+        targets = self._targets(block_id)
+        for target in targets:
+            self._drop_degree(block_id, target)
+        for source in self._sources(block_id):
+            self._drop_degree(source, block_id)
+        for index in (self.ranks, self.out_degree, self.in_degree):
+            index.pop(block_id, None)
+        for members in (self.unreached, self.dead_ends, self.roots):
+            members.discard(block_id)
+        self._unreach(targets)
+
+    def _link(self, source: str, target: str) -> None:
+        """New graph edge between two blocks"""
+        if self.ranks is None:
+            return
+        self.graph_edges += 1
+        self.out_degree[source] += 1
+        self.dead_ends.discard(source)
+        self.in_degree[target] += 1
+        self.roots.discard(target)
+        if source not in self.unreached:
+            self._reach([target])
+        if not self._reorder(source, target):
+            self._reset_graph()
+
+    def _unlink(self, source: str, target: str) -> None:
+        """Removed graph edge; the graph stays acyclic, so the ranks stay valid"""
+        if self.ranks is None:
+            return
+        self._drop_degree(source, target)
+        self._unreach([target])
+
+    def _drop_degree(self, source: str, target: str) -> None:
+        self.graph_edges -= 1
+        self.out_degree[source] -= 1
+        if not self.out_degree[source] and self.types[source] not in TERMINAL_BLOCK_TYPES:
+            self.dead_ends.add(source)
+        self.in_degree[target] -= 1
+        if not self.in_degree[target]:
+            self.roots.add(target)
+
+    def _reach(self, block_ids: List[str]) -> None:
+        """Mark blocks and everything downstream of them reachable"""
+        stack = [block_id for block_id in block_ids if block_id in self.unreached]
+        self.unreached.difference_update(stack)
+        while stack:
+            for target in self._targets(stack.pop()):
+                if target in self.unreached:
+                    self.unreached.discard(target)
+                    stack.append(target)
+
+    def _unreach(self, block_ids: List[str]) -> None:
+        """Re-check reachability downstream of blocks that may have lost their path from a starter"""
+        # In rank order every block's predecessors are settled before it
+        heap = [(self.ranks[block_id], block_id) for block_id in block_ids]
+        heapq.heapify(heap)
+        while heap:
+            _, block_id = heapq.heappop(heap)
+            if block_id in self.unreached or self.types[block_id] == "starter":
+                continue
+            if any(source not in self.unreached for source in self._sources(block_id)):
+                continue
+            self.unreached.add(block_id)
+            for target in self._targets(block_id):
+                if target not in self.unreached:
+                    heapq.heappush(heap, (self.ranks[target], target))
+
+    def _reorder(self, source: str, target: str) -> bool:
+        """
+        Keep the ranks topological after adding source -> target (Pearce-Kelly)
+
+        Only blocks ranked between the two ends are searched and re-ranked.
+        False when the edge closes a cycle.
+        """
+        ranks = self.ranks
+        if source == target:
+            return False
+        lower, upper = ranks[target], ranks[source]
+        if upper < lower:
+            return True
+        forward, stack, seen = [], [target], {target}
+        while stack:
+            block_id = stack.pop()
+            forward.append(block_id)
+            for successor in self._targets(block_id):
+                if successor == source:
+                    return False
+                if successor not in seen and ranks[successor] < upper:
+                    seen.add(successor)
+                    stack.append(successor)
+        backward, stack, seen = [], [source], {source}
+        while stack:
+            block_id = stack.pop()
+            backward.append(block_id)
+            for predecessor in self._sources(block_id):
+                if predecessor not in seen and ranks[predecessor] > lower:
+                    seen.add(predecessor)
+                    stack.append(predecessor)
+        moved = sorted(backward, key=ranks.__getitem__) + sorted(forward, key=ranks.__getitem__)
+        for block_id, rank in zip(moved, sorted(ranks[block_id] for block_id in moved)):
+            ranks[block_id] = rank
+        return True
+
+
+def _decrement(counter: Counter, key: Any) -> None:
+    counter[key] -= 1
+    if not counter[key]:
+        del counter[key]
+
+
+def _unlist(links: Dict[Any, Tuple[Dict[str, Any], ...]], key: Any, edge: Dict[str, Any]) -> None:
+    """Remove the first link equal to ``edge``"""
+    edges = links[key]
+    i = edges.index(edge)
+    if len(edges) == 1:
+        del links[key]
+    else:
+        links[key] = edges[:i] + edges[i + 1:]
+
+
+def build_snapshot(state: Dict[str, Any]) -> Optional[ValidationSnapshot]:
+    """Snapshot of a well-formed state; None when a rule would need the per-validator path"""
+    if not is_indexable(state) or "blocks" not in state or "edges" not in state:
+        return None
+    try:
+        return ValidationSnapshot(state)
+    except Exception:
+        # A check raised (e.g. a non-string systemPrompt); the full validators report it
+        return None
+
@@ -0,0 +1,322 @@
+"""
+Background Job Manager
+Runs long-running work (CSV migration, cache preload, large generations) outside
+the request handler so proxies and serverless timeouts don't cut it off.
+
+Jobs are queued on an in-process asyncio queue and executed by a bounded set of
+workers. Job records live in memory by default, or in Redis when REDIS_URL is
+set so status and cancellation are visible across processes.
+"""
+import os
+import json
+import uuid
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONCURRENCY = 2
+DEFAULT_JOB_TTL_SECONDS = 24 * 60 * 60
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+FINISHED_STATUSES = {JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED}
+
+# Edits a job record in place; returning False skips the write
+JobMutation = Callable[[Dict[str, Any]], Optional[bool]]
+
+
+class InMemoryJobStore:
+    """Job records kept in this process"""
+
+    backend = "memory"
+
+    def __init__(self, max_jobs: int = 1000):
+        self.max_jobs = max_jobs
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+
+    async def save(self, job: Dict[str, Any]) -> None:
+        self.jobs[job["id"]] = job
+        if len(self.jobs) > self.max_jobs:
+            self._evict_finished()
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.jobs.get(job_id)
+
+    async def update(self, job_id: str, mutate: JobMutation) -> Optional[Dict[str, Any]]:
+        """Apply ``mutate`` to the stored job in place (no await between read and write)"""
+        job = self.jobs.get(job_id)
+        if job is not None:
+            mutate(job)
+        return job
+
+    async def list(self, limit: int = 50) -> List[Dict[str, Any]]:
+        jobs = sorted(self.jobs.values(), key=lambda job: job["created_at"], reverse=True)
+        return jobs[:limit]
+
+    def _evict_finished(self) -> None:
+        """Drop the oldest finished jobs once the store is over capacity"""
+        finished = sorted(
+            (job for job in self.jobs.values() if job["status"] in FINISHED_STATUSES),
+            key=lambda job: job["created_at"]
+        )
+        for job in finished[:len(self.jobs) - self.max_jobs]:
+            del self.jobs[job["id"]]
+
+
+class RedisJobStore:
+    """Job records kept in Redis, shared by every API worker"""
+
+    backend = "redis"
+
+    def __init__(self, client, ttl_seconds: int = DEFAULT_JOB_TTL_SECONDS, prefix: str = "agent_forge:jobs"):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    async def save(self, job: Dict[str, Any]) -> None:
+        await self.client.set(f"{self.prefix}:{job['id']}", json.dumps(job, default=str), ex=self.ttl_seconds)
+        await self.client.zadd(f"{self.prefix}:index", {job["id"]: datetime.fromisoformat(job["created_at"].rstrip("Z")).timestamp()})
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raw = await self.client.get(f"{self.prefix}:{job_id}")
+        return json.loads(raw) if raw else None
+
+    async def update(self, job_id: str, mutate: JobMutation) -> Optional[Dict[str, Any]]:
+        """
+        Read, mutate and write a job under WATCH/MULTI
+
+        The write is retried from a fresh read if another process changed the
+        record in between, so e.g. a progress report can't overwrite a
+        cancel_requested set by another worker. ``mutate`` returning False
+        leaves the record as it is.
+        """
+        from redis.exceptions import WatchError
+
+        key = f"{self.prefix}:{job_id}"
+        async with self.client.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(key)
+                    raw = await pipe.get(key)
+                    if not raw:
+                        return None
+                    job = json.loads(raw)
+                    if mutate(job) is False:
+                        return job
+                    pipe.multi()
+                    pipe.set(key, json.dumps(job, default=str), ex=self.ttl_seconds)
+                    await pipe.execute()
+                    return job
+                except WatchError:
+                    continue
+
+    async def list(self, limit: int = 50) -> List[Dict[str, Any]]:
+        job_ids = await self.client.zrevrange(f"{self.prefix}:index", 0, limit - 1)
+        jobs = []
+        for job_id in job_ids:
+            job = await self.get(job_id.decode() if isinstance(job_id, bytes) else job_id)
+            if job:
+                jobs.append(job)
+        return jobs
+
+
+class JobContext:
+    """Handle passed to a running job for progress reporting and cancellation checks"""
+
+    def __init__(self, manager: "JobManager", job_id: str):
+        self.manager = manager
+        self.job_id = job_id
+
+    async def report(self, current: int, total: Optional[int] = None, message: Optional[str] = None) -> None:
+        """Record progress; raises CancelledError if the job was cancelled elsewhere"""
+        def apply(job: Dict[str, Any]) -> None:
+            if job.get("cancel_requested"):
+                raise asyncio.CancelledError()
+            progress = job["progress"]
+            progress["current"] = current
+            if total is not None:
+                progress["total"] = total
+            if message is not None:
+                progress["message"] = message
+            if progress.get("total"):
+                progress["percent"] = round(100.0 * current / progress["total"], 1)
+            job["updated_at"] = _now()
+
+        await self.manager.store.update(self.job_id, apply)
+
+
+JobFunc = Callable[[JobContext], Awaitable[Any]]
+
+
+class JobManager:
+    """In-process job queue with bounded concurrency"""
+
+    def __init__(self, max_concurrency: Optional[int] = None, store=None):
+        self.max_concurrency = max_concurrency or int(os.getenv("JOB_MAX_CONCURRENCY", str(DEFAULT_MAX_CONCURRENCY)))
+        self.store = store or self._create_store()
+        self._queue: Optional[asyncio.Queue] = None
+        self._funcs: Dict[str, JobFunc] = {}
+        self._running: Dict[str, asyncio.Task] = {}
+        self._workers: List[asyncio.Task] = []
+
+    def _create_store(self):
+        """Use Redis when REDIS_URL is configured and redis is installed, else memory"""
+        redis_url = os.getenv("REDIS_URL")
+        if redis_url:
+            try:
+                import redis.asyncio as redis
+                logger.info("✅ Job store using Redis")
+                return RedisJobStore(redis.from_url(redis_url))
+            except ImportError:
+                logger.warning("❌ Redis library not installed, using in-memory job store")
+        return InMemoryJobStore()
+
+    def _ensure_workers(self) -> None:
+        """Start the worker tasks on the running loop the first time a job is submitted"""
+        if self._queue is not None and self._workers and not all(worker.done() for worker in self._workers):
+            return
+        self._queue = asyncio.Queue()
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"job-worker-{i}")
+            for i in range(self.max_concurrency)
+        ]
+
+    async def submit(self, kind: str, func: JobFunc, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Queue a job and return its record immediately"""
+        self._ensure_workers()
+
+        job = {
+            "id": str(uuid.uuid4()),
+            "kind": kind,
+            "status": JOB_QUEUED,
+            "params": params or {},
+            "progress": {"current": 0, "total": None, "percent": None, "message": None},
+            "result": None,
+            "error": None,
+            "cancel_requested": False,
+            "created_at": _now(),
+            "started_at": None,
+            "finished_at": None,
+            "updated_at": _now()
+        }
+        await self.store.save(job)
+        self._funcs[job["id"]] = func
+        await self._queue.put(job["id"])
+        logger.info(f"📥 Queued {kind} job {job['id']}")
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await self.store.get(job_id)
+
+    async def list(self, limit: int = 50) -> List[Dict[str, Any]]:
+        return await self.store.list(limit)
+
+    async def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Cancel a queued or running job; finished jobs are returned unchanged"""
+        def request_cancel(job: Dict[str, Any]) -> Optional[bool]:
+            if job["status"] in FINISHED_STATUSES:
+                return False
+            job["cancel_requested"] = True
+            if job["status"] == JOB_QUEUED:
+                job["status"] = JOB_CANCELLED
+                job["finished_at"] = _now()
+            job["updated_at"] = _now()
+
+        job = await self.store.update(job_id, request_cancel)
+        task = self._running.get(job_id)
+        if job and task:
+            task.cancel()
+        return job
+
+    async def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Poll until a job finishes (used by tests and scripts)"""
+        async def poll():
+            while True:
+                job = await self.store.get(job_id)
+                if not job or job["status"] in FINISHED_STATUSES:
+                    return job
+                await asyncio.sleep(0.01)
+        return await asyncio.wait_for(poll(), timeout)
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str) -> None:
+        func = self._funcs.pop(job_id, None)
+        if func is None:
+            return
+
+        def start(job: Dict[str, Any]) -> Optional[bool]:
+            if job["status"] != JOB_QUEUED:
+                return False
+            job.update({"status": JOB_RUNNING, "started_at": _now(), "updated_at": _now()})
+
+        job = await self.store.update(job_id, start)
+        if not job or job["status"] != JOB_RUNNING:
+            return
+        logger.info(f"▶️  Running {job['kind']} job {job_id}")
+
+        task = asyncio.create_task(func(JobContext(self, job_id)))
+        self._running[job_id] = task
+        worker_cancelled = False
+        try:
+            result = await task
+            status, error = JOB_SUCCEEDED, None
+        except asyncio.CancelledError:
+            # The job itself was cancelled, or this worker is shutting down
+            worker_cancelled = not task.done()
+            result, status, error = None, JOB_CANCELLED, None
+        except Exception as e:
+            logger.error(f"❌ Job {job_id} failed: {e}")
+            result, status, error = None, JOB_FAILED, str(e)
+        finally:
+            self._running.pop(job_id, None)
+
+        await self.store.update(job_id, lambda job: job.update({
+            "status": status,
+            "result": result,
+            "error": error,
+            "finished_at": _now(),
+            "updated_at": _now()
+        }))
+        logger.info(f"🏁 Job {job_id} {status}")
+
+        if worker_cancelled:
+            raise asyncio.CancelledError()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.store.backend,
+            "max_concurrency": self.max_concurrency,
+            "running": len(self._running),
+            "queued": self._queue.qsize() if self._queue else 0
+        }
+
+    async def shutdown(self) -> None:
+        """Cancel running jobs and stop the workers"""
+        for task in list(self._running.values()):
+            task.cancel()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._running.values(), *self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat() + "Z"
+
+
+# Global instance
+job_manager = JobManager()
@@ -47,7 +47,7 @@ class WorkflowLookupService:
             if self.db_service.use_database:
                 # Use database function for similarity search
                 try:
-                    result = self.db_service.client.rpc(
+                    result = await self.db_service.run_query(self.db_service.client.rpc(
                         'find_similar_workflows',
                         {
                             'p_workflow_type': workflow_type,
@@ -55,7 +55,7 @@ class WorkflowLookupService:
                             'p_block_count': block_count,
                             'p_similarity_threshold': self.similarity_threshold
                         }
-                    ).execute()
+                    ))
                     
                     if result.data and len(result.data) > 0:
                         best_match = result.data[0]
@@ -63,10 +63,10 @@ class WorkflowLookupService:
                             logger.info(f"Found similar workflow with {best_match['similarity_score']:.2%} similarity")
                             
                             # Update usage count
-                            self.db_service.client.table('workflow_lookup').update({
+                            await self.db_service.run_query(self.db_service.client.table('workflow_lookup').update({
                                 'usage_count': best_match['usage_count'] + 1,
                                 'last_used_at': datetime.utcnow().isoformat()
-                            }).eq('id', best_match['lookup_id']).execute()
+                            }).eq('id', best_match['lookup_id']))
                             
                             return (
                                 best_match['generated_state'],
@@ -147,10 +147,10 @@ class WorkflowLookupService:
             
             if self.db_service.use_database:
                 # Store in database
-                result = self.db_service.client.table('workflow_lookup').upsert(
+                result = await self.db_service.run_query(self.db_service.client.table('workflow_lookup').upsert(
                     lookup_data,
                     on_conflict='lookup_key'
-                ).execute()
+                ))
                 
                 logger.info(f"Stored workflow pattern with key: {lookup_key}")
             else:
@@ -175,11 +175,11 @@ class WorkflowLookupService:
         """Create a temporary record for processing"""
         try:
             if self.db_service.use_database:
-                result = self.db_service.client.table('workflow_temp').insert({
+                result = await self.db_service.run_query(self.db_service.client.table('workflow_temp').insert({
                     'session_id': session_id,
                     'input_data': input_data,
                     'processing_status': 'pending'
-                }).execute()
+                }))
                 
                 return result.data[0]['id']
             else:
@@ -214,9 +214,9 @@ class WorkflowLookupService:
                 update_data['similarity_score'] = similarity_score
             
             if self.db_service.use_database:
-                self.db_service.client.table('workflow_temp').update(
+                await self.db_service.run_query(self.db_service.client.table('workflow_temp').update(
                     update_data
-                ).eq('id', temp_id).execute()
+                ).eq('id', temp_id))
             else:
                 logger.info(f"Mock update temp record: {temp_id}")
             
@@ -284,11 +284,11 @@ class WorkflowLookupService:
         try:
             if self.db_service.use_database:
                 # Get database stats
-                stats = self.db_service.client.table('workflow_lookup').select(
+                stats = await self.db_service.run_query(self.db_service.client.table('workflow_lookup').select(
                     'workflow_type',
                     'usage_count',
                     'avg_generation_time'
-                ).execute()
+                ))
                 
                 if stats.data:
                     total_patterns = len(stats.data)
@@ -0,0 +1,174 @@
+"""
+Write-Behind Metrics Buffer
+Aggregates cache hit/miss counters and AI usage rows in memory and flushes them
+to cache_stats / ai_usage_logs in batches, off the request path.
+
+Counters are applied with the increment_cache_stats RPC (INSERT ... ON CONFLICT
+DO UPDATE SET hit_count = hit_count + n), so concurrent API workers never lose
+increments the way a SELECT-then-UPDATE does.
+"""
+import os
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_INTERVAL_SECONDS = 10.0
+DEFAULT_MAX_BUFFERED_ROWS = 500
+MAX_RETAINED_ROWS = 10_000  # cap on rows kept for retry while the database is unreachable
+
+
+class MetricsBuffer:
+    """In-memory aggregation of cache and AI usage metrics with batched flushes"""
+
+    def __init__(
+        self,
+        db_service=None,
+        flush_interval: Optional[float] = None,
+        max_buffered_rows: Optional[int] = None
+    ):
+        self._db_service = db_service
+        self.flush_interval = flush_interval or float(
+            os.getenv("METRICS_FLUSH_INTERVAL_SECONDS", str(DEFAULT_FLUSH_INTERVAL_SECONDS))
+        )
+        self.max_buffered_rows = max_buffered_rows or int(
+            os.getenv("METRICS_MAX_BUFFERED_ROWS", str(DEFAULT_MAX_BUFFERED_ROWS))
+        )
+        self._cache_counts: Dict[Tuple[str, str], List[int]] = defaultdict(lambda: [0, 0])
+        self._ai_usage_rows: List[Dict[str, Any]] = []
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._pending_flush: Optional[asyncio.Task] = None
+        self.flushes = 0
+        self.dropped_rows = 0
+
+    @property
+    def db_service(self):
+        if self._db_service is None:
+            from src.utils.database_hybrid import db_service
+            self._db_service = db_service
+        return self._db_service
+
+    def record_cache_event(self, cache_type: str, hit: bool) -> None:
+        """Count a cache hit or miss for today's period (no I/O)"""
+        period_start = datetime.utcnow().date().isoformat()
+        self._cache_counts[(cache_type, period_start)][0 if hit else 1] += 1
+
+    def record_ai_usage(self, row: Dict[str, Any]) -> None:
+        """Queue an ai_usage_logs row; triggers an early flush when the buffer is full"""
+        self._ai_usage_rows.append(row)
+        if len(self._ai_usage_rows) >= self.max_buffered_rows:
+            self._schedule_flush()
+
+    def pending(self) -> Dict[str, int]:
+        return {
+            "cache_counters": len(self._cache_counts),
+            "ai_usage_rows": len(self._ai_usage_rows)
+        }
+
+    async def flush(self) -> Dict[str, int]:
+        """Write buffered metrics in one RPC and one bulk insert"""
+        async with self._flush_lock:
+            cache_counts, self._cache_counts = self._cache_counts, defaultdict(lambda: [0, 0])
+            ai_usage_rows, self._ai_usage_rows = self._ai_usage_rows, []
+
+            if not cache_counts and not ai_usage_rows:
+                return {"cache_counters": 0, "ai_usage_rows": 0}
+
+            if not self.db_service.use_database:
+                return {"cache_counters": len(cache_counts), "ai_usage_rows": len(ai_usage_rows)}
+
+            written = {"cache_counters": 0, "ai_usage_rows": 0}
+
+            if cache_counts:
+                increments = [
+                    {"cache_type": cache_type, "period_start": period_start, "hits": hits, "misses": misses}
+                    for (cache_type, period_start), (hits, misses) in cache_counts.items()
+                ]
+                try:
+                    await self.db_service.run_query(
+                        self.db_service.client.rpc("increment_cache_stats", {"p_increments": increments})
+                    )
+                    written["cache_counters"] = len(increments)
+                except Exception as e:
+                    logger.error(f"Failed to flush cache stats, will retry: {e}")
+                    self._restore_cache_counts(cache_counts)
+
+            if ai_usage_rows:
+                try:
+                    await self.db_service.run_query(
+                        self.db_service.client.table("ai_usage_logs").insert(ai_usage_rows)
+                    )
+                    written["ai_usage_rows"] = len(ai_usage_rows)
+                except Exception as e:
+                    logger.error(f"Failed to flush AI usage logs, will retry: {e}")
+                    self._restore_ai_usage_rows(ai_usage_rows)
+
+            self.flushes += 1
+            logger.debug(f"Metrics flushed: {written}")
+            return written
+
+    def start(self) -> None:
+        """Start the periodic flush loop on the running event loop"""
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop(), name="metrics-flush")
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write whatever is still buffered"""
+        # Only the loop's sleep is cancelled; a flush in progress has already swapped
+        # the buffers out, so it is awaited (the loop shields it, the final flush
+        # queues behind it on the lock) rather than cancelled
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+        await asyncio.gather(
+            *(task for task in (self._flush_task, self._pending_flush) if task),
+            return_exceptions=True
+        )
+        self._flush_task = None
+        self._pending_flush = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.pending(),
+            "flush_interval_seconds": self.flush_interval,
+            "flushes": self.flushes,
+            "dropped_rows": self.dropped_rows
+        }
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await asyncio.shield(self.flush())
+            except Exception as e:
+                logger.error(f"Metrics flush loop error: {e}")
+
+    def _schedule_flush(self) -> None:
+        if self._pending_flush and not self._pending_flush.done():
+            return
+        try:
+            self._pending_flush = asyncio.get_running_loop().create_task(self.flush())
+        except RuntimeError:
+            pass  # no running loop; the next periodic or shutdown flush picks the rows up
+
+    def _restore_cache_counts(self, cache_counts: Dict[Tuple[str, str], List[int]]) -> None:
+        for key, (hits, misses) in cache_counts.items():
+            counts = self._cache_counts[key]
+            counts[0] += hits
+            counts[1] += misses
+
+    def _restore_ai_usage_rows(self, rows: List[Dict[str, Any]]) -> None:
+        self._ai_usage_rows = rows + self._ai_usage_rows
+        overflow = len(self._ai_usage_rows) - MAX_RETAINED_ROWS
+        if overflow > 0:
+            self._ai_usage_rows = self._ai_usage_rows[overflow:]
+            self.dropped_rows += overflow
+            logger.warning(f"Dropped {overflow} buffered AI usage rows (database unreachable)")
+
+
+# Global instance
+metrics_buffer = MetricsBuffer()
@@ -8,9 +8,15 @@ import uuid
 import logging
 import time
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import asyncio
 
+from src.utils.single_flight import SingleFlight
+from src.utils.deadline import Deadline
+from src.utils.streaming import EventCallback, PartialBlockParser
+from src.utils.lazy import LazyClient, module_available
+from src.services.workflow_context import WorkflowContext
+
 logger = logging.getLogger(__name__)
 
 class StateGenerator:
@@ -30,123 +36,406 @@ class StateGenerator:
         
         self.db = db_service
         
+        # Request coalescing: by workflow_id, and by lookup key for look-alike workflows
+        self.workflow_flights = SingleFlight("generate_state")
+        self.lookup_flights = SingleFlight("state_lookup")
+        self.generation_flights = SingleFlight("state_generation")
+        
+        # Latency budget (ms) applied when a request doesn't set one; time kept back for the fallback tier
+        self.default_deadline_ms = float(os.getenv("STATE_GENERATION_DEADLINE_MS", "0"))
+        self.fallback_reserve_ms = float(os.getenv("STATE_GENERATION_FALLBACK_RESERVE_MS", "100"))
+        
         if self.use_ai:
-            try:
-                import anthropic
-                self.client = anthropic.AsyncAnthropic(api_key=self.anthropic_api_key)
+            if module_available("anthropic"):
+                # anthropic is imported and the client built on the first AI call
+                self.client = LazyClient("Anthropic", self._create_client)
                 logger.info("✅ Claude AI integration enabled with RAG caching")
-            except ImportError:
+            else:
                 logger.warning("❌ Anthropic library not installed, using fallback generation")
                 self.use_ai = False
         else:
             logger.info("🔄 Using rule-based state generation with RAG caching (no AI key)")
     
-    async def generate_workflow_state(self, workflow_id: str, workflow_data: Optional[Dict] = None) -> Dict[str, Any]:
-        """Generate complete workflow state with intelligent RAG caching"""
+    def _create_client(self):
+        import anthropic
+        return anthropic.AsyncAnthropic(api_key=self.anthropic_api_key)
+    
+    async def generate_workflow_state(
+        self,
+        workflow_id: str,
+        workflow_data: Optional[Dict] = None,
+        deadline: Optional[Deadline] = None,
+        emit: Optional[EventCallback] = None,
+        context: Optional[WorkflowContext] = None
+    ) -> Dict[str, Any]:
+        """
+        Generate complete workflow state with intelligent RAG caching
+        
+        ``emit`` receives progress events (workflow, cache, block) as they happen;
+        streamed requests run on their own rather than joining a coalesced flight.
+        A request ``context`` lets the caller reuse the rows loaded here.
+        """
+        if deadline is not None:
+            return await self._generate_within_deadline(workflow_id, workflow_data, deadline, context)
+        
+        if workflow_data is not None or emit is not None:
+            return await self._generate_workflow_state(workflow_id, workflow_data, emit, context)
+        
+        # Concurrent requests for the same stored workflow share one generation
+        return await self.workflow_flights.do(
+            workflow_id,
+            lambda: self._generate_workflow_state(workflow_id, context=context)
+        )
+    
+    async def _generate_workflow_state(
+        self,
+        workflow_id: str,
+        workflow_data: Optional[Dict] = None,
+        emit: Optional[EventCallback] = None,
+        context: Optional[WorkflowContext] = None
+    ) -> Dict[str, Any]:
         logger.info(f"🚀 Generating state for workflow: {workflow_id}")
         start_time = time.time()
         session_id = str(uuid.uuid4())
         
+        # 1-2. Fetch workflow and blocks once, and prepare input data for caching system
+        # (a missing workflow raises ValueError rather than falling back)
+        workflow_data, input_data, lookup_key = await self._load_inputs(workflow_id, workflow_data, context)
+        logger.info(f"Found {len(workflow_data.get('blocks', []))} blocks for workflow")
+        
         try:
-            # 1. Fetch workflow and blocks data
-            if workflow_data:
-                workflow = workflow_data
-                blocks = workflow_data.get('blocks', [])
-            else:
-                workflow = await self.db.get_workflow(workflow_id)
-                if not workflow:
-                    raise ValueError(f"Workflow {workflow_id} not found")
-                blocks = await self.db.get_workflow_blocks(workflow_id)
-            
-            logger.info(f"Found {len(blocks)} blocks for workflow")
-            
-            # 2. Prepare input data for caching system
-            input_data = {
-                'workflow_id': workflow_id,
-                'workflow_type': self._determine_workflow_type(workflow, blocks),
-                'name': workflow.get('name', ''),
-                'description': workflow.get('description', ''),
-                'blocks': blocks,
-                'edges': self._infer_edges_from_positions(blocks),
-                'variables': workflow.get('variables', {})
-            }
+            if emit:
+                await emit("workflow", {
+                    "workflow_id": workflow_id,
+                    "workflow_type": input_data['workflow_type'],
+                    "block_count": len(workflow_data.get('blocks', []))
+                })
             
             # 3. Create temp record for tracking
             temp_id = await self.lookup_service.create_temp_record(session_id, input_data)
             
-            # 4. Check lookup table for similar workflows (hybrid search)
-            logger.info("🔍 Checking cache for similar workflows (hybrid search)...")
-            cached_result = await self.lookup_service.find_similar_workflows_hybrid(input_data)
+            # 4-7. Lookup and generate; structurally identical workflows in flight
+            # at the same time share one hybrid search and one AI call
+            if emit:
+                state, similarity_score = await self._resolve_state(workflow_id, workflow_data, input_data, start_time, emit)
+            else:
+                state, similarity_score, leader_id = await self.lookup_flights.do(
+                    lookup_key,
+                    lambda: self._resolve_shared(workflow_id, workflow_data, input_data, start_time)
+                )
+                state = await self._adopt_shared_state(state, leader_id, workflow_id, input_data)
             
-            if cached_result:
-                cached_state, similarity_score, match_type = cached_result
-                logger.info(f"✅ Cache HIT! Using cached result with {similarity_score:.2%} similarity ({match_type} match)")
-                
-                # 5a. Adapt cached state for current requirements
-                if similarity_score < 0.95:  # Not exact match
-                    logger.info("🔧 Adapting cached state to current requirements...")
-                    adapted_state = await self.lookup_service.adapt_cached_state(
-                        cached_state,
-                        input_data,
-                        similarity_score
-                    )
-                    
-                    # Optional: Use lighter AI model for fine-tuning
-                    if self.use_ai and similarity_score < 0.85:
-                        adapted_state = await self._ai_adapt_state(
-                            adapted_state,
-                            input_data,
-                            similarity_score
-                        )
-                else:
-                    adapted_state = cached_state
-                    logger.info("🎯 Exact match found, using cached state as-is")
-                
-                # Update temp record
+            # Update temp record
+            if similarity_score is not None:
                 await self.lookup_service.update_temp_record(
                     temp_id,
-                    adapted_state,
+                    state,
                     similarity_score=similarity_score
                 )
-                
-                generation_time = time.time() - start_time
-                logger.info(f"⚡ State generated from cache in {generation_time:.2f}s (saved ~2-3s)")
-                
-                return adapted_state
-            
             else:
-                logger.info("❌ Cache MISS - No similar workflow found, generating new state")
-                
-                # 5b. Generate new state using AI or fallback
-                if self.use_ai:
-                    generated_state = await self._generate_ai_state(workflow_id, workflow_data)
-                else:
-                    generated_state = await self._generate_fallback_state(workflow_id, workflow_data)
-                
-                # 6. Enhance and validate the state
-                final_state = self._enhance_generated_state(generated_state, workflow_id)
-                
-                # 7. Store in lookup table with embedding for future use
-                generation_time = time.time() - start_time
-                logger.info("💾 Storing new pattern in cache with embedding for future use...")
-                await self.lookup_service.store_workflow_pattern_with_embedding(
-                    input_data,
-                    final_state,
-                    generation_time
-                )
-                
-                # Update temp record
-                await self.lookup_service.update_temp_record(temp_id, final_state)
-                
-                logger.info(f"🆕 New state generated in {generation_time:.2f}s")
-                
-                return final_state
+                await self.lookup_service.update_temp_record(temp_id, state)
+            
+            return state
                 
         except Exception as e:
             logger.error(f"Error in cached state generation: {e}")
             # Fallback to basic generation
             return await self._generate_fallback_state(workflow_id, workflow_data)
     
+    async def _resolve_shared(
+        self,
+        workflow_id: str,
+        workflow_data: Optional[Dict],
+        input_data: Dict[str, Any],
+        start_time: float
+    ) -> Tuple[Dict[str, Any], Optional[float], str]:
+        """_resolve_state for a coalesced flight, tagged with the workflow that ran it"""
+        state, similarity_score = await self._resolve_state(workflow_id, workflow_data, input_data, start_time)
+        return state, similarity_score, workflow_id
+    
+    async def _adopt_shared_state(
+        self,
+        state: Dict[str, Any],
+        leader_id: str,
+        workflow_id: str,
+        input_data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """A coalesced flight's state for ``workflow_id``; another workflow's state is adapted, as the batch path does"""
+        if leader_id == workflow_id:
+            return state
+        state = await self.lookup_service.adapt_cached_state(state, input_data, 1.0)
+        state['metadata']['workflowId'] = workflow_id
+        state['metadata']['coalesced_with'] = leader_id
+        return state
+    
+    async def _resolve_state(
+        self,
+        workflow_id: str,
+        workflow_data: Optional[Dict],
+        input_data: Dict[str, Any],
+        start_time: float,
+        emit: Optional[EventCallback] = None
+    ) -> Tuple[Dict[str, Any], Optional[float]]:
+        """Serve from the cache or generate a new state; returns (state, similarity score or None)"""
+        # 4. Check lookup table for similar workflows (hybrid search)
+        logger.info("🔍 Checking cache for similar workflows (hybrid search)...")
+        cached_result = await self.lookup_service.find_similar_workflows_hybrid(input_data)
+        
+        if emit:
+            await emit("cache", {
+                "hit": bool(cached_result),
+                "similarity_score": cached_result[1] if cached_result else None,
+                "match_type": cached_result[2] if cached_result else None,
+                "action": ("reuse" if cached_result[1] >= 0.95 else "adapt") if cached_result else "generate"
+            })
+        
+        if cached_result:
+            cached_state, similarity_score, match_type = cached_result
+            logger.info(f"✅ Cache HIT! Using cached result with {similarity_score:.2%} similarity ({match_type} match)")
+            
+            # 5a. Adapt cached state for current requirements
+            if similarity_score < 0.95:  # Not exact match
+                logger.info("🔧 Adapting cached state to current requirements...")
+                adapted_state = await self.lookup_service.adapt_cached_state(
+                    cached_state,
+                    input_data,
+                    similarity_score
+                )
+                
+                # Optional: Use lighter AI model for fine-tuning
+                if self.use_ai and similarity_score < 0.85:
+                    adapted_state = await self._ai_adapt_state(
+                        adapted_state,
+                        input_data,
+                        similarity_score
+                    )
+            else:
+                adapted_state = cached_state
+                logger.info("🎯 Exact match found, using cached state as-is")
+            
+            generation_time = time.time() - start_time
+            logger.info(f"⚡ State generated from cache in {generation_time:.2f}s (saved ~2-3s)")
+            
+            return adapted_state, similarity_score
+        
+        logger.info("❌ Cache MISS - No similar workflow found, generating new state")
+        return await self._generate_and_store(workflow_id, workflow_data, input_data, start_time, emit), None
+    
+    async def _generate_and_store(
+        self,
+        workflow_id: str,
+        workflow_data: Optional[Dict],
+        input_data: Dict[str, Any],
+        start_time: float,
+        emit: Optional[EventCallback] = None
+    ) -> Dict[str, Any]:
+        """Generate a new state (AI or fallback) and store it as a reusable pattern"""
+        # 5b. Generate new state using AI or fallback
+        if self.use_ai:
+            generated_state = await self._generate_ai_state(workflow_id, workflow_data, emit)
+        else:
+            generated_state = await self._generate_fallback_state(workflow_id, workflow_data)
+        
+        # 6. Enhance and validate the state
+        final_state = self._enhance_generated_state(generated_state, workflow_id)
+        
+        # 7. Store in lookup table with embedding for future use
+        generation_time = time.time() - start_time
+        logger.info("💾 Storing new pattern in cache with embedding for future use...")
+        await self.lookup_service.store_workflow_pattern_with_embedding(
+            input_data,
+            final_state,
+            generation_time
+        )
+        
+        logger.info(f"🆕 New state generated in {generation_time:.2f}s")
+        
+        return final_state
+    
+    async def _generate_and_store_shared(
+        self,
+        workflow_id: str,
+        workflow_data: Optional[Dict],
+        input_data: Dict[str, Any],
+        start_time: float
+    ) -> Tuple[Dict[str, Any], str]:
+        """_generate_and_store for a coalesced flight, tagged with the workflow that ran it"""
+        return await self._generate_and_store(workflow_id, workflow_data, input_data, start_time), workflow_id
+    
+    async def generate_workflow_states_batch(
+        self,
+        workflows: Dict[str, Dict[str, Any]],
+        blocks_by_workflow: Dict[str, List[Dict[str, Any]]],
+        concurrency: int = 8
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Generate states for many pre-fetched workflows
+        
+        Workflows are grouped by lookup key: each distinct pattern goes through
+        the hybrid lookup / generation once (at most ``concurrency`` at a time),
+        and the other members of its group get that state adapted to their own
+        blocks. Temp tracking records are skipped for batch runs.
+        """
+        groups: Dict[str, List[Tuple[str, Dict[str, Any], Dict[str, Any]]]] = {}
+        for workflow_id, workflow in workflows.items():
+            blocks = blocks_by_workflow.get(workflow_id, [])
+            input_data = self.build_input_data(workflow_id, workflow, blocks)
+            lookup_key = self.lookup_service.generate_lookup_key(input_data)
+            groups.setdefault(lookup_key, []).append((workflow_id, {**workflow, 'blocks': blocks}, input_data))
+        
+        logger.info(f"📦 Batch generation: {len(workflows)} workflows in {len(groups)} distinct patterns")
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        states: Dict[str, Dict[str, Any]] = {}
+        
+        async def resolve_group(members: List[Tuple[str, Dict[str, Any], Dict[str, Any]]]) -> None:
+            leader_id, leader_data, leader_input = members[0]
+            async with semaphore:
+                try:
+                    state, _ = await self._resolve_state(leader_id, leader_data, leader_input, time.time())
+                except Exception as e:
+                    logger.error(f"Batch generation failed for {leader_id}, using fallback: {e}")
+                    state = self._enhance_generated_state(
+                        await self._generate_fallback_state(leader_id, leader_data),
+                        leader_id
+                    )
+            states[leader_id] = state
+            
+            for member_id, _, member_input in members[1:]:
+                member_state = await self.lookup_service.adapt_cached_state(state, member_input, 1.0)
+                member_state['metadata']['workflowId'] = member_id
+                member_state['metadata']['batch_shared_with'] = leader_id
+                states[member_id] = member_state
+        
+        await asyncio.gather(*(resolve_group(members) for members in groups.values()))
+        return states
+    
+    async def _generate_within_deadline(
+        self,
+        workflow_id: str,
+        workflow_data: Optional[Dict],
+        deadline: Deadline,
+        context: Optional[WorkflowContext] = None
+    ) -> Dict[str, Any]:
+        """
+        Generate a state within a latency budget, degrading tier by tier
+        
+        Tiers, best first: AI (generation or adaptation), cached adaptation
+        (rule-based), rule-based fallback. Each step only gets the budget left
+        after reserving time for the fallback. Abandoned generations keep running
+        in the background and still land in the cache for the next request.
+        """
+        logger.info(f"⏱️ Generating state for workflow {workflow_id} within {deadline.budget_ms:.0f}ms")
+        start_time = time.time()
+        reserve_ms = self.fallback_reserve_ms
+        served_by = "fallback"
+        
+        step_start = time.monotonic()
+        workflow_data, input_data, lookup_key = await self._load_inputs(workflow_id, workflow_data, context)
+        deadline.record("fetch", step_start)
+        
+        try:
+            # Cache lookup is skipped, not fatal, when it overruns the budget
+            try:
+                cached_result = await deadline.run(
+                    "lookup",
+                    self.lookup_service.find_similar_workflows_hybrid(input_data),
+                    reserve_ms
+                )
+            except asyncio.TimeoutError:
+                logger.warning("⏱️ Cache lookup exceeded the deadline, skipping cache")
+                cached_result = None
+            
+            if cached_result:
+                cached_state, similarity_score, _ = cached_result
+                state = cached_state
+                served_by = "cached_adaptation"
+                if similarity_score < 0.95:
+                    step_start = time.monotonic()
+                    state = await self.lookup_service.adapt_cached_state(cached_state, input_data, similarity_score)
+                    deadline.record("cached_adaptation", step_start)
+                    
+                    if self.use_ai and similarity_score < 0.85:
+                        try:
+                            state = await deadline.run(
+                                "ai_adaptation",
+                                self._ai_adapt_state(state, input_data, similarity_score),
+                                reserve_ms
+                            )
+                            served_by = "ai_adaptation"
+                        except asyncio.TimeoutError:
+                            logger.warning("⏱️ AI adaptation exceeded the deadline, serving cached adaptation")
+            else:
+                tier = "ai_generation" if self.use_ai else "fallback"
+                try:
+                    state, leader_id = await deadline.run(
+                        tier,
+                        self.generation_flights.do(
+                            lookup_key,
+                            lambda: self._generate_and_store_shared(workflow_id, workflow_data, input_data, start_time)
+                        ),
+                        reserve_ms
+                    )
+                    state = await self._adopt_shared_state(state, leader_id, workflow_id, input_data)
+                    served_by = tier
+                except asyncio.TimeoutError:
+                    logger.warning(f"⏱️ {tier} exceeded the deadline, serving rule-based fallback")
+                    state = await self._timed_fallback(workflow_id, workflow_data, deadline)
+        
+        except Exception as e:
+            logger.error(f"Error in deadline-aware state generation: {e}")
+            state = await self._timed_fallback(workflow_id, workflow_data, deadline)
+            served_by = "fallback"
+        
+        state = dict(state)
+        state['metadata'] = {**(state.get('metadata') or {}), 'generation_tiers': deadline.summary(served_by)}
+        logger.info(f"⏱️ Served by {served_by} in {deadline.elapsed_ms():.0f}ms (budget {deadline.budget_ms:.0f}ms)")
+        return state
+    
+    async def _timed_fallback(self, workflow_id: str, workflow_data: Optional[Dict], deadline: Deadline) -> Dict[str, Any]:
+        step_start = time.monotonic()
+        state = self._enhance_generated_state(
+            await self._generate_fallback_state(workflow_id, workflow_data),
+            workflow_id
+        )
+        deadline.record("fallback", step_start)
+        return state
+    
+    async def _load_inputs(
+        self,
+        workflow_id: str,
+        workflow_data: Optional[Dict],
+        context: Optional[WorkflowContext]
+    ) -> Tuple[Dict[str, Any], Dict[str, Any], str]:
+        """(workflow data with blocks, input data, lookup key) from the caller's data or a request context"""
+        if workflow_data:
+            input_data = self.build_input_data(workflow_id, workflow_data, workflow_data.get('blocks', []))
+            return workflow_data, input_data, self.lookup_service.generate_lookup_key(input_data)
+        
+        context = context or WorkflowContext(workflow_id, self.db)
+        if not await context.load():
+            raise ValueError(f"Workflow {workflow_id} not found")
+        input_data = self.context_input_data(context)
+        return context.workflow_data, input_data, context.lookup_key
+    
+    def context_input_data(self, context: WorkflowContext) -> Dict[str, Any]:
+        """Derive input data (type, inferred edges) and lookup key once per request context"""
+        if context.input_data is None:
+            context.input_data = self.build_input_data(context.workflow_id, context.workflow, context.blocks)
+            context.lookup_key = self.lookup_service.generate_lookup_key(context.input_data)
+        return context.input_data
+    
+    def build_input_data(self, workflow_id: str, workflow: Dict[str, Any], blocks: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Normalized input used for lookup keys, descriptions and caching"""
+        return {
+            'workflow_id': workflow_id,
+            'workflow_type': self._determine_workflow_type(workflow, blocks),
+            'name': workflow.get('name', ''),
+            'description': workflow.get('description', ''),
+            'blocks': blocks,
+            'edges': self._infer_edges_from_positions(blocks),
+            'variables': workflow.get('variables', {})
+        }
+    
     def _determine_workflow_type(self, workflow: Dict[str, Any], blocks: List[Dict[str, Any]]) -> str:
         """Determine the type of workflow based on blocks and metadata"""
         name = workflow.get('name', '').lower()
@@ -274,8 +563,13 @@ class StateGenerator:
             logger.error(f"AI adaptation failed: {e}")
             return cached_state  # Return original cached state
     
-    async def _generate_ai_state(self, workflow_id: str, workflow_data: Optional[Dict] = None) -> Dict[str, Any]:
-        """Generate state using Claude AI (original method)"""
+    async def _generate_ai_state(
+        self,
+        workflow_id: str,
+        workflow_data: Optional[Dict] = None,
+        emit: Optional[EventCallback] = None
+    ) -> Dict[str, Any]:
+        """Generate state using Claude AI, streaming the response"""
         start_time = time.time()
         model_name = "claude-3-sonnet-20240229"
         
@@ -283,7 +577,10 @@ class StateGenerator:
             # Create prompt for Claude
             prompt = self._create_ai_prompt(workflow_id, workflow_data)
             
-            response = await self.client.messages.create(
+            # Stream so blocks can be forwarded as soon as each one is complete
+            block_parser = PartialBlockParser()
+            chunks = []
+            async with self.client.messages.stream(
                 model=model_name,
                 max_tokens=4000,
                 temperature=0.7,
@@ -291,12 +588,17 @@ class StateGenerator:
                     "role": "user",
                     "content": prompt
                 }]
-            )
+            ) as stream:
+                async for text in stream.text_stream:
+                    chunks.append(text)
+                    if emit:
+                        for block_id, block in block_parser.feed(text):
+                            await emit("block", {"block_id": block_id, "block": block})
             
             response_time = (time.time() - start_time) * 1000  # Convert to milliseconds
             
             # Parse AI response
-            ai_response = response.content[0].text
+            ai_response = "".join(chunks)
             
             # Estimate cost (Claude 3 Sonnet: ~$3 per 1M input tokens, ~$15 per 1M output tokens)
             input_tokens = len(prompt.split()) * 1.3  # Rough estimation
@@ -972,14 +1274,24 @@ Return only valid JSON.
             logger.error(f"❌ Error in generate_workflow_state_from_data: {str(e)}")
             raise
 
-    async def analyze_workflow_pattern(self, workflow_id: str, workflow_data: Optional[Dict] = None) -> str:
+    async def analyze_workflow_pattern(
+        self,
+        workflow_id: str,
+        workflow_data: Optional[Dict] = None,
+        context: Optional[WorkflowContext] = None
+    ) -> str:
         """Analyze workflow pattern type"""
         try:
+            if context is not None and not workflow_data:
+                if not await context.load():
+                    return "unknown"
+                return self.context_input_data(context)['workflow_type']
+            
             if not workflow_data:
-                workflow = await self.db.get_workflow(workflow_id)
+                workflow = await self.db.get_workflow_with_blocks(workflow_id)
                 if not workflow:
                     return "unknown"
-                blocks = await self.db.get_workflow_blocks(workflow_id)
+                blocks = workflow.get('blocks', [])
             else:
                 workflow = workflow_data
                 blocks = workflow_data.get('blocks', [])
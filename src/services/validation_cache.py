@@ -0,0 +1,106 @@
+"""
+Validation Report Cache
+Memoize ValidationReports by a content hash of the workflow state
+
+The same state is often validated several times (after generation, again via
+the validate endpoint, again by scripts), so reports are kept in a bounded LRU
+keyed by the rule-set version, engine and state hash. A hit skips the validators
+entirely; the only per-call cost left is serializing and hashing the state.
+
+The hash is taken over the state's JSON serialization with volatile metadata
+values (timestamps such as ``updatedAt``) masked. Keys are masked rather than
+dropped because rules check for their presence. Dict order is kept as is: it
+decides the order of findings in the report, so two states that differ only
+in key order do not share a report.
+"""
+import os
+import json
+import hashlib
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from src.utils.lru_cache import LRUTTLCache
+from src.services.validation_engine import RULESET_VERSION
+
+VOLATILE_METADATA_FIELDS = ("createdAt", "updatedAt")
+MASKED_VALUE = "*"
+
+
+def canonical_state_json(state: Dict[str, Any]) -> Optional[str]:
+    """
+    Stable JSON form of a state with volatile metadata masked
+
+    Returns None for states that aren't plain JSON documents (non-dict state,
+    values json can't encode); those are never cached.
+    """
+    if not isinstance(state, dict):
+        return None
+    metadata = state.get("metadata")
+    if isinstance(metadata, dict) and any(field in metadata for field in VOLATILE_METADATA_FIELDS):
+        masked = {key: MASKED_VALUE if key in VOLATILE_METADATA_FIELDS else value for key, value in metadata.items()}
+        state = {**state, "metadata": masked}
+    try:
+        return json.dumps(state, separators=(",", ":"), ensure_ascii=False)
+    except (TypeError, ValueError):
+        return None
+
+
+def _digest(canonical: str) -> str:
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def state_hash(state: Dict[str, Any]) -> Optional[str]:
+    """SHA-256 of the canonical state JSON, or None if the state can't be hashed"""
+    canonical = canonical_state_json(state)
+    return _digest(canonical) if canonical is not None else None
+
+
+class ValidationReportCache:
+    """Bounded LRU of validation reports keyed by state content"""
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl_seconds: float = 3600.0
+    ):
+        # Values are (report, canonical state length); the state size stands in for the report size
+        self.cache = LRUTTLCache(
+            max_bytes=max_bytes,
+            ttl_seconds=ttl_seconds,
+            max_entries=max_entries,
+            size_of=lambda entry: entry[1]
+        )
+
+    def key(self, state: Dict[str, Any], engine: str) -> Optional[Tuple[Hashable, ...]]:
+        """(rule-set version, engine, state hash, state JSON length), or None if the state can't be cached"""
+        canonical = canonical_state_json(state)
+        if canonical is None:
+            return None
+        return (RULESET_VERSION, engine, _digest(canonical), len(canonical))
+
+    def get(self, key: Tuple[Hashable, ...]) -> Any:
+        entry = self.cache.get(key)
+        return entry[0] if entry is not None else None
+
+    def set(self, key: Tuple[Hashable, ...], report: Any) -> bool:
+        return self.cache.set(key, (report, key[-1]))
+
+    def clear(self) -> int:
+        return self.cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.cache.stats(), "ruleset_version": RULESET_VERSION}
+
+
+def create_report_cache() -> Optional[ValidationReportCache]:
+    """Report cache configured from the environment, or None when VALIDATION_CACHE=false"""
+    if os.getenv("VALIDATION_CACHE", "true").lower() != "true":
+        return None
+    return ValidationReportCache(
+        max_entries=int(os.getenv("VALIDATION_CACHE_MAX_ENTRIES", "1024")),
+        max_bytes=int(os.getenv("VALIDATION_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+        ttl_seconds=float(os.getenv("VALIDATION_CACHE_TTL_SECONDS", "3600"))
+    )
+
+# Global instance
+report_cache = create_report_cache()
@@ -0,0 +1,454 @@
+"""
+Compiled Validation Engine
+Single-pass indexing of a workflow state shared by every validation rule
+
+The state is walked once to build the indexes the rules need (block id set,
+blocks per type, edge checks, outgoing sources, connected ids, type counts).
+Rules then read only their slice: the agent rule sees agent blocks, the
+connectivity rule sees precomputed edge results. The per-block checks and
+result builders are shared with WorkflowValidator's nine validators, which
+run them on the raw state, so both engines produce the same ValidationReport.
+"""
+from collections import defaultdict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+from src.services.graph_analysis import WorkflowGraph, analyze
+
+VALID_BLOCK_TYPES = ["starter", "agent", "api", "output", "tool"]
+VALID_START_TYPES = ["manual", "webhook", "schedule", "email"]
+VALID_MODELS = ["gpt-4", "gpt-3.5-turbo", "claude-3-opus", "claude-3-sonnet", "claude-3-haiku", "gemini-pro"]
+VALID_HTTP_METHODS = ["GET", "POST", "PUT", "DELETE", "PATCH"]
+AUTH_HEADERS = ["Authorization", "X-API-Key", "X-Auth-Token"]
+REQUIRED_SUB_BLOCKS = {
+    "starter": ("Starter", ["startWorkflow"]),
+    "agent": ("Agent", ["model", "systemPrompt"]),
+    "api": ("API", ["url"]),
+    "output": ("Output", ["outputType"]),
+    "tool": ("Tool", ["toolType"])
+}
+CANVAS_X = (0, 2000)
+CANVAS_Y = (0, 1500)
+
+
+class StateIndex:
+    """Shared lookups for one workflow state, built in a single pass"""
+
+    __slots__ = (
+        "state", "blocks", "items", "edges", "block_ids", "by_type", "type_counts",
+        "summary_type_counts", "edge_errors", "connected", "sources", "graph"
+    )
+
+    def __init__(self, state: Dict[str, Any]):
+        self.state = state
+        self.blocks: Dict[str, Any] = state.get("blocks", {})
+        self.items: List[Tuple[str, Dict[str, Any]]] = list(self.blocks.items())
+        self.edges: List[Any] = state.get("edges", [])
+        self.block_ids: Set[str] = set(self.blocks.keys())
+        self.by_type: Dict[Any, List[Dict[str, Any]]] = defaultdict(list)
+        self.summary_type_counts: Dict[Any, int] = {}
+        for _, block in self.items:
+            self.by_type[block.get("type")].append(block)
+            summary_type = block.get("type", "unknown")
+            self.summary_type_counts[summary_type] = self.summary_type_counts.get(summary_type, 0) + 1
+        self.type_counts = {block_type: len(blocks) for block_type, blocks in self.by_type.items()}
+
+        # One pass over edges: validity errors, connected ids, outgoing sources and the adjacency lists
+        self.graph = WorkflowGraph(self.blocks)
+        self.edge_errors, self.connected, self.sources = scan_edges(self.edges, self.block_ids, self.graph)
+
+    def of_type(self, block_type: str) -> List[Dict[str, Any]]:
+        return self.by_type.get(block_type, [])
+
+
+def scan_edges(
+    edges: List[Any],
+    block_ids: Set[str],
+    graph: Optional[WorkflowGraph] = None
+) -> Tuple[List[str], Set[str], Set[Any]]:
+    """(edge errors, connected block ids, outgoing source ids) from one pass over edges, filling ``graph``"""
+    errors: List[str] = []
+    connected: Set[str] = set()
+    sources: Set[Any] = set()
+    for i, edge in enumerate(edges):
+        if not isinstance(edge, dict):
+            errors.append(f"Edge {i} is not a dictionary")
+            continue
+        sources.add(edge.get("from"))
+        if "from" not in edge or "to" not in edge:
+            errors.append(f"Edge {i} missing 'from' or 'to' field")
+            continue
+        from_id = edge["from"]
+        to_id = edge["to"]
+        if from_id not in block_ids:
+            errors.append(f"Edge {i} references non-existent block: {from_id}")
+        if to_id not in block_ids:
+            errors.append(f"Edge {i} references non-existent block: {to_id}")
+        connected.add(from_id)
+        connected.add(to_id)
+        if graph is not None:
+            graph.add_edge(from_id, to_id)
+    return errors, connected, sources
+
+
+def is_indexable(state: Any) -> bool:
+    """Dict state whose blocks (if any) are a dict of dicts and edges (if any) a list"""
+    if not isinstance(state, dict):
+        return False
+    blocks = state.get("blocks", {})
+    edges = state.get("edges", [])
+    if not isinstance(blocks, dict) or not isinstance(edges, list):
+        return False
+    return all(isinstance(block, dict) for block in blocks.values())
+
+
+def build_index(state: Dict[str, Any]) -> Optional[StateIndex]:
+    """
+    Index a well-formed state; None when the shape needs the per-validator path
+
+    Malformed states (non-dict blocks, unhashable ids or types) are rare; the
+    per-validator path reports them one validator at a time, so a shape error
+    only fails the validators it breaks.
+    """
+    if not is_indexable(state):
+        return None
+    try:
+        return StateIndex(state)
+    except TypeError:
+        return None
+
+
+Findings = Tuple[List[str], List[str]]
+
+
+# Per-block checks: (errors, warnings) for one block, shared by the rules below
+# and by incremental re-validation of touched blocks
+
+def check_block_type(block_id: str, block: Dict[str, Any]) -> Findings:
+    if "type" not in block:
+        return [f"Block {block_id} missing 'type' field"], []
+    errors = []
+    warnings = []
+    if "id" not in block:
+        errors.append(f"Block {block_id} missing 'id' field")
+    if "name" not in block:
+        warnings.append(f"Block {block_id} missing 'name' field")
+    block_type = block["type"]
+    if block_type not in VALID_BLOCK_TYPES:
+        errors.append(f"Block {block_id} has invalid type: {block_type}")
+    if "position_x" not in block:
+        warnings.append(f"Block {block_id} missing position_x")
+    if "position_y" not in block:
+        warnings.append(f"Block {block_id} missing position_y")
+    if "sub_blocks" not in block:
+        warnings.append(f"Block {block_id} missing sub_blocks configuration")
+    return errors, warnings
+
+
+def check_starter(block: Dict[str, Any]) -> Findings:
+    sub_blocks = block.get("sub_blocks", {})
+    if "startWorkflow" not in sub_blocks:
+        return [f"Starter block {block.get('id')} missing startWorkflow configuration"], []
+    errors = []
+    warnings = []
+    start_type = sub_blocks["startWorkflow"]
+    if start_type not in VALID_START_TYPES:
+        errors.append(f"Invalid startWorkflow type: {start_type}")
+    if start_type == "webhook" and "webhookPath" not in sub_blocks:
+        warnings.append("Webhook starter missing webhookPath")
+    if start_type == "schedule" and "scheduleType" not in sub_blocks:
+        warnings.append("Schedule starter missing scheduleType")
+    return errors, warnings
+
+
+def check_agent(block: Dict[str, Any]) -> Findings:
+    errors = []
+    warnings = []
+    block_id = block.get("id", "unknown")
+    sub_blocks = block.get("sub_blocks", {})
+
+    if "model" not in sub_blocks:
+        errors.append(f"Agent block {block_id} missing model configuration")
+    elif sub_blocks["model"] not in VALID_MODELS:
+        warnings.append(f"Agent block {block_id} uses non-standard model: {sub_blocks['model']}")
+
+    if "systemPrompt" not in sub_blocks:
+        errors.append(f"Agent block {block_id} missing systemPrompt")
+    elif len(sub_blocks["systemPrompt"].strip()) < 10:
+        warnings.append(f"Agent block {block_id} has very short system prompt")
+
+    if "temperature" in sub_blocks:
+        temp = sub_blocks["temperature"]
+        if not isinstance(temp, (int, float)) or temp < 0 or temp > 1:
+            warnings.append(f"Agent block {block_id} has invalid temperature: {temp}")
+    return errors, warnings
+
+
+def check_api(block: Dict[str, Any]) -> Findings:
+    errors = []
+    warnings = []
+    block_id = block.get("id", "unknown")
+    sub_blocks = block.get("sub_blocks", {})
+
+    if "url" not in sub_blocks:
+        errors.append(f"API block {block_id} missing URL")
+    elif not sub_blocks["url"].startswith(("http://", "https://")):
+        warnings.append(f"API block {block_id} URL should use http/https protocol")
+
+    if "method" not in sub_blocks:
+        warnings.append(f"API block {block_id} missing HTTP method, defaulting to GET")
+    else:
+        method = sub_blocks["method"].upper()
+        if method not in VALID_HTTP_METHODS:
+            errors.append(f"API block {block_id} has invalid HTTP method: {method}")
+
+    headers = sub_blocks["headers"] if "headers" in sub_blocks else None
+    if isinstance(headers, dict) and not any(header in headers for header in AUTH_HEADERS):
+        warnings.append(f"API block {block_id} may need authentication headers")
+    return errors, warnings
+
+
+def check_position(block_id: str, block: Dict[str, Any]) -> Findings:
+    x = block.get("position_x", 0)
+    y = block.get("position_y", 0)
+    if not isinstance(x, (int, float)) or not isinstance(y, (int, float)):
+        return [f"Block {block_id} has invalid position coordinates"], []
+    warnings = []
+    if x < CANVAS_X[0] or x > CANVAS_X[1]:
+        warnings.append(f"Block {block_id} x-position ({x}) outside typical canvas bounds")
+    if y < CANVAS_Y[0] or y > CANVAS_Y[1]:
+        warnings.append(f"Block {block_id} y-position ({y}) outside typical canvas bounds")
+    return [], warnings
+
+
+def check_sub_blocks(block_id: str, block: Dict[str, Any]) -> Findings:
+    required = REQUIRED_SUB_BLOCKS.get(block.get("type"))
+    if required is None:
+        return [], []
+    label, fields = required
+    sub_blocks = block.get("sub_blocks", {})
+    return [f"{label} block {block_id} missing required sub_block: {field}" for field in fields
+            if field not in sub_blocks], []
+
+
+def mentions_web3(block: Dict[str, Any]) -> bool:
+    text = str(block).lower()
+    return "web3" in text or "contract" in text
+
+
+def block_position(block: Dict[str, Any]) -> Tuple[Any, Any]:
+    return block.get("position_x", 0), block.get("position_y", 0)
+
+
+def collect_findings(findings: Iterable[Findings]) -> Findings:
+    """All errors then all warnings of several checks, each in check order"""
+    errors: List[str] = []
+    warnings: List[str] = []
+    for check_errors, check_warnings in findings:
+        errors.extend(check_errors)
+        warnings.extend(check_warnings)
+    return errors, warnings
+
+
+def _result(name: str, errors: List[str], warnings: List[str], metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    return {
+        "validator_name": name,
+        "valid": len(errors) == 0,
+        "errors": errors,
+        "warnings": warnings,
+        "metadata": metadata
+    }
+
+
+def schema_result(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Schema rule result; only the top-level fields are inspected"""
+    errors = [f"Missing required field: {field}" for field in ("blocks", "edges", "subflows", "variables", "metadata")
+              if field not in state]
+    warnings = []
+
+    if "blocks" in state and not isinstance(state["blocks"], dict):
+        errors.append("'blocks' must be a dictionary")
+    if "edges" in state and not isinstance(state["edges"], list):
+        errors.append("'edges' must be a list")
+    if "variables" in state and not isinstance(state["variables"], dict):
+        errors.append("'variables' must be a dictionary")
+    if "metadata" in state and not isinstance(state["metadata"], dict):
+        errors.append("'metadata' must be a dictionary")
+
+    if "metadata" in state:
+        metadata = state["metadata"]
+        if "version" not in metadata:
+            warnings.append("Missing version in metadata")
+        if "createdAt" not in metadata:
+            warnings.append("Missing createdAt timestamp")
+
+    return _result("validate_schema", errors, warnings)
+
+
+def rule_schema(index: StateIndex) -> Dict[str, Any]:
+    """Required top-level fields and their types"""
+    return schema_result(index.state)
+
+
+def rule_block_types(index: StateIndex) -> Dict[str, Any]:
+    """Required block fields and known block types"""
+    errors, warnings = collect_findings(check_block_type(block_id, block) for block_id, block in index.items)
+
+    return _result("validate_block_types", errors, warnings, {
+        "total_blocks": len(index.blocks),
+        "block_types": list(set(index.by_type))
+    })
+
+
+def starters_result(findings: List[Findings]) -> Dict[str, Any]:
+    """Starter rule result from each starter block's findings, in block order"""
+    if not findings:
+        return {
+            "validator_name": "validate_starter_blocks",
+            "valid": False,
+            "errors": ["Workflow must have at least one starter block"],
+            "warnings": [],
+            "metadata": None
+        }
+    errors = [error for block_errors, _ in findings for error in block_errors]
+    warnings = [warning for _, block_warnings in findings for warning in block_warnings]
+    return _result("validate_starter_blocks", errors, warnings, {"starter_count": len(findings)})
+
+
+def rule_starter_blocks(index: StateIndex) -> Dict[str, Any]:
+    """At least one starter with a valid trigger"""
+    return starters_result([check_starter(block) for block in index.of_type("starter")])
+
+
+def rule_agent_configuration(index: StateIndex) -> Dict[str, Any]:
+    """Model, system prompt and temperature of agent blocks"""
+    agent_blocks = index.of_type("agent")
+    errors, warnings = collect_findings(check_agent(block) for block in agent_blocks)
+
+    return _result("validate_agent_configuration", errors, warnings, {"agent_count": len(agent_blocks)})
+
+
+def rule_api_integration(index: StateIndex) -> Dict[str, Any]:
+    """URL, method and auth headers of API blocks"""
+    api_blocks = index.of_type("api")
+    errors, warnings = collect_findings(check_api(block) for block in api_blocks)
+
+    return _result("validate_api_integration", errors, warnings, {"api_count": len(api_blocks)})
+
+
+def connectivity_result(
+    edge_errors: List[str],
+    edge_count: int,
+    block_count: int,
+    disconnected: Set[str],
+    starter_ids: List[Any],
+    sources: Any,
+    connected_count: int,
+    graph: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Connectivity rule result from precomputed edge checks and graph analysis"""
+    warnings = []
+    if not edge_count and block_count > 1:
+        warnings.append("Workflow has multiple blocks but no connections")
+
+    if disconnected and block_count > 1:
+        warnings.append(f"Disconnected blocks found: {list(disconnected)}")
+
+    for starter_id in starter_ids:
+        # An unhashable id can't be an edge source (scan_edges would have raised)
+        if not isinstance(starter_id, Hashable) or starter_id not in sources:
+            warnings.append(f"Starter block {starter_id} has no outgoing connections")
+
+    return _result("validate_edge_connectivity", list(edge_errors), warnings, {
+        "edge_count": edge_count,
+        "connected_blocks": connected_count,
+        "graph": graph
+    })
+
+
+def rule_edge_connectivity(index: StateIndex) -> Dict[str, Any]:
+    """Edge references, disconnected blocks, starter fan-out and graph structure"""
+    return connectivity_result(
+        index.edge_errors,
+        len(index.edges),
+        len(index.blocks),
+        index.block_ids - index.connected,
+        [starter.get("id") for starter in index.of_type("starter")],
+        index.sources,
+        len(index.connected),
+        analyze(index.graph)
+    )
+
+
+def patterns_result(variables: Dict[str, Any], agent_count: int, api_count: int, has_web3: bool) -> Dict[str, Any]:
+    """Pattern rule result from block type counts, variables and web3 mentions"""
+    warnings = []
+    detected_patterns = []
+
+    if agent_count >= 3:
+        detected_patterns.append("multi_agent_team")
+    if api_count >= 2 and agent_count >= 1:
+        detected_patterns.append("api_orchestration")
+
+    var_names = [k.lower() for k in variables.keys()]
+    if any("trading" in name or "price" in name or "market" in name for name in var_names):
+        detected_patterns.append("trading_bot")
+
+    if has_web3:
+        detected_patterns.append("web3_automation")
+
+    if "multi_agent_team" in detected_patterns and agent_count < 2:
+        warnings.append("Multi-agent pattern detected but insufficient agents")
+
+    if "trading_bot" in detected_patterns:
+        missing_vars = [var for var in ("trading_pair", "stop_loss", "take_profit") if var not in var_names]
+        if missing_vars:
+            warnings.append(f"Trading bot pattern missing variables: {missing_vars}")
+
+    return _result("validate_workflow_patterns", [], warnings, {"detected_patterns": detected_patterns})
+
+
+def rule_workflow_patterns(index: StateIndex) -> Dict[str, Any]:
+    """Detect multi-agent, API orchestration, trading and web3 patterns"""
+    return patterns_result(
+        index.state.get("variables", {}),
+        index.type_counts.get("agent", 0),
+        index.type_counts.get("api", 0),
+        any(mentions_web3(block) for block in index.blocks.values())
+    )
+
+
+def rule_position_bounds(index: StateIndex) -> Dict[str, Any]:
+    """Numeric positions inside the canvas, and overlapping blocks"""
+    errors, warnings = collect_findings(check_position(block_id, block) for block_id, block in index.items)
+    positions = [block_position(block) for _, block in index.items]
+
+    if len(set(positions)) < len(positions):
+        warnings.append("Some blocks have identical positions (may overlap)")
+
+    return _result("validate_position_bounds", errors, warnings)
+
+
+def rule_subblock_structure(index: StateIndex) -> Dict[str, Any]:
+    """Required sub_blocks per block type"""
+    errors, _ = collect_findings(check_sub_blocks(block_id, block) for block_id, block in index.items)
+
+    return _result("validate_subblock_structure", errors, [])
+
+
+Rule = Callable[[StateIndex], Dict[str, Any]]
+
+# (WorkflowValidator method name, rule) in report order; the name labels rule errors
+COMPILED_RULES: List[Tuple[str, Rule]] = [
+    ("_validate_schema", rule_schema),
+    ("_validate_block_types", rule_block_types),
+    ("_validate_starter_blocks", rule_starter_blocks),
+    ("_validate_agent_configuration", rule_agent_configuration),
+    ("_validate_api_integration", rule_api_integration),
+    ("_validate_edge_connectivity", rule_edge_connectivity),
+    ("_validate_workflow_patterns", rule_workflow_patterns),
+    ("_validate_position_bounds", rule_position_bounds),
+    ("_validate_subblock_structure", rule_subblock_structure)
+]
+
+# Bump whenever a rule's output changes; it is part of every cached report key
+RULESET_VERSION = 3
@@ -0,0 +1,316 @@
+"""
+Local Vector Index
+In-process cosine similarity search over workflow_lookup embeddings for
+mock/offline mode, mirroring the pgvector index in database/schema.sql:
+
+    CREATE INDEX workflow_lookup_embedding_idx ON public.workflow_lookup
+        USING ivfflat (embedding vector_cosine_ops) WITH (lists = 100);
+
+Vectors are L2-normalised so cosine similarity is a single matrix-vector
+product. Small indexes are searched exhaustively; once trained, an IVF layer
+(k-means centroids, ``lists`` inverted lists, ``probes`` lists searched per
+query) narrows the scan the same way ivfflat does. Indexes persist to a
+directory of .npy files that are memory-mapped on load.
+"""
+import os
+import json
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DIM = 1536
+DEFAULT_LISTS = 100   # matches WITH (lists = 100)
+DEFAULT_PROBES = 10   # pgvector defaults to 1; sqrt(lists) gives far better recall
+MIN_ROWS_PER_LIST = 10  # train IVF only once lists have enough members to be useful
+
+
+class VectorIndex:
+    """Cosine top-k index with an optional IVF layer"""
+
+    def __init__(self, dim: int = EMBEDDING_DIM, lists: int = DEFAULT_LISTS, probes: int = DEFAULT_PROBES):
+        if np is None:
+            raise ImportError("numpy is required for the local vector index")
+        self.dim = dim
+        self.lists = lists
+        self.probes = probes
+        self.ids: List[str] = []
+        self.payloads: List[Dict[str, Any]] = []
+        self._positions: Dict[str, int] = {}
+        # Rows live in two segments: a loaded (memory-mapped, copy-on-write) base, then a
+        # tail buffer grown geometrically, so inserts never copy the loaded rows
+        self._base = np.zeros((0, dim), dtype=np.float32)
+        self._tail = np.zeros((0, dim), dtype=np.float32)
+        self._assignments: Optional["np.ndarray"] = None
+        self.centroids: Optional["np.ndarray"] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def vectors(self) -> "np.ndarray":
+        """All live rows (a copy once rows were added after loading)"""
+        tail_rows = len(self.ids) - len(self._base)
+        if not tail_rows:
+            return self._base
+        return np.concatenate([self._base, self._tail[:tail_rows]])
+
+    @vectors.setter
+    def vectors(self, vectors: "np.ndarray") -> None:
+        self._base = vectors
+        self._tail = np.zeros((0, self.dim), dtype=np.float32)
+
+    @property
+    def assignments(self) -> Optional["np.ndarray"]:
+        return self._assignments[:len(self.ids)] if self._assignments is not None else None
+
+    @assignments.setter
+    def assignments(self, assignments: Optional["np.ndarray"]) -> None:
+        self._assignments = assignments
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    def add(self, item_id: str, vector: List[float], payload: Optional[Dict[str, Any]] = None) -> None:
+        """Insert or replace a vector (amortized O(1): buffers grow geometrically)"""
+        normalized = self._normalize(np.asarray(vector, dtype=np.float32).reshape(1, -1))
+        if normalized.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dim vector, got {normalized.shape[1]}")
+
+        position = self._positions.get(item_id)
+        if position is None:
+            position = len(self.ids)
+            self.ids.append(item_id)
+            self.payloads.append(payload or {})
+            self._positions[item_id] = position
+        else:
+            self.payloads[position] = payload or {}
+
+        base_rows = len(self._base)
+        if position < base_rows:
+            if not self._base.flags.writeable:
+                self._base = np.array(self._base)
+            self._base[position] = normalized[0]
+        else:
+            self._tail = _grow_rows(self._tail, position - base_rows + 1)
+            self._tail[position - base_rows] = normalized[0]
+
+        if self.is_trained:
+            self._assignments = _grow_rows(self._assignments, position + 1)
+            self._assignments[position] = int(np.argmax(self.centroids @ normalized[0]))
+
+    def remove(self, item_ids: List[str]) -> int:
+        """Drop vectors by id (one compaction pass); returns how many were removed"""
+        doomed = {self._positions[item_id] for item_id in item_ids if item_id in self._positions}
+        if not doomed:
+            return 0
+        keep = [position for position in range(len(self.ids)) if position not in doomed]
+        vectors = self.vectors[keep]
+        assignments = self.assignments[keep] if self.is_trained else None
+        self.ids = [self.ids[position] for position in keep]
+        self.payloads = [self.payloads[position] for position in keep]
+        self._positions = {item_id: i for i, item_id in enumerate(self.ids)}
+        self.vectors = vectors
+        self.assignments = assignments
+        return len(doomed)
+
+    def clear(self) -> int:
+        """Drop every vector and the IVF layer; returns how many were removed"""
+        removed = len(self.ids)
+        self.ids = []
+        self.payloads = []
+        self._positions = {}
+        self.vectors = np.zeros((0, self.dim), dtype=np.float32)
+        self.centroids = None
+        self.assignments = None
+        return removed
+
+    def _scores(self, q: "np.ndarray", candidates: Optional["np.ndarray"] = None) -> "np.ndarray":
+        """Cosine scores of all rows, or of ``candidates`` (ascending positions), segment by segment"""
+        base_rows = len(self._base)
+        tail = self._tail[:len(self.ids) - base_rows]
+        if candidates is None:
+            return np.concatenate([self._base @ q, tail @ q])
+        split = int(np.searchsorted(candidates, base_rows))
+        return np.concatenate([self._base[candidates[:split]] @ q, tail[candidates[split:] - base_rows] @ q])
+
+    def search(
+        self,
+        query: List[float],
+        k: int = 5,
+        threshold: float = 0.0,
+        probes: Optional[int] = None
+    ) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """Return up to k (id, cosine similarity, payload) above threshold, best first"""
+        if not self.ids:
+            return []
+
+        q = self._normalize(np.asarray(query, dtype=np.float32).reshape(1, -1))[0]
+
+        if self.is_trained:
+            probes = min(probes or self.probes, len(self.centroids))
+            nearest_lists = np.argpartition(-(self.centroids @ q), probes - 1)[:probes]
+            candidates = np.flatnonzero(np.isin(self.assignments, nearest_lists))
+            if candidates.size == 0:
+                return []
+            scores = self._scores(q, candidates)
+        else:
+            candidates = None
+            scores = self._scores(q)
+
+        k = min(k, scores.shape[0])
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        results = []
+        for i in top:
+            score = float(scores[i])
+            if score < threshold:
+                break
+            position = int(candidates[i]) if candidates is not None else int(i)
+            results.append((self.ids[position], score, self.payloads[position]))
+        return results
+
+    def train(self, lists: Optional[int] = None, iterations: int = 10, seed: int = 0) -> bool:
+        """Cluster vectors into IVF lists with spherical k-means; no-op for small indexes"""
+        lists = min(lists or self.lists, len(self.ids))
+        if lists < 2 or len(self.ids) < lists * MIN_ROWS_PER_LIST:
+            self.centroids = None
+            self.assignments = None
+            return False
+
+        vectors = np.asarray(self.vectors)
+        rng = np.random.default_rng(seed)
+        centroids = vectors[rng.choice(len(vectors), lists, replace=False)].copy()
+
+        for _ in range(iterations):
+            assignments = np.argmax(vectors @ centroids.T, axis=1)
+            for c in range(lists):
+                members = vectors[assignments == c]
+                if len(members):
+                    centroids[c] = members.sum(axis=0)
+            centroids = self._normalize(centroids)
+
+        self.centroids = centroids.astype(np.float32)
+        self.assignments = np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+        logger.info(f"🧭 Trained IVF vector index: {lists} lists over {len(self.ids)} vectors")
+        return True
+
+    def save(self, path: str) -> None:
+        """Persist to a directory (vectors as .npy for memory-mapped loading)"""
+        os.makedirs(path, exist_ok=True)
+        _save_array(os.path.join(path, "vectors.npy"), self.vectors)
+        if self.is_trained:
+            _save_array(os.path.join(path, "centroids.npy"), self.centroids)
+            _save_array(os.path.join(path, "assignments.npy"), self.assignments)
+        else:
+            for name in ("centroids.npy", "assignments.npy"):
+                if os.path.exists(os.path.join(path, name)):
+                    os.remove(os.path.join(path, name))
+
+        meta_path = os.path.join(path, "meta.json")
+        with open(meta_path + ".tmp", "w") as f:
+            json.dump({
+                "dim": self.dim,
+                "lists": self.lists,
+                "probes": self.probes,
+                "ids": self.ids,
+                "payloads": self.payloads
+            }, f, default=str)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    @classmethod
+    def load(cls, path: str) -> "VectorIndex":
+        """Load a saved index; vectors are memory-mapped copy-on-write (edits stay in this process)"""
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+
+        index = cls(dim=meta["dim"], lists=meta["lists"], probes=meta["probes"])
+        index.ids = meta["ids"]
+        index.payloads = meta["payloads"]
+        index._positions = {item_id: i for i, item_id in enumerate(index.ids)}
+        index.vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="c")
+
+        centroids_path = os.path.join(path, "centroids.npy")
+        if os.path.exists(centroids_path):
+            index.centroids = np.load(centroids_path)
+            index.assignments = np.load(os.path.join(path, "assignments.npy"), mmap_mode="r")
+        return index
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "vectors": len(self.ids),
+            "dim": self.dim,
+            "ivf_trained": self.is_trained,
+            "lists": len(self.centroids) if self.is_trained else 0,
+            "probes": self.probes,
+            "memory_mapped": isinstance(self._base, np.memmap)
+        }
+
+    @staticmethod
+    def _normalize(matrix: "np.ndarray") -> "np.ndarray":
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (matrix / norms).astype(np.float32)
+
+
+def _grow_rows(array: "np.ndarray", rows: int) -> "np.ndarray":
+    """``array`` if it is writable with room for ``rows`` rows, else a copy with doubled capacity"""
+    if array.flags.writeable and len(array) >= rows:
+        return array
+    grown = np.zeros((max(rows, 2 * len(array), 16),) + array.shape[1:], dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+def _save_array(file_path: str, array: "np.ndarray") -> None:
+    """Write via a temp file so a memory-mapped copy of the old file stays valid"""
+    with open(file_path + ".tmp", "wb") as f:
+        np.save(f, np.asarray(array))
+    os.replace(file_path + ".tmp", file_path)
+
+
+_local_index: Optional[VectorIndex] = None
+
+
+def get_local_vector_index() -> Optional[VectorIndex]:
+    """Process-wide index, loaded from VECTOR_INDEX_PATH on first use; None without numpy"""
+    global _local_index
+    if _local_index is None:
+        if np is None:
+            logger.warning("❌ NumPy not installed, local vector index disabled")
+            return None
+        path = os.getenv("VECTOR_INDEX_PATH")
+        if path and os.path.exists(os.path.join(path, "meta.json")):
+            try:
+                _local_index = VectorIndex.load(path)
+                logger.info(f"✅ Loaded local vector index ({len(_local_index)} vectors) from {path}")
+            except Exception as e:
+                logger.warning(f"❌ Could not load local vector index from {path}: {e}")
+        if _local_index is None:
+            _local_index = VectorIndex(
+                lists=int(os.getenv("VECTOR_INDEX_LISTS", str(DEFAULT_LISTS))),
+                probes=int(os.getenv("VECTOR_INDEX_PROBES", str(DEFAULT_PROBES)))
+            )
+    return _local_index
+
+
+def save_local_vector_index() -> bool:
+    """Retrain (if large enough) and persist the process-wide index to VECTOR_INDEX_PATH"""
+    path = os.getenv("VECTOR_INDEX_PATH")
+    if _local_index is None or not path:
+        return False
+    try:
+        _local_index.train()
+        _local_index.save(path)
+        logger.info(f"💾 Saved local vector index ({len(_local_index)} vectors) to {path}")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to save local vector index: {e}")
+        return False
@@ -0,0 +1,60 @@
+"""
+Workflow Context
+Request-scoped unit of work for a single workflow
+"""
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class WorkflowContext:
+    """
+    Loaded workflow, blocks and derived features for one request
+
+    The workflow row and its blocks are read at most once per context (a
+    single embedded select); the derived features (input data with workflow
+    type and inferred edges, lookup key) are filled in once by
+    StateGenerator.context_input_data and shared by generation, validation
+    and pattern analysis.
+    """
+
+    def __init__(self, workflow_id: str, db_service):
+        self.workflow_id = workflow_id
+        self.db = db_service
+        self.workflow: Optional[Dict[str, Any]] = None
+        self.blocks: List[Dict[str, Any]] = []
+        self.loaded = False
+        self.input_data: Optional[Dict[str, Any]] = None
+        self.lookup_key: Optional[str] = None
+        self.queries = 0
+        self._load_lock = asyncio.Lock()
+
+    async def load(self) -> Optional[Dict[str, Any]]:
+        """Fetch the workflow and its blocks on first use; None if the workflow doesn't exist"""
+        async with self._load_lock:
+            if not self.loaded:
+                # One round trip: blocks come embedded in the workflow row
+                workflow = await self.db.get_workflow_with_blocks(self.workflow_id)
+                self.queries += 1
+                if workflow:
+                    self.blocks = workflow.pop("blocks", [])
+                    self.workflow = workflow
+                self.loaded = True
+        return self.workflow
+
+    @property
+    def workflow_data(self) -> Optional[Dict[str, Any]]:
+        """Workflow row with its blocks attached, the shape generators accept as workflow_data"""
+        if not self.workflow:
+            return None
+        return {**self.workflow, "blocks": self.blocks}
+
+    @property
+    def workflow_type(self) -> Optional[str]:
+        return self.input_data.get("workflow_type") if self.input_data else None
+
+    @property
+    def edges(self) -> List[Dict[str, Any]]:
+        return self.input_data.get("edges", []) if self.input_data else []
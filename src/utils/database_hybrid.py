@@ -5,15 +5,103 @@ Provides database operations with fallback to mock data
 import os
 import json
 import uuid
+import asyncio
 import logging
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Callable, AsyncIterator
+
+from src.utils.lazy import LazyClient, module_available
 
 logger = logging.getLogger(__name__)
 
+IN_FILTER_CHUNK_SIZE = 200  # ids per in_() filter; keeps PostgREST request URLs short
+BULK_WRITE_CHUNK_SIZE = 500  # rows per bulk upsert request
+
+# PostgREST embedded resource: workflow rows with their blocks (via fk_workflow) in one request
+WORKFLOW_WITH_BLOCKS_SELECT = "*, workflow_blocks(*)"
+
+def _chunks(items: List[Any], size: int) -> List[List[Any]]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def _parse_state(workflow: Dict[str, Any]) -> Dict[str, Any]:
+    """Decode a workflow row's state column when it is stored as a JSON string"""
+    if isinstance(workflow.get("state"), str):
+        try:
+            workflow["state"] = json.loads(workflow["state"])
+        except json.JSONDecodeError:
+            pass
+    return workflow
+
+def _embedded_blocks_to_workflow(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Rename the embedded workflow_blocks array to blocks"""
+    row["blocks"] = row.pop("workflow_blocks", None) or []
+    return _parse_state(row)
+
+class QueryExecutor:
+    """Bounded thread pool that runs blocking supabase-py calls off the event loop
+    
+    supabase-py's ``execute()`` is synchronous, so calling it inside a coroutine
+    stalls every other request for a full network round trip. Calls are handed
+    to a fixed-size thread pool instead, and a per-loop semaphore caps how many
+    calls may be queued or running at once so callers wait (backpressure)
+    rather than piling unbounded work onto the pool.
+    """
+    
+    def __init__(self, max_workers: int = 10, max_pending: int = 100):
+        self.max_workers = max_workers
+        self.max_pending = max(max_pending, max_workers)
+        self.in_flight = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="supabase-query"
+            )
+        return self._executor
+    
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_pending)
+            self._semaphores[loop] = semaphore
+        return semaphore
+    
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking callable in the pool, waiting for a slot if saturated"""
+        async with self._get_semaphore():
+            self.in_flight += 1
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._get_executor(), func, *args)
+            finally:
+                self.in_flight -= 1
+    
+    def stats(self) -> Dict[str, Any]:
+        """Current pool configuration and load"""
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "in_flight": self.in_flight
+        }
+    
+    def shutdown(self, wait: bool = True) -> None:
+        """Release pool threads (a new pool is created lazily on next use)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
 class DatabaseService:
     """Hybrid database service with Supabase integration and fallback"""
     
+    # Backends that can bulk load with COPY implement copy_upsert(table, rows)
+    supports_copy = False
+    
     def __init__(self):
         self.supabase_url = os.getenv("SUPABASE_URL")
         self.supabase_key = os.getenv("SUPABASE_SERVICE_KEY")
@@ -35,28 +123,12 @@ class DatabaseService:
         )
         
         if self.use_database:
-            logger.info("Attempting to initialize Supabase connection...")
-            try:
-                from supabase import create_client
-                # Validate that we have actual values before creating client
-                if not self.supabase_url or not self.supabase_key:
-                    raise ValueError("Supabase URL or Key is None/empty")
-                
-                # Additional validation to ensure values are not just whitespace
-                if not self.supabase_url.strip() or not self.supabase_key.strip():
-                    raise ValueError("Supabase URL or Key is empty/whitespace")
-                
-                logger.info(f"Creating Supabase client with URL: {self.supabase_url[:20]}...")
-                self.client = create_client(self.supabase_url, self.supabase_key)
-                logger.info("✅ Supabase connection established")
-            except ImportError as e:
-                logger.warning(f"❌ Supabase library not installed: {e}, using mock data")
-                self.use_database = False
-            except ValueError as e:
-                logger.warning(f"❌ Supabase configuration invalid: {e}, using mock data")
-                self.use_database = False
-            except Exception as e:
-                logger.warning(f"❌ Supabase connection failed: {e}, using mock data")
+            if module_available("supabase"):
+                # The client (and the supabase package) is built on the first query
+                self.client = LazyClient("Supabase", self._create_client, on_error=self._on_client_error)
+                logger.info("✅ Supabase configured (client created on first use)")
+            else:
+                logger.warning("❌ Supabase library not installed, using mock data")
                 self.use_database = False
         else:
             # Provide detailed information about why we're not using the database
@@ -69,9 +141,16 @@ class DatabaseService:
             else:
                 logger.info("🔄 Using mock database (Supabase credentials invalid)")
         
+        # Bounded executor for blocking supabase-py calls
+        self.query_executor = QueryExecutor(
+            max_workers=int(os.getenv("SUPABASE_MAX_WORKERS", "10")),
+            max_pending=int(os.getenv("SUPABASE_MAX_PENDING", "100"))
+        )
+        
         # Mock data storage
         self.mock_workflows = {}
         self.mock_blocks = {}
+        self.mock_validation_logs = []
         self._initialize_mock_data()
     
     def _initialize_mock_data(self):
@@ -160,11 +239,28 @@ class DatabaseService:
             }
         ]
     
+    def _create_client(self):
+        from supabase import create_client
+        logger.info(f"Creating Supabase client with URL: {self.supabase_url[:20]}...")
+        return create_client(self.supabase_url, self.supabase_key)
+    
+    def _on_client_error(self, error: Exception) -> None:
+        logger.warning(f"❌ Supabase connection failed: {error}, using mock data")
+        self.use_database = False
+    
+    async def run_query(self, query: Any) -> Any:
+        """Execute a supabase-py query builder without blocking the event loop"""
+        return await self.query_executor.run(query.execute)
+    
+    async def shutdown(self) -> None:
+        """Release the query executor threads"""
+        self.query_executor.shutdown(wait=False)
+    
     async def get_workflow(self, workflow_id: str) -> Optional[Dict[str, Any]]:
         """Get workflow by ID"""
         if self.use_database:
             try:
-                response = self.client.table("workflow").select("*").eq("id", workflow_id).execute()
+                response = await self.run_query(self.client.table("workflow").select("*").eq("id", workflow_id))
                 if response.data:
                     workflow = response.data[0]
                     # Parse state if it's a string
@@ -185,7 +281,7 @@ class DatabaseService:
         """Get blocks for a workflow"""
         if self.use_database:
             try:
-                response = self.client.table("workflow_blocks").select("*").eq("workflow_id", workflow_id).execute()
+                response = await self.run_query(self.client.table("workflow_blocks").select("*").eq("workflow_id", workflow_id))
                 return response.data or []
             except Exception as e:
                 logger.error(f"Database error: {e}")
@@ -193,13 +289,164 @@ class DatabaseService:
         else:
             return self.mock_blocks.get(workflow_id, [])
     
+    async def get_workflows(self, workflow_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get many workflows by ID with chunked in_() queries"""
+        if self.use_database:
+            try:
+                workflows = {}
+                for chunk in _chunks(list(dict.fromkeys(workflow_ids)), IN_FILTER_CHUNK_SIZE):
+                    response = await self.run_query(self.client.table("workflow").select("*").in_("id", chunk))
+                    for workflow in response.data or []:
+                        workflows[workflow["id"]] = _parse_state(workflow)
+                return workflows
+            except Exception as e:
+                logger.error(f"Database error: {e}")
+        return {wid: self.mock_workflows[wid] for wid in workflow_ids if wid in self.mock_workflows}
+    
+    async def get_blocks_for_workflows(self, workflow_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Get blocks for many workflows, grouped by workflow_id"""
+        blocks_by_workflow: Dict[str, List[Dict[str, Any]]] = {wid: [] for wid in workflow_ids}
+        if self.use_database:
+            try:
+                for chunk in _chunks(list(blocks_by_workflow), IN_FILTER_CHUNK_SIZE):
+                    response = await self.run_query(
+                        self.client.table("workflow_blocks").select("*").in_("workflow_id", chunk)
+                    )
+                    for block in response.data or []:
+                        blocks_by_workflow.setdefault(block["workflow_id"], []).append(block)
+                return blocks_by_workflow
+            except Exception as e:
+                logger.error(f"Database error: {e}")
+        for wid in blocks_by_workflow:
+            blocks_by_workflow[wid] = self.mock_blocks.get(wid, [])
+        return blocks_by_workflow
+    
+    async def update_workflow_states(self, states: Dict[str, Dict[str, Any]]) -> int:
+        """
+        Write many workflow states, one targeted UPDATE per workflow
+        
+        Only state and updated_at are written, so columns changed by other
+        writers since the rows were read are left alone. The updates run
+        concurrently; the query executor bounds how many are in flight.
+        """
+        now = datetime.utcnow().isoformat()
+        if self.use_database:
+            try:
+                written = 0
+                for chunk in _chunks(list(states.items()), BULK_WRITE_CHUNK_SIZE):
+                    responses = await asyncio.gather(*(
+                        self.run_query(self.client.table("workflow").update({
+                            "state": json.dumps(state) if isinstance(state, dict) else state,
+                            "updated_at": now
+                        }).eq("id", wid))
+                        for wid, state in chunk
+                    ))
+                    written += sum(1 for response in responses if response.data)
+                return written
+            except Exception as e:
+                logger.error(f"Database error: {e}")
+        written = 0
+        for wid, state in states.items():
+            if wid in self.mock_workflows:
+                self.mock_workflows[wid]["state"] = state
+                self.mock_workflows[wid]["updated_at"] = datetime.utcnow()
+                written += 1
+        return written
+    
+    async def iter_workflow_states(
+        self,
+        page_size: int = BULK_WRITE_CHUNK_SIZE,
+        after_id: Optional[str] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Stream every stored workflow's id, name and state in id order
+        
+        Keyset pagination (``id > last_seen_id ORDER BY id LIMIT page_size``)
+        keeps memory bounded by one page however many workflows are stored.
+        """
+        if self.use_database:
+            last_id = after_id
+            while True:
+                query = self.client.table("workflow").select("id, name, state")
+                if last_id is not None:
+                    query = query.gt("id", last_id)
+                try:
+                    response = await self.run_query(query.order("id").limit(page_size))
+                except Exception as e:
+                    logger.error(f"Database error: {e}")
+                    if last_id != after_id:
+                        # Pages already came from the database: raise rather than end the stream early
+                        raise
+                    break
+                page = [_parse_state(row) for row in response.data or []]
+                if not page:
+                    return
+                yield page
+                if len(page) < page_size:
+                    return
+                last_id = page[-1]["id"]
+        
+        rows = [
+            {"id": wid, "name": workflow.get("name"), "state": workflow.get("state")}
+            for wid, workflow in sorted(self.mock_workflows.items())
+            if after_id is None or wid > after_id
+        ]
+        for page in _chunks(rows, page_size):
+            yield page
+    
+    async def insert_validation_logs(self, rows: List[Dict[str, Any]]) -> int:
+        """Append validation_logs rows with one bulk insert per chunk; returns the rows actually written"""
+        if not rows:
+            return 0
+        if self.use_database:
+            written = 0
+            try:
+                for chunk in _chunks(rows, BULK_WRITE_CHUNK_SIZE):
+                    await self.run_query(self.client.table("validation_logs").insert(chunk))
+                    written += len(chunk)
+            except Exception as e:
+                logger.error(f"Database error: {e}")
+            return written
+        self.mock_validation_logs.extend(rows)
+        return len(rows)
+    
     async def get_workflow_with_blocks(self, workflow_id: str) -> Optional[Dict[str, Any]]:
-        """Get workflow with its blocks"""
-        workflow = await self.get_workflow(workflow_id)
+        """Get workflow with its blocks in a single query"""
+        if self.use_database:
+            try:
+                response = await self.run_query(
+                    self.client.table("workflow").select(WORKFLOW_WITH_BLOCKS_SELECT).eq("id", workflow_id)
+                )
+                if response.data:
+                    return _embedded_blocks_to_workflow(response.data[0])
+                return None
+            except Exception as e:
+                logger.error(f"Database error: {e}")
+        
+        workflow = self.mock_workflows.get(workflow_id)
         if workflow:
-            blocks = await self.get_workflow_blocks(workflow_id)
-            workflow["blocks"] = blocks
-        return workflow
+            return {**workflow, "blocks": self.mock_blocks.get(workflow_id, [])}
+        return None
+    
+    async def get_workflows_with_blocks(self, workflow_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get many workflows with their blocks: one embedded query per chunk of ids"""
+        if self.use_database:
+            try:
+                workflows = {}
+                for chunk in _chunks(list(dict.fromkeys(workflow_ids)), IN_FILTER_CHUNK_SIZE):
+                    response = await self.run_query(
+                        self.client.table("workflow").select(WORKFLOW_WITH_BLOCKS_SELECT).in_("id", chunk)
+                    )
+                    for row in response.data or []:
+                        workflows[row["id"]] = _embedded_blocks_to_workflow(row)
+                return workflows
+            except Exception as e:
+                logger.error(f"Database error: {e}")
+        
+        return {
+            wid: {**self.mock_workflows[wid], "blocks": self.mock_blocks.get(wid, [])}
+            for wid in workflow_ids if wid in self.mock_workflows
+        }
     
     async def create_workflow(self, workflow_data: Dict[str, Any]) -> Optional[str]:
         """Create a new workflow"""
@@ -221,7 +468,7 @@ class DatabaseService:
                     "updated_at": datetime.utcnow().isoformat()
                 })
                 
-                response = self.client.table("workflow").insert(db_data).execute()
+                response = await self.run_query(self.client.table("workflow").insert(db_data))
                 if response.data:
                     return workflow_id
                 return None
@@ -243,10 +490,10 @@ class DatabaseService:
         if self.use_database:
             try:
                 state_json = json.dumps(state) if isinstance(state, dict) else state
-                response = self.client.table("workflow").update({
+                response = await self.run_query(self.client.table("workflow").update({
                     "state": state_json,
                     "updated_at": datetime.utcnow().isoformat()
-                }).eq("id", workflow_id).execute()
+                }).eq("id", workflow_id))
                 return bool(response.data)
             except Exception as e:
                 logger.error(f"Database error: {e}")
@@ -280,7 +527,7 @@ class DatabaseService:
                     
                     db_blocks.append(db_block)
                 
-                response = self.client.table("workflow_blocks").insert(db_blocks).execute()
+                response = await self.run_query(self.client.table("workflow_blocks").insert(db_blocks))
                 return bool(response.data)
             except Exception as e:
                 logger.error(f"Database error: {e}")
@@ -302,7 +549,7 @@ class DatabaseService:
                     query = query.eq("user_id", user_id)
                     
                 query = query.limit(limit)
-                response = query.execute()
+                response = await self.run_query(query)
                 
                 workflows = response.data or []
                 
@@ -346,10 +593,10 @@ class DatabaseService:
         if self.use_database:
             try:
                 # Delete blocks first
-                self.client.table("workflow_blocks").delete().eq("workflow_id", workflow_id).execute()
+                await self.run_query(self.client.table("workflow_blocks").delete().eq("workflow_id", workflow_id))
                 
                 # Delete workflow
-                response = self.client.table("workflow").delete().eq("id", workflow_id).execute()
+                response = await self.run_query(self.client.table("workflow").delete().eq("id", workflow_id))
                 return bool(response.data)
             except Exception as e:
                 logger.error(f"Database error: {e}")
@@ -374,7 +621,7 @@ class DatabaseService:
         """Get total workflow count"""
         if self.use_database:
             try:
-                response = self.client.table("workflow").select("id", count="exact").execute()
+                response = await self.run_query(self.client.table("workflow").select("id", count="exact", head=True))
                 return response.count or 0
             except Exception as e:
                 logger.error(f"Database error: {e}")
@@ -386,9 +633,9 @@ class DatabaseService:
         """Search workflows by name or description"""
         if self.use_database:
             try:
-                response = self.client.table("workflow").select("*").or_(
+                response = await self.run_query(self.client.table("workflow").select("*").or_(
                     f"name.ilike.%{query}%,description.ilike.%{query}%"
-                ).limit(limit).execute()
+                ).limit(limit))
                 
                 workflows = response.data or []
                 
@@ -424,11 +671,12 @@ class DatabaseService:
         if self.use_database:
             try:
                 # Simple query to test connection
-                response = self.client.table("workflow").select("id").limit(1).execute()
+                response = await self.run_query(self.client.table("workflow").select("id").limit(1))
                 return {
                     "status": "healthy",
                     "database": "supabase",
                     "connected": True,
+                    "query_executor": self.query_executor.stats(),
                     "mock_workflows": len(self.mock_workflows)
                 }
             except Exception as e:
@@ -457,5 +705,18 @@ class DatabaseService:
                 "note": "Using mock data - set SUPABASE_URL and SUPABASE_SERVICE_KEY for database"
             }
 
+def create_database_service() -> DatabaseService:
+    """Build the configured backend: DATABASE_BACKEND=supabase (default) or sqlalchemy"""
+    backend = os.getenv("DATABASE_BACKEND", "supabase").strip().lower()
+    if backend == "sqlalchemy":
+        try:
+            from src.utils.database_sqlalchemy import SQLAlchemyDatabaseService
+            return SQLAlchemyDatabaseService()
+        except ImportError as e:
+            logger.warning(f"❌ SQLAlchemy backend unavailable: {e}, using Supabase/mock data")
+    elif backend != "supabase":
+        logger.warning(f"❌ Unknown DATABASE_BACKEND '{backend}', using Supabase/mock data")
+    return DatabaseService()
+
 # Global instance
-db_service = DatabaseService() 
\ No newline at end of file
+db_service = create_database_service()
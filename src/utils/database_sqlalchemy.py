@@ -0,0 +1,438 @@
+"""
+Database SQLAlchemy Utility
+DatabaseService-compatible repository on the async SQLAlchemy engine (asyncpg)
+"""
+import json
+import uuid
+import logging
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Any, List, Optional, AsyncIterator
+
+from sqlalchemy import JSON, DateTime, Numeric, bindparam, delete, func, or_, select, text, update
+from sqlalchemy.orm import selectinload
+
+from src.models.database import Workflow, WorkflowBlock
+from src.utils.database_hybrid import (
+    DatabaseService, IN_FILTER_CHUNK_SIZE, BULK_WRITE_CHUNK_SIZE, _chunks, _parse_state
+)
+
+logger = logging.getLogger(__name__)
+
+COPY_TABLES = {
+    "workflow": Workflow.__table__,
+    "workflow_blocks": WorkflowBlock.__table__
+}
+
+# Statements are built once and bound per call, so each one maps to a single
+# SQL string that asyncpg prepares once per connection and reuses.
+WORKFLOW_BY_ID = select(Workflow).where(Workflow.id == bindparam("workflow_id"))
+WORKFLOW_WITH_BLOCKS_BY_ID = WORKFLOW_BY_ID.options(selectinload(Workflow.blocks))
+WORKFLOWS_WITH_BLOCKS_BY_IDS = (
+    select(Workflow)
+    .where(Workflow.id.in_(bindparam("workflow_ids", expanding=True)))
+    .options(selectinload(Workflow.blocks))
+)
+WORKFLOWS_BY_IDS = select(Workflow).where(Workflow.id.in_(bindparam("workflow_ids", expanding=True)))
+BLOCKS_BY_WORKFLOW = select(WorkflowBlock).where(WorkflowBlock.workflow_id == bindparam("workflow_id"))
+BLOCKS_BY_WORKFLOWS = select(WorkflowBlock).where(
+    WorkflowBlock.workflow_id.in_(bindparam("workflow_ids", expanding=True))
+)
+WORKFLOW_STATES_PAGE = (
+    select(Workflow.id, Workflow.name, Workflow.state)
+    .where(Workflow.id > bindparam("after_id"))
+    .order_by(Workflow.id)
+    .limit(bindparam("page_size"))
+)
+UPDATE_WORKFLOW_STATE = (
+    update(Workflow.__table__)
+    .where(Workflow.__table__.c.id == bindparam("workflow_id"))
+    .values(state=bindparam("state"), updated_at=bindparam("updated_at"))
+)
+
+def _column_value(value: Any) -> Any:
+    return float(value) if isinstance(value, Decimal) else value
+
+def _model_to_dict(obj: Any) -> Dict[str, Any]:
+    """Plain dict of an ORM row's columns, in the shape supabase-py rows have"""
+    return {
+        column.key: _column_value(getattr(obj, column.key))
+        for column in obj.__table__.columns
+    }
+
+def _workflow_to_dict(workflow: Workflow, with_blocks: bool = False) -> Dict[str, Any]:
+    row = _parse_state(_model_to_dict(workflow))
+    if with_blocks:
+        row["blocks"] = [_model_to_dict(block) for block in workflow.blocks]
+    return row
+
+def _copy_value(column: Any, value: Any) -> Any:
+    """Coerce a prepared row value to what asyncpg's binary COPY codec expects"""
+    if value is None:
+        return None
+    if isinstance(column.type, DateTime) and isinstance(value, str):
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).replace(tzinfo=None)
+    if isinstance(column.type, JSON) and not isinstance(value, str):
+        return json.dumps(value, default=str)
+    if isinstance(column.type, Numeric) and isinstance(value, float):
+        return Decimal(str(value))
+    return value
+
+def _copy_records(table: Any, rows: List[Dict[str, Any]]) -> List[tuple]:
+    """Rows as tuples in table column order; missing keys become column defaults"""
+    records = []
+    for row in rows:
+        record = []
+        for column in table.columns:
+            value = row.get(column.key)
+            if value is None and column.default is not None and not column.nullable:
+                default = column.default.arg
+                value = default(None) if callable(default) else default
+            record.append(_copy_value(column, value))
+        records.append(tuple(record))
+    return records
+
+class SQLAlchemyDatabaseService(DatabaseService):
+    """
+    Workflow repository on the async SQLAlchemy engine
+
+    Workflow and block reads/writes go through a pooled asyncpg engine; blocks
+    are loaded with ``selectinload`` (one extra IN query for any number of
+    workflows). Everything else (the supabase client for lookup/metrics
+    tables, mock data, fallbacks) is inherited, so this is a drop-in
+    ``db_service``. Without an engine every call falls through to the parent.
+    """
+
+    supports_copy = True
+
+    def __init__(self, engine=None):
+        super().__init__()
+        if engine is None:
+            from src.models.connection import engine as configured_engine
+            engine = configured_engine
+        self.engine = engine
+        self.use_sqlalchemy = engine is not None
+        self.session_factory = None
+
+        if self.use_sqlalchemy:
+            from sqlalchemy.ext.asyncio import async_sessionmaker
+            self.session_factory = async_sessionmaker(engine, expire_on_commit=False)
+            logger.info("✅ SQLAlchemy repository using async engine")
+        else:
+            logger.warning("❌ DATABASE_URL not configured for SQLAlchemy backend, using Supabase/mock data")
+
+    async def shutdown(self) -> None:
+        """Release the query executor threads and the connection pool"""
+        await super().shutdown()
+        if self.engine is not None:
+            await self.engine.dispose()
+
+    async def get_workflow(self, workflow_id: str) -> Optional[Dict[str, Any]]:
+        """Get workflow by ID"""
+        if not self.use_sqlalchemy:
+            return await super().get_workflow(workflow_id)
+        try:
+            async with self.session_factory() as session:
+                workflow = (await session.execute(WORKFLOW_BY_ID, {"workflow_id": workflow_id})).scalar_one_or_none()
+                return _workflow_to_dict(workflow) if workflow else None
+        except Exception as e:
+            logger.error(f"Database error: {e}")
+            return self.mock_workflows.get(workflow_id)
+
+    async def get_workflow_blocks(self, workflow_id: str) -> List[Dict[str, Any]]:
+        """Get blocks for a workflow"""
+        if not self.use_sqlalchemy:
+            return await super().get_workflow_blocks(workflow_id)
+        try:
+            async with self.session_factory() as session:
+                blocks = (await session.execute(BLOCKS_BY_WORKFLOW, {"workflow_id": workflow_id})).scalars()
+                return [_model_to_dict(block) for block in blocks]
+        except Exception as e:
+            logger.error(f"Database error: {e}")
+            return self.mock_blocks.get(workflow_id, [])
+
+    async def get_workflows(self, workflow_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get many workflows by ID"""
+        if not self.use_sqlalchemy:
+            return await super().get_workflows(workflow_ids)
+        try:
+            workflows = {}
+            async with self.session_factory() as session:
+                for chunk in _chunks(list(dict.fromkeys(workflow_ids)), IN_FILTER_CHUNK_SIZE):
+                    for workflow in (await session.execute(WORKFLOWS_BY_IDS, {"workflow_ids": chunk})).scalars():
+                        workflows[workflow.id] = _workflow_to_dict(workflow)
+            return workflows
+        except Exception as e:
+            logger.error(f"Database error: {e}")
+            return {wid: self.mock_workflows[wid] for wid in workflow_ids if wid in self.mock_workflows}
+
+    async def get_blocks_for_workflows(self, workflow_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Get blocks for many workflows, grouped by workflow_id"""
+        if not self.use_sqlalchemy:
+            return await super().get_blocks_for_workflows(workflow_ids)
+        blocks_by_workflow: Dict[str, List[Dict[str, Any]]] = {wid: [] for wid in workflow_ids}
+        try:
+            async with self.session_factory() as session:
+                for chunk in _chunks(list(blocks_by_workflow), IN_FILTER_CHUNK_SIZE):
+                    for block in (await session.execute(BLOCKS_BY_WORKFLOWS, {"workflow_ids": chunk})).scalars():
+                        blocks_by_workflow.setdefault(block.workflow_id, []).append(_model_to_dict(block))
+            return blocks_by_workflow
+        except Exception as e:
+            logger.error(f"Database error: {e}")
+            return {wid: self.mock_blocks.get(wid, []) for wid in blocks_by_workflow}
+
+    async def get_workflow_with_blocks(self, workflow_id: str) -> Optional[Dict[str, Any]]:
+        """Get workflow with its blocks (selectinload)"""
+        if not self.use_sqlalchemy:
+            return await super().get_workflow_with_blocks(workflow_id)
+        try:
+            async with self.session_factory() as session:
+                workflow = (
+                    await session.execute(WORKFLOW_WITH_BLOCKS_BY_ID, {"workflow_id": workflow_id})
+                ).scalar_one_or_none()
+                return _workflow_to_dict(workflow, with_blocks=True) if workflow else None
+        except Exception as e:
+            logger.error(f"Database error: {e}")
+            workflow = self.mock_workflows.get(workflow_id)
+            return {**workflow, "blocks": self.mock_blocks.get(workflow_id, [])} if workflow else None
+
+    async def get_workflows_with_blocks(self, workflow_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get many workflows with their blocks: two queries per chunk of ids"""
+        if not self.use_sqlalchemy:
+            return await super().get_workflows_with_blocks(workflow_ids)
+        try:
+            workflows = {}
+            async with self.session_factory() as session:
+                for chunk in _chunks(list(dict.fromkeys(workflow_ids)), IN_FILTER_CHUNK_SIZE):
+                    result = await session.execute(WORKFLOWS_WITH_BLOCKS_BY_IDS, {"workflow_ids": chunk})
+                    for workflow in result.scalars():
+                        workflows[workflow.id] = _workflow_to_dict(workflow, with_blocks=True)
+            return workflows
+        except Exception as e:
+            logger.error(f"Database error: {e}")
+            return {
+                wid: {**self.mock_workflows[wid], "blocks": self.mock_blocks.get(wid, [])}
+                for wid in workflow_ids if wid in self.mock_workflows
+            }
+
+    async def iter_workflow_states(
+        self,
+        page_size: int = BULK_WRITE_CHUNK_SIZE,
+        after_id: Optional[str] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Stream workflow id, name and state in id order (keyset pages)"""
+        if not self.use_sqlalchemy:
+            async for page in super().iter_workflow_states(page_size, after_id):
+                yield page
+            return
+        last_id = after_id or ""
+        while True:
+            try:
+                async with self.session_factory() as session:
+                    result = await session.execute(WORKFLOW_STATES_PAGE, {"after_id": last_id, "page_size": page_size})
+                    page = [_parse_state(dict(row._mapping)) for row in result]
+            except Exception as e:
+                logger.error(f"Database error: {e}")
+                if last_id != (after_id or ""):
+                    raise
+                async for page in super().iter_workflow_states(page_size, after_id):
+                    yield page
+                return
+            if not page:
+                return
+            yield page
+            if len(page) < page_size:
+                return
+            last_id = page[-1]["id"]
+
+    async def update_workflow_state(self, workflow_id: str, state: Dict[str, Any]) -> bool:
+        """Update workflow state"""
+        if not self.use_sqlalchemy:
+            return await super().update_workflow_state(workflow_id, state)
+        return await self.update_workflow_states({workflow_id: state}) == 1
+
+    async def update_workflow_states(self, states: Dict[str, Dict[str, Any]]) -> int:
+        """Write many workflow states with one executemany UPDATE per chunk"""
+        if not self.use_sqlalchemy:
+            return await super().update_workflow_states(states)
+        now = datetime.utcnow()
+        params = [
+            {"workflow_id": wid, "state": json.loads(state) if isinstance(state, str) else state, "updated_at": now}
+            for wid, state in states.items()
+        ]
+        try:
+            written = 0
+            async with self.session_factory() as session:
+                for chunk in _chunks(params, BULK_WRITE_CHUNK_SIZE):
+                    result = await session.execute(UPDATE_WORKFLOW_STATE, chunk)
+                    # executemany may not report a row count
+                    written += result.rowcount if result.rowcount >= 0 else len(chunk)
+                await session.commit()
+            return written
+        except Exception as e:
+            logger.error(f"Database error: {e}")
+            written = 0
+            for wid, state in states.items():
+                if wid in self.mock_workflows:
+                    self.mock_workflows[wid]["state"] = state
+                    self.mock_workflows[wid]["updated_at"] = now
+                    written += 1
+            return written
+
+    async def create_workflow(self, workflow_data: Dict[str, Any]) -> Optional[str]:
+        """Create a new workflow"""
+        if not self.use_sqlalchemy:
+            return await super().create_workflow(workflow_data)
+        now = datetime.utcnow()
+        row = _parse_state({"created_at": now, "last_synced": now, **workflow_data, "updated_at": now})
+        row["id"] = workflow_data.get("id") or str(uuid.uuid4())
+        try:
+            columns = {column.key for column in Workflow.__table__.columns}
+            async with self.session_factory() as session:
+                session.add(Workflow(**{k: v for k, v in row.items() if k in columns}))
+                await session.commit()
+            return row["id"]
+        except Exception as e:
+            logger.error(f"Database error: {e}")
+            self.mock_workflows[row["id"]] = workflow_data
+            return row["id"]
+
+    async def create_workflow_blocks(self, workflow_id: str, blocks: List[Dict[str, Any]]) -> bool:
+        """Create blocks for a workflow"""
+        if not self.use_sqlalchemy:
+            return await super().create_workflow_blocks(workflow_id, blocks)
+        try:
+            columns = {column.key for column in WorkflowBlock.__table__.columns}
+            async with self.session_factory() as session:
+                session.add_all([
+                    WorkflowBlock(**{k: v for k, v in {**block, "workflow_id": workflow_id}.items() if k in columns})
+                    for block in blocks
+                ])
+                await session.commit()
+            return True
+        except Exception as e:
+            logger.error(f"Database error: {e}")
+            self.mock_blocks[workflow_id] = blocks
+            return True
+
+    async def list_workflows(self, user_id: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """List workflows from output tables (after CSV migration)"""
+        if not self.use_sqlalchemy:
+            return await super().list_workflows(user_id, limit)
+        try:
+            query = select(Workflow)
+            if user_id:
+                query = query.where(Workflow.user_id == user_id)
+            async with self.session_factory() as session:
+                workflows = (await session.execute(query.limit(limit))).scalars()
+                return [_workflow_to_dict(workflow) for workflow in workflows]
+        except Exception as e:
+            logger.error(f"Error listing workflows: {e}")
+            return []
+
+    async def delete_workflow(self, workflow_id: str) -> bool:
+        """Delete a workflow and its blocks in one transaction"""
+        if not self.use_sqlalchemy:
+            return await super().delete_workflow(workflow_id)
+        try:
+            async with self.session_factory() as session:
+                await session.execute(delete(WorkflowBlock).where(WorkflowBlock.workflow_id == workflow_id))
+                result = await session.execute(delete(Workflow).where(Workflow.id == workflow_id))
+                await session.commit()
+                return result.rowcount > 0
+        except Exception as e:
+            logger.error(f"Database error: {e}")
+            return False
+
+    async def get_workflow_count(self) -> int:
+        """Get total workflow count"""
+        if not self.use_sqlalchemy:
+            return await super().get_workflow_count()
+        try:
+            async with self.session_factory() as session:
+                return (await session.execute(select(func.count()).select_from(Workflow))).scalar_one()
+        except Exception as e:
+            logger.error(f"Database error: {e}")
+            return len(self.mock_workflows)
+
+    async def search_workflows(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Search workflows by name or description"""
+        if not self.use_sqlalchemy:
+            return await super().search_workflows(query, limit)
+        try:
+            pattern = f"%{query}%"
+            statement = select(Workflow).where(
+                or_(Workflow.name.ilike(pattern), Workflow.description.ilike(pattern))
+            ).limit(limit)
+            async with self.session_factory() as session:
+                return [_workflow_to_dict(workflow) for workflow in (await session.execute(statement)).scalars()]
+        except Exception as e:
+            logger.error(f"Database error: {e}")
+            query_lower = query.lower()
+            return [
+                w for w in self.mock_workflows.values()
+                if query_lower in w.get("name", "").lower() or
+                   query_lower in (w.get("description") or "").lower()
+            ][:limit]
+
+    async def copy_upsert(self, table_name: str, rows: List[Dict[str, Any]]) -> int:
+        """
+        Bulk load rows with COPY, then merge them into the table
+
+        Rows are streamed with asyncpg's binary ``copy_records_to_table`` into a
+        transaction-scoped staging table and merged with one
+        ``INSERT ... SELECT ... ON CONFLICT (id) DO UPDATE``, which keeps upsert
+        semantics at COPY speed.
+        """
+        if not rows:
+            return 0
+        table = COPY_TABLES[table_name]
+        columns = [column.key for column in table.columns]
+        staging = f"_copy_{table_name}"
+        column_list = ", ".join(columns)
+        assignments = ", ".join(f"{c} = EXCLUDED.{c}" for c in columns if c != "id")
+
+        async with self.engine.begin() as conn:
+            await conn.execute(text(
+                f"CREATE TEMP TABLE {staging} (LIKE {table_name} INCLUDING DEFAULTS) ON COMMIT DROP"
+            ))
+            raw = await conn.get_raw_connection()
+            await raw.driver_connection.copy_records_to_table(
+                staging, records=_copy_records(table, rows), columns=columns
+            )
+            result = await conn.execute(text(
+                f"INSERT INTO {table_name} ({column_list}) SELECT {column_list} FROM {staging} "
+                f"ON CONFLICT (id) DO UPDATE SET {assignments}"
+            ))
+        return result.rowcount
+
+    async def health_check(self) -> Dict[str, Any]:
+        """Check database health"""
+        if not self.use_sqlalchemy:
+            return await super().health_check()
+        pool = self.engine.pool
+        pool_stats = {
+            "size": pool.size() if hasattr(pool, "size") else None,
+            "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+            "overflow": pool.overflow() if hasattr(pool, "overflow") else None
+        }
+        try:
+            async with self.engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+            return {
+                "status": "healthy",
+                "database": "sqlalchemy",
+                "connected": True,
+                "pool": pool_stats,
+                "mock_workflows": len(self.mock_workflows)
+            }
+        except Exception as e:
+            return {
+                "status": "degraded",
+                "database": "sqlalchemy",
+                "connected": False,
+                "error": str(e),
+                "pool": pool_stats,
+                "fallback": "mock_data",
+                "mock_workflows": len(self.mock_workflows)
+            }
@@ -0,0 +1,70 @@
+"""
+Request deadlines
+A latency budget shared by every step of a request, with per-step timings
+"""
+import time
+import asyncio
+from typing import Any, Awaitable, Dict, List, Optional
+
+
+class Deadline:
+    """
+    Absolute deadline derived from a millisecond budget
+
+    ``run`` bounds a step by whatever budget is left (minus a reserve kept for
+    later, cheaper steps), records how long the step took and raises
+    ``asyncio.TimeoutError`` when it had to be abandoned.
+    """
+
+    def __init__(self, budget_ms: float):
+        self.budget_ms = budget_ms
+        self._started_at = time.monotonic()
+        self._expires_at = self._started_at + budget_ms / 1000
+        self.timings_ms: Dict[str, float] = {}
+        self.timed_out: List[str] = []
+
+    @classmethod
+    def from_budget(cls, budget_ms: Optional[float]) -> Optional["Deadline"]:
+        """A deadline for a positive budget, or None for unbounded requests"""
+        if budget_ms is None or budget_ms <= 0:
+            return None
+        return cls(budget_ms)
+
+    def remaining_ms(self) -> float:
+        return max(0.0, (self._expires_at - time.monotonic()) * 1000)
+
+    def elapsed_ms(self) -> float:
+        return (time.monotonic() - self._started_at) * 1000
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining_ms() <= 0
+
+    async def run(self, step: str, awaitable: Awaitable[Any], reserve_ms: float = 0.0) -> Any:
+        """Await ``awaitable`` within the remaining budget minus ``reserve_ms``"""
+        start = time.monotonic()
+        timeout = (self.remaining_ms() - reserve_ms) / 1000
+        try:
+            if timeout <= 0:
+                if asyncio.iscoroutine(awaitable):
+                    awaitable.close()
+                raise asyncio.TimeoutError()
+            return await asyncio.wait_for(awaitable, timeout)
+        except asyncio.TimeoutError:
+            self.timed_out.append(step)
+            raise
+        finally:
+            self.timings_ms[step] = round((time.monotonic() - start) * 1000, 2)
+
+    def record(self, step: str, started_at: float) -> None:
+        """Record a step that ran outside ``run`` (``started_at`` from time.monotonic())"""
+        self.timings_ms[step] = round((time.monotonic() - started_at) * 1000, 2)
+
+    def summary(self, served_by: str) -> Dict[str, Any]:
+        return {
+            "served_by": served_by,
+            "budget_ms": self.budget_ms,
+            "elapsed_ms": round(self.elapsed_ms(), 2),
+            "tier_timings_ms": dict(self.timings_ms),
+            "timed_out": list(self.timed_out)
+        }
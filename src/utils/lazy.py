@@ -0,0 +1,60 @@
+"""
+Lazy Loading Utility
+Defer heavy imports and client construction until first use, so cold starts
+(serverless, CLI, tests) only pay for what a request actually touches
+"""
+import importlib.util
+import logging
+import threading
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def module_available(name: str) -> bool:
+    """Whether a module can be imported, without importing it"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+class LazyClient:
+    """
+    Proxy that builds a client on first attribute access
+
+    ``factory`` does the import and construction. If it raises, ``on_error``
+    (when given) is told before the error propagates to the caller, so the
+    owning service can switch to its fallback path.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Any], on_error: Optional[Callable[[Exception], None]] = None):
+        self._name = name
+        self._factory = factory
+        self._on_error = on_error
+        self._client: Any = None
+        self._lock = threading.Lock()
+
+    @property
+    def created(self) -> bool:
+        return self._client is not None
+
+    def get(self) -> Any:
+        """The underlying client, constructed on first call"""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    try:
+                        self._client = self._factory()
+                        logger.info(f"✅ {self._name} client created")
+                    except Exception as e:
+                        if self._on_error:
+                            self._on_error(e)
+                        raise
+        return self._client
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self.get(), attr)
+
+    def __repr__(self) -> str:
+        return f"LazyClient({self._name!r}, created={self.created})"
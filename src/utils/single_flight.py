@@ -0,0 +1,63 @@
+"""
+Single-flight request coalescing
+Concurrent callers asking for the same key share one in-flight computation
+"""
+import copy
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Run at most one ``func()`` per key at a time
+
+    The first caller for a key starts the work as a task; callers arriving
+    while it runs await the same task and receive its result (or exception).
+    The task is shielded, so a caller that disconnects does not cancel the
+    work for everyone else. Followers get a deep copy of the result by
+    default so nobody can mutate another caller's response.
+    """
+
+    def __init__(self, name: str = "single_flight", copy_results: bool = True):
+        self.name = name
+        self.copy_results = copy_results
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Return ``await func()``, sharing the call with concurrent callers of ``key``"""
+        task = self._inflight.get(key)
+        leader = task is None
+        if leader:
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done, key=key: self._forget(key, done))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+            logger.info(f"🔗 Coalesced {self.name} request for {key}")
+
+        result = await asyncio.shield(task)
+        if leader or not self.copy_results:
+            return result
+        return copy.deepcopy(result)
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._inflight),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced
+        }
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved when every caller went away
@@ -0,0 +1,100 @@
+"""
+Streaming helpers
+Incremental extraction of workflow blocks from streamed model output, and
+Server-Sent Events / NDJSON framing for streaming endpoints
+"""
+import json
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# emit(event_name, payload) used by streaming generators
+EventCallback = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+STREAM_MEDIA_TYPES = {
+    "sse": "text/event-stream",
+    "ndjson": "application/x-ndjson"
+}
+
+
+class PartialBlockParser:
+    """
+    Yield entries of the top-level ``"blocks"`` object as soon as each closes
+
+    Text before the first ``{`` (model preamble) is skipped. Braces inside
+    JSON strings are ignored; everything else is a plain depth count, so the
+    cost is one pass over the text no matter how it is chunked.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._in_blocks = False
+        self._blocks_done = False
+        self._value_start: Optional[int] = None
+        self._value_key: Optional[str] = None
+        self.blocks: Dict[str, Any] = {}
+
+    def feed(self, text: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """Consume a chunk; return (block_id, block) pairs completed by it"""
+        self._buffer += text
+        buffer = self._buffer
+        completed = []
+
+        while self._pos < len(buffer):
+            ch = buffer[self._pos]
+            if not self._started:
+                if ch == "{":
+                    self._started = True
+                    self._depth = 1
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._last_string = buffer[self._string_start + 1:self._pos]
+            elif ch == '"':
+                self._in_string = True
+                self._string_start = self._pos
+            elif ch == "{":
+                self._depth += 1
+                if not self._in_blocks and not self._blocks_done and self._depth == 2 and self._last_string == "blocks":
+                    self._in_blocks = True
+                elif self._in_blocks and self._depth == 3:
+                    self._value_start = self._pos
+                    self._value_key = self._last_string
+            elif ch == "}":
+                if self._in_blocks and self._depth == 3 and self._value_start is not None:
+                    block = self._parse(buffer[self._value_start:self._pos + 1])
+                    if block is not None and self._value_key:
+                        self.blocks[self._value_key] = block
+                        completed.append((self._value_key, block))
+                    self._value_start = None
+                elif self._in_blocks and self._depth == 2:
+                    self._in_blocks = False
+                    self._blocks_done = True
+                self._depth -= 1
+            self._pos += 1
+
+        return completed
+
+    @staticmethod
+    def _parse(text: str) -> Optional[Dict[str, Any]]:
+        try:
+            value = json.loads(text)
+        except ValueError:
+            return None
+        return value if isinstance(value, dict) else None
+
+
+def format_stream_event(event: str, data: Dict[str, Any], fmt: str = "sse") -> str:
+    """Frame one event as an SSE message or an NDJSON line"""
+    if fmt == "ndjson":
+        return json.dumps({"event": event, "data": data}, default=str) + "\n"
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
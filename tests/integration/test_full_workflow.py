@@ -215,11 +215,9 @@ class TestAgentForgeIntegration:
     async def test_workflow_state_retrieval(self, client, sample_workflow_data, sample_blocks_data):
         """Test workflow state retrieval endpoint"""
         
-        with patch.object(db_service, 'get_workflow', new_callable=AsyncMock) as mock_get_workflow, \
-             patch.object(db_service, 'get_workflow_blocks', new_callable=AsyncMock) as mock_get_blocks:
+        with patch.object(db_service, 'get_workflow_with_blocks', new_callable=AsyncMock) as mock_get_workflow:
             
-            mock_get_workflow.return_value = sample_workflow_data
-            mock_get_blocks.return_value = sample_blocks_data
+            mock_get_workflow.return_value = {**sample_workflow_data, "blocks": sample_blocks_data}
             
             response = client.get("/api/workflows/integration-test-workflow/state")
             
@@ -314,11 +312,9 @@ class TestAgentForgeIntegration:
     async def test_concurrent_requests_handling(self, client, sample_workflow_data, sample_blocks_data):
         """Test handling of concurrent requests"""
         
-        with patch.object(db_service, 'get_workflow', new_callable=AsyncMock) as mock_get_workflow, \
-             patch.object(db_service, 'get_workflow_blocks', new_callable=AsyncMock) as mock_get_blocks:
+        with patch.object(db_service, 'get_workflow_with_blocks', new_callable=AsyncMock) as mock_get_workflow:
             
-            mock_get_workflow.return_value = sample_workflow_data
-            mock_get_blocks.return_value = sample_blocks_data
+            mock_get_workflow.return_value = {**sample_workflow_data, "blocks": sample_blocks_data}
             
             # Simulate concurrent requests
             async def make_request():
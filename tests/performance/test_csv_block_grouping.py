@@ -0,0 +1,71 @@
+"""
+Benchmarks for block grouping in the CSV migration hot loop.
+
+The migration used to find each workflow's blocks by scanning every block
+row, which is O(workflows x blocks). The pre-grouped index is built once in
+O(blocks) and each workflow lookup is O(1), so total cost should grow
+linearly from 1k to 1M block rows.
+
+Run with: make test-performance  (or pytest tests/performance --benchmark-only)
+"""
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from src.services.csv_processor import CSVProcessor
+
+BLOCKS_PER_WORKFLOW = 5
+
+
+def make_rows(block_count):
+    workflow_ids = [f"wf-{i}" for i in range(block_count // BLOCKS_PER_WORKFLOW)]
+    block_rows = [
+        {"id": f"block-{i}", "workflow_id": workflow_ids[i % len(workflow_ids)], "type": "agent"}
+        for i in range(block_count)
+    ]
+    return workflow_ids, block_rows
+
+
+def grouped_lookup(processor, workflow_ids, block_rows):
+    blocks_by_workflow = processor._group_blocks_by_workflow(block_rows)
+    return sum(len(blocks_by_workflow.get(workflow_id, [])) for workflow_id in workflow_ids)
+
+
+def linear_scan_lookup(workflow_ids, block_rows):
+    return sum(
+        len([block for block in block_rows if block["workflow_id"] == workflow_id])
+        for workflow_id in workflow_ids
+    )
+
+
+@pytest.mark.performance
+@pytest.mark.parametrize("block_count", [
+    1_000,
+    10_000,
+    100_000,
+    pytest.param(1_000_000, marks=pytest.mark.slow),
+])
+def test_grouped_block_lookup_scaling(benchmark, block_count):
+    """Index build plus one lookup per workflow, 1k to 1M block rows."""
+    processor = CSVProcessor()
+    workflow_ids, block_rows = make_rows(block_count)
+
+    total = benchmark.pedantic(
+        grouped_lookup, args=(processor, workflow_ids, block_rows), rounds=3, iterations=1
+    )
+
+    assert total == block_count
+
+
+@pytest.mark.performance
+@pytest.mark.parametrize("block_count", [1_000, 10_000])
+def test_linear_scan_baseline(benchmark, block_count):
+    """Previous per-workflow scan, for comparison (quadratic, small sizes only)."""
+    workflow_ids, block_rows = make_rows(block_count)
+
+    total = benchmark.pedantic(
+        linear_scan_lookup, args=(workflow_ids, block_rows), rounds=1, iterations=1
+    )
+
+    assert total == block_count
@@ -0,0 +1,139 @@
+"""
+Benchmarks for the compiled validation engine.
+
+The original per-validator path (frozen in tests/fixtures/baseline_validator.py)
+re-walks blocks and edges in every validator, and its connectivity check scans
+all edges once per starter block, so it grows quadratically with workflow
+size. The compiled engine indexes the state in one pass and every rule reads
+from that index.
+
+Run with: make test-performance  (or pytest tests/performance --benchmark-only)
+"""
+
+import asyncio
+import random
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from src.services.validation import WorkflowValidator
+from tests.fixtures.baseline_validator import WorkflowValidator as BaselineValidator
+
+BLOCK_TYPES = ["starter", "agent", "api", "output", "tool"]
+SUB_BLOCKS = {
+    "starter": {"startWorkflow": "manual"},
+    "agent": {"model": "gpt-4", "systemPrompt": "Summarise the incoming data", "temperature": 0.3},
+    "api": {"url": "https://api.example.com", "method": "POST", "headers": {"Authorization": "key"}},
+    "output": {"outputType": "json"},
+    "tool": {"toolType": "http"}
+}
+
+
+def make_state(block_count, seed=0):
+    rng = random.Random(seed)
+    blocks = {}
+    for i in range(block_count):
+        block_type = BLOCK_TYPES[i % len(BLOCK_TYPES)]
+        blocks[f"block-{i}"] = {
+            "id": f"block-{i}",
+            "type": block_type,
+            "name": f"Block {i}",
+            "position_x": rng.randint(0, 2000),
+            "position_y": rng.randint(0, 1500),
+            "sub_blocks": dict(SUB_BLOCKS[block_type])
+        }
+    ids = list(blocks)
+    edges = [{"from": ids[i], "to": ids[rng.randrange(block_count)]} for i in range(block_count)]
+    return {"blocks": blocks, "edges": edges, "subflows": {}, "variables": {},
+            "metadata": {"version": "1.0.0", "createdAt": "2024-01-04T10:00:00Z"}}
+
+
+def make_dag(block_count, seed=0):
+    """make_state with every edge pointing to a later block, so the graph is acyclic"""
+    state = make_state(block_count, seed)
+    rng = random.Random(seed)
+    ids = list(state["blocks"])
+    state["edges"] = [{"from": ids[i], "to": ids[rng.randrange(i + 1, block_count)]} for i in range(block_count - 1)]
+    return state
+
+
+def validate(validator, state):
+    return asyncio.run(validator.validate_state(state, "bench"))
+
+
+@pytest.mark.performance
+@pytest.mark.parametrize("block_count", [1_000, 10_000])
+def test_compiled_validation(benchmark, block_count):
+    """Single-pass index plus rule set on 1k and 10k block states."""
+    validator = WorkflowValidator()
+    validator.report_cache = None
+    state = make_state(block_count)
+
+    report = benchmark.pedantic(validate, args=(validator, state), rounds=5, iterations=1)
+
+    assert report.summary["block_count"] == block_count
+
+
+@pytest.mark.performance
+@pytest.mark.parametrize("block_count", [1_000, 10_000])
+def test_per_validator_baseline(benchmark, block_count):
+    """Original per-validator WorkflowValidator on the same states, for comparison."""
+    validator = BaselineValidator()
+    state = make_state(block_count)
+
+    report = benchmark.pedantic(validate, args=(validator, state), rounds=1, iterations=1)
+
+    assert report.summary["block_count"] == block_count
+
+
+@pytest.mark.performance
+@pytest.mark.parametrize("block_count", [1_000, 10_000])
+def test_incremental_block_edit(benchmark, block_count):
+    """One changed block re-validated from the previous report's snapshot."""
+    validator = WorkflowValidator()
+    state = make_state(block_count)
+    previous = asyncio.run(validator.validate_diff(validate(validator, state), {}))
+    block = dict(state["blocks"]["block-1"], name="Renamed agent")
+
+    report = benchmark.pedantic(
+        lambda: asyncio.run(validator.validate_diff(previous, {"changed_blocks": {"block-1": block}})),
+        rounds=20, iterations=1
+    )
+
+    assert report.summary["block_count"] == block_count
+
+
+@pytest.mark.performance
+@pytest.mark.parametrize("block_count", [1_000, 10_000])
+def test_incremental_edge_edit(benchmark, block_count):
+    """One edge moved in an acyclic graph: ranks, reachability and dead ends updated in place."""
+    validator = WorkflowValidator()
+    state = make_dag(block_count)
+    previous = asyncio.run(validator.validate_diff(validate(validator, state), {}))
+    previous = asyncio.run(validator.validate_diff(previous, {}))
+    edge = state["edges"][block_count // 2]
+    # Rewired back to an earlier block, so the topological ranks have to move
+    diff = {"removed_edges": [edge], "added_edges": [{"from": edge["from"], "to": "block-1"}]}
+
+    report = benchmark.pedantic(
+        lambda: asyncio.run(validator.validate_diff(previous, diff)),
+        rounds=20, iterations=1
+    )
+
+    assert report.summary["block_count"] == block_count
+    assert not report.validation_results[5].metadata["graph"]["has_cycles"]
+
+
+@pytest.mark.performance
+@pytest.mark.parametrize("block_count", [1_000, 10_000])
+def test_cached_revalidation(benchmark, block_count):
+    """Identical state (new updatedAt) served from the report cache: hash the state, no rules run."""
+    validator = WorkflowValidator()
+    state = make_state(block_count)
+    validate(validator, state)
+    state["metadata"]["updatedAt"] = "2024-01-05T10:00:00Z"
+
+    report = benchmark.pedantic(validate, args=(validator, state), rounds=20, iterations=1)
+
+    assert report.summary["block_count"] == block_count
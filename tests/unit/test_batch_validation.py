@@ -0,0 +1,137 @@
+"""
+Unit tests for batch validation over stored workflows
+"""
+import pytest
+import copy
+import json
+import sys
+import os
+from unittest.mock import AsyncMock
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.services.batch_validation import BatchValidator, validation_log_rows
+from src.utils.database_hybrid import DatabaseService
+
+
+def make_db() -> DatabaseService:
+    """Mock database holding one compliant, one non-compliant and two unusable workflows."""
+    db = DatabaseService()
+    sample = db.mock_workflows["sample-workflow-123"]
+    broken_state = copy.deepcopy(sample["state"])
+    broken_state["blocks"] = {
+        key: block for key, block in broken_state["blocks"].items() if block["type"] != "starter"
+    }
+    db.mock_workflows.update({
+        "wf-broken": {**sample, "id": "wf-broken", "state": json.dumps(broken_state)},
+        "wf-empty": {**sample, "id": "wf-empty", "state": None},
+        "wf-garbled": {**sample, "id": "wf-garbled", "state": "{not json"}
+    })
+    return db
+
+
+class TestBatchValidator:
+    """Test suite for BatchValidator.validate_all."""
+
+    @pytest.fixture(autouse=True)
+    def setup_batch_validator(self):
+        self.batch_validator = BatchValidator()
+        self.batch_validator.db = make_db()
+
+    @pytest.mark.unit
+    @pytest.mark.validation
+    async def test_compliance_report_aggregates_every_workflow(self):
+        """Pages are streamed and every stored workflow lands in the report."""
+        progress = AsyncMock()
+
+        report = await self.batch_validator.validate_all(page_size=2, use_process_pool=False, progress=progress)
+
+        assert report["status"] == "success"
+        assert report["workflows_validated"] == 2
+        assert report["compliant_count"] == 1
+        assert report["non_compliant_workflows"] == ["wf-broken"]
+        assert {f["workflow_id"]: f["error"] for f in report["failed_workflows"]} == {
+            "wf-empty": "Workflow has no state",
+            "wf-garbled": "Invalid state format"
+        }
+        assert report["validators"]["validate_starter_blocks"] == {"passed": 1, "failed": 1, "errors": 1, "warnings": 0}
+        assert report["top_errors"][0]["validator"] == "validate_starter_blocks"
+        assert [c.args for c in progress.await_args_list] == [(2, 4), (4, 4)]
+
+    @pytest.mark.unit
+    @pytest.mark.validation
+    async def test_validation_logs_are_written_in_batches(self):
+        """Rows are buffered and flushed once the batch size is reached, not per workflow."""
+        db = self.batch_validator.db
+        db.insert_validation_logs = AsyncMock(side_effect=lambda rows: len(rows))
+
+        report = await self.batch_validator.validate_all(page_size=1, use_process_pool=False, log_batch_size=15)
+
+        batches = [len(c.args[0]) for c in db.insert_validation_logs.await_args_list]
+        assert batches == [20]
+        assert report["validation_logs_written"] == 20
+
+    @pytest.mark.unit
+    @pytest.mark.validation
+    async def test_stream_errors_and_unwritten_logs_are_reported(self):
+        """A stream cut short marks the report incomplete, and unwritten log rows count as failed."""
+        db = self.batch_validator.db
+        stream = db.iter_workflow_states
+
+        async def broken_stream(page_size):
+            async for page in stream(page_size):
+                yield page
+                raise ConnectionError("connection reset")
+
+        db.iter_workflow_states = broken_stream
+        db.insert_validation_logs = AsyncMock(return_value=4)
+
+        report = await self.batch_validator.validate_all(page_size=2, use_process_pool=False)
+
+        assert report["status"] == "incomplete"
+        assert report["error"] == "connection reset"
+        assert report["workflows_expected"] == 4
+        assert report["validation_logs_written"] == 4
+        assert report["validation_logs_failed"] == 16
+
+    @pytest.mark.unit
+    @pytest.mark.validation
+    async def test_process_pool_matches_inline(self):
+        """Validating on worker processes produces the same report."""
+        volatile = ("throughput", "timestamp", "validation", "workers")
+
+        inline = await self.batch_validator.validate_all(use_process_pool=False, write_logs=False)
+        pooled = await self.batch_validator.validate_all(workers=2, use_process_pool=True, write_logs=False)
+
+        assert pooled["validation"] == "process_pool"
+        assert {k: v for k, v in pooled.items() if k not in volatile} == \
+               {k: v for k, v in inline.items() if k not in volatile}
+
+    @pytest.mark.unit
+    @pytest.mark.validation
+    def test_log_rows_cover_each_validator_and_compliance(self):
+        """One row per validator plus an overall compliance row with a 0-100 score."""
+        outcome = {
+            "workflow_id": "wf-1",
+            "execution_time_ms": 3,
+            "report": {
+                "agent_forge_compliance": False,
+                "validation_results": [
+                    {"validator_name": "validate_schema", "valid": True, "errors": [], "warnings": []},
+                    {"validator_name": "_validate_starter_blocks", "valid": False,
+                     "errors": ["Validator error: boom"], "warnings": []}
+                ],
+                "summary": {"passed_validators": 1, "total_validators": 2}
+            }
+        }
+
+        rows = validation_log_rows(outcome)
+
+        assert [(r["validation_type"], r["validator_name"], r["passed"]) for r in rows] == [
+            ("schema", "validate_schema", True),
+            ("business_rules", "validate_starter_blocks", False),
+            ("compliance", "agent_forge_compliance", False)
+        ]
+        assert rows[-1]["score"] == 50.0
+        assert rows[-1]["error_details"] == ["validate_starter_blocks"]
+        assert all(set(r) == set(rows[0]) for r in rows)
@@ -0,0 +1,363 @@
+"""
+Tests for the CSV migration processor.
+
+Covers the batched bulk migration mode: set-difference duplicate checks,
+batch sizing, checkpoint persistence and resume, plus keyset-paginated reads
+and concurrency-limited migration workers.
+"""
+
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.services.csv_processor import CSVProcessor
+from src.utils.database_hybrid import DatabaseService
+
+
+def make_workflow_rows(count):
+    return [
+        {
+            "id": f"wf-{i:04d}",
+            "user_id": "user-1",
+            "name": f"workflow-{i}",
+            "description": "bulk test",
+            "variables": {},
+        }
+        for i in range(count)
+    ]
+
+
+def make_block_rows(workflow_rows, blocks_per_workflow=2):
+    return [
+        {
+            "id": f"{row['id']}-block-{j}",
+            "workflow_id": row["id"],
+            "type": "starter" if j == 0 else "agent",
+            "name": f"Block {j}",
+            "position_x": 100 * j,
+            "position_y": 100,
+            "sub_blocks": {},
+            "outputs": {},
+        }
+        for row in workflow_rows
+        for j in range(blocks_per_workflow)
+    ]
+
+
+class TestBulkMigration:
+    """Test suite for CSVProcessor.process_workflows_bulk."""
+
+    @pytest.fixture(autouse=True)
+    def setup_processor(self, tmp_path):
+        """Fresh processor backed by an empty mock database."""
+        with patch.dict("os.environ", {"SUPABASE_URL": "", "SUPABASE_SERVICE_KEY": ""}):
+            db = DatabaseService()
+        db.mock_workflows.clear()
+        db.mock_blocks.clear()
+
+        self.processor = CSVProcessor()
+        self.processor.db = db
+        self.processor.checkpoint_path = str(tmp_path / "checkpoint.json")
+
+        self.workflow_rows = make_workflow_rows(7)
+        self.block_rows = make_block_rows(self.workflow_rows)
+        self.processor._get_mock_workflow_rows = MagicMock(return_value=self.workflow_rows)
+        self.processor._get_mock_workflow_blocks_rows = MagicMock(return_value=self.block_rows)
+
+    @pytest.mark.unit
+    async def test_bulk_migration_writes_all_rows_in_batches(self):
+        """Every workflow and block is written, one upsert per batch."""
+        with patch.object(self.processor, "_bulk_upsert_workflows", wraps=self.processor._bulk_upsert_workflows) as upsert:
+            result = await self.processor.process_workflows_bulk(batch_size=3)
+
+        assert result["status"] == "success"
+        assert result["processed_count"] == 7
+        assert result["blocks_written"] == 14
+        assert upsert.await_count == 3  # 3 + 3 + 1
+        assert len(self.processor.db.mock_workflows) == 7
+        assert result["throughput"]["rows_written"] == 21
+        assert result["throughput"]["rows_per_second"] > 0
+
+    @pytest.mark.unit
+    async def test_existing_workflows_are_skipped_via_set_difference(self):
+        """Workflows already in the output tables are not rewritten."""
+        existing = self.workflow_rows[0]
+        self.processor.db.mock_workflows[existing["id"]] = {"id": existing["id"]}
+
+        result = await self.processor.process_workflows_bulk(batch_size=10)
+
+        assert result["processed_count"] == 6
+        assert result["skipped_count"] == 1
+        assert self.processor.db.mock_workflows[existing["id"]] == {"id": existing["id"]}
+
+    @pytest.mark.unit
+    async def test_interrupted_migration_resumes_from_checkpoint(self):
+        """A failure mid-run leaves a checkpoint the next run continues from."""
+        original_upsert = self.processor._bulk_upsert_workflows
+        calls = {"count": 0}
+
+        async def failing_upsert(workflows):
+            calls["count"] += 1
+            if calls["count"] == 2:
+                raise RuntimeError("connection reset")
+            await original_upsert(workflows)
+
+        self.processor._bulk_upsert_workflows = failing_upsert
+        failed = await self.processor.process_workflows_bulk(batch_size=3)
+
+        assert failed["status"] == "error"
+        assert failed["checkpoint"]["last_workflow_id"] == "wf-0002"
+        assert failed["checkpoint"]["batches_completed"] == 1
+
+        self.processor._bulk_upsert_workflows = original_upsert
+        resumed = await self.processor.process_workflows_bulk(batch_size=3)
+
+        assert resumed["status"] == "success"
+        assert resumed["resumed_from"] == "wf-0002"
+        assert resumed["processed_count"] == 4
+        assert resumed["checkpoint"]["workflows_written"] == 7
+        assert len(self.processor.db.mock_workflows) == 7
+
+    @pytest.mark.unit
+    async def test_completed_checkpoint_short_circuits(self):
+        """A completed bulk migration is not rerun unless forced."""
+        await self.processor.process_workflows_bulk(batch_size=5)
+
+        again = await self.processor.process_workflows_bulk(batch_size=5)
+        forced = await self.processor.process_workflows_bulk(batch_size=5, force_reprocess=True)
+
+        assert again["status"] == "already_processed"
+        assert forced["status"] == "success"
+        assert forced["processed_count"] == 7
+
+
+
+class TestParallelMigration:
+    """Test suite for the concurrent migration worker pool."""
+
+    @pytest.fixture(autouse=True)
+    def setup_processor(self, tmp_path):
+        """Fresh processor backed by an empty mock database."""
+        with patch.dict("os.environ", {"SUPABASE_URL": "", "SUPABASE_SERVICE_KEY": ""}):
+            db = DatabaseService()
+        db.mock_workflows.clear()
+        db.mock_blocks.clear()
+
+        self.processor = CSVProcessor()
+        self.processor.db = db
+        self.processor.checkpoint_path = str(tmp_path / "checkpoint.json")
+
+        self.workflow_rows = make_workflow_rows(12)
+        self.block_rows = make_block_rows(self.workflow_rows, blocks_per_workflow=3)
+        self.processor._get_mock_workflow_rows = MagicMock(return_value=self.workflow_rows)
+        self.processor._get_mock_workflow_blocks_rows = MagicMock(return_value=self.block_rows)
+
+    @pytest.mark.unit
+    async def test_workers_run_concurrently_up_to_limit(self):
+        """At most `workers` workflows are in flight, each writing workflow then blocks."""
+        state = {"active": 0, "peak": 0}
+        events = []
+
+        async def slow_store(workflow_data, workflow_blocks, force_reprocess=False):
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+            events.append(("workflow", workflow_data["id"]))
+            await asyncio.sleep(0.01)
+            events.append(("blocks", workflow_data["id"]))
+            state["active"] -= 1
+            return workflow_data
+
+        self.processor._store_workflow_with_duplicate_check = slow_store
+        result = await self.processor.process_workflows_from_csv(force_reprocess=True, workers=4)
+
+        assert result["processed_count"] == 12
+        assert result["workers"] == 4
+        assert 1 < state["peak"] <= 4
+        assert [w["id"] for w in result["processed_workflows"]] == [row["id"] for row in self.workflow_rows]
+        for workflow_id in (row["id"] for row in self.workflow_rows):
+            assert events.index(("workflow", workflow_id)) < events.index(("blocks", workflow_id))
+
+    @pytest.mark.unit
+    async def test_store_relies_on_the_batch_duplicate_check(self):
+        """Database writes insert directly; existence was already checked for the whole batch."""
+        db = self.processor.db
+        db.use_database = True
+        db.client = MagicMock()
+        db.run_query = AsyncMock(return_value=MagicMock(data=[{"id": "wf-0000"}]))
+        self.processor.processed_block_ids = set()
+        workflow_row = self.workflow_rows[0]
+        blocks = [block for block in self.block_rows if block["workflow_id"] == workflow_row["id"]]
+        workflow_data = self.processor._create_workflow_data(
+            workflow_row, self.processor._generate_state_json(workflow_row, blocks)
+        )
+
+        stored = await self.processor._store_workflow_with_duplicate_check(workflow_data, blocks)
+
+        assert stored is workflow_data
+        table = db.client.table.return_value
+        table.select.assert_not_called()
+        table.insert.assert_called()
+        assert db.run_query.await_count == 2  # workflow row, then its blocks
+
+    @pytest.mark.unit
+    async def test_default_migration_streams_batches(self):
+        """The non-bulk path reads input one keyset batch at a time, not as whole tables."""
+        batch_sizes = []
+        iter_batches = self.processor.iter_workflow_batches
+
+        async def recording_batches(batch_size, after_id=None):
+            async for batch, blocks_by_workflow in iter_batches(batch_size, after_id):
+                batch_sizes.append(len(batch))
+                yield batch, blocks_by_workflow
+
+        self.processor.iter_workflow_batches = recording_batches
+        with patch("src.services.csv_processor.DEFAULT_BATCH_SIZE", 5):
+            result = await self.processor.process_workflows_from_csv(workers=2)
+
+        assert batch_sizes == [5, 5, 2]
+        assert result["processed_count"] == 12
+        assert result["total_input_workflows"] == 12
+        assert len(self.processor.db.mock_blocks["wf-0011"]) == 3
+
+    @pytest.mark.unit
+    async def test_process_pool_builds_same_states(self):
+        """State JSON built on worker processes matches the inline build."""
+        result = await self.processor.process_workflows_bulk(batch_size=5, workers=2, use_process_pool=True)
+
+        assert result["status"] == "success"
+        assert result["state_generation"] == "process_pool"
+        assert result["processed_count"] == 12
+        stored = self.processor.db.mock_workflows["wf-0003"]["state"]
+        expected = self.processor._generate_state_json(
+            self.workflow_rows[3], self.block_rows[9:12]
+        )
+        assert stored["blocks"] == expected["blocks"]
+        assert stored["edges"] == expected["edges"]
+
+class TestBlockGrouping:
+    """Test suite for the workflow_id -> blocks index."""
+
+    @pytest.mark.unit
+    def test_group_blocks_by_workflow_preserves_row_order(self):
+        """Blocks are bucketed per workflow in their original order."""
+        rows = make_workflow_rows(3)
+        blocks = make_block_rows(rows, blocks_per_workflow=3)
+
+        grouped = CSVProcessor()._group_blocks_by_workflow(list(reversed(blocks)))
+
+        assert set(grouped) == {row["id"] for row in rows}
+        assert [b["id"] for b in grouped["wf-0001"]] == [
+            "wf-0001-block-2", "wf-0001-block-1", "wf-0001-block-0"
+        ]
+        assert grouped.get("missing", []) == []
+
+
+class FakeQuery:
+    """Minimal PostgREST query builder over an in-memory table."""
+
+    def __init__(self, rows, log):
+        self.rows = rows
+        self.log = log
+        self.filters = []
+        self.page_limit = None
+        self.count_mode = None
+        self.head = False
+
+    def select(self, columns, count=None, head=False):
+        self.count_mode = count
+        self.head = head
+        return self
+
+    def in_(self, column, values):
+        self.log.append(("in", len(values)))
+        self.filters.append(lambda row: row[column] in set(values))
+        return self
+
+    def gt(self, column, value):
+        self.log.append(("gt", value))
+        self.filters.append(lambda row: row[column] > value)
+        return self
+
+    def order(self, column):
+        return self
+
+    def limit(self, size):
+        self.page_limit = size
+        return self
+
+    def execute(self):
+        rows = sorted(
+            (row for row in self.rows if all(f(row) for f in self.filters)),
+            key=lambda row: row["id"],
+        )
+        if self.page_limit is not None:
+            rows = rows[:self.page_limit]
+        return MagicMock(
+            data=None if self.head else rows,
+            count=len(rows) if self.count_mode else None,
+        )
+
+
+class TestPaginatedReads:
+    """Test suite for keyset-paginated streaming of CSV input tables."""
+
+    @pytest.fixture(autouse=True)
+    def setup_processor(self):
+        """Processor whose database client serves in-memory tables."""
+        self.workflow_rows = make_workflow_rows(5)
+        self.tables = {
+            "workflow_rows": self.workflow_rows,
+            "workflow_blocks_rows": make_block_rows(self.workflow_rows),
+        }
+        self.log = []
+
+        with patch.dict("os.environ", {"SUPABASE_URL": "", "SUPABASE_SERVICE_KEY": ""}):
+            db = DatabaseService()
+        db.use_database = True
+        db.client = MagicMock()
+        db.client.table.side_effect = lambda name: FakeQuery(self.tables[name], self.log)
+
+        self.processor = CSVProcessor()
+        self.processor.db = db
+
+    @pytest.mark.unit
+    async def test_pages_use_keyset_cursor(self):
+        """Each page after the first continues from the last id seen."""
+        pages = [page async for page in self.processor._iter_table_pages("workflow_rows", page_size=2)]
+
+        assert [len(page) for page in pages] == [2, 2, 1]
+        assert [entry for entry in self.log if entry[0] == "gt"] == [("gt", "wf-0001"), ("gt", "wf-0003")]
+
+    @pytest.mark.unit
+    async def test_workflow_batches_carry_only_their_blocks(self):
+        """Blocks are fetched per workflow page and grouped by workflow_id."""
+        batches = [
+            batch async for batch in self.processor.iter_workflow_batches(batch_size=2, after_id="wf-0000")
+        ]
+
+        assert [[row["id"] for row in rows] for rows, _ in batches] == [
+            ["wf-0001", "wf-0002"], ["wf-0003", "wf-0004"]
+        ]
+        rows, blocks_by_workflow = batches[0]
+        assert set(blocks_by_workflow) == {"wf-0001", "wf-0002"}
+        assert len(blocks_by_workflow["wf-0001"]) == 2
+
+    @pytest.mark.unit
+    async def test_in_filters_are_chunked(self):
+        """No in_() filter carries more than IN_FILTER_CHUNK_SIZE ids, keeping request URLs short."""
+        with patch("src.services.csv_processor.IN_FILTER_CHUNK_SIZE", 2):
+            batches = [batch async for batch in self.processor.iter_workflow_batches(batch_size=5)]
+            existing = await self.processor._fetch_existing_ids(
+                "workflow_rows", [row["id"] for row in self.workflow_rows] + ["wf-missing"]
+            )
+
+        in_sizes = [size for kind, size in self.log if kind == "in"]
+        assert in_sizes == [2, 2, 1, 2, 2, 2]
+        assert sum(len(blocks) for blocks in batches[0][1].values()) == 10
+        assert existing == {row["id"] for row in self.workflow_rows}
+
+    @pytest.mark.unit
+    async def test_count_rows_uses_head_request(self):
+        """Row counts come from count="exact" without transferring rows."""
+        assert await self.processor._count_rows("workflow_blocks_rows") == 10
@@ -761,4 +761,192 @@ class TestDatabaseService:
                     assert isinstance(result, dict)
                     # If accepted, should have been sanitized
                     if "name" in result:
-                        assert len(result["name"]) > 0 
\ No newline at end of file
+                        assert len(result["name"]) > 0 
+
+class TestQueryExecutor:
+    """Test suite for the non-blocking Supabase query executor."""
+
+    @pytest.mark.unit
+    @pytest.mark.database
+    async def test_blocking_calls_run_concurrently(self):
+        """Blocking execute() calls should overlap instead of serializing."""
+        import time
+        from src.utils.database_hybrid import QueryExecutor
+
+        executor = QueryExecutor(max_workers=5, max_pending=5)
+
+        def slow_call():
+            time.sleep(0.1)
+            return "ok"
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(executor.run(slow_call) for _ in range(5)))
+        elapsed = time.perf_counter() - start
+        executor.shutdown()
+
+        assert results == ["ok"] * 5
+        assert elapsed < 0.3
+
+    @pytest.mark.unit
+    @pytest.mark.database
+    async def test_backpressure_caps_in_flight_calls(self):
+        """No more than max_pending calls should be admitted at once."""
+        import threading
+        import time
+        from src.utils.database_hybrid import QueryExecutor
+
+        executor = QueryExecutor(max_workers=2, max_pending=2)
+        lock = threading.Lock()
+        active = {"now": 0, "peak": 0}
+
+        def tracked_call():
+            with lock:
+                active["now"] += 1
+                active["peak"] = max(active["peak"], active["now"])
+            time.sleep(0.02)
+            with lock:
+                active["now"] -= 1
+
+        await asyncio.gather(*(executor.run(tracked_call) for _ in range(10)))
+        executor.shutdown()
+
+        assert active["peak"] <= 2
+        assert executor.in_flight == 0
+
+    @pytest.mark.unit
+    @pytest.mark.database
+    async def test_run_query_executes_off_event_loop_thread(self):
+        """run_query should call the builder's execute() on a pool thread."""
+        import threading
+
+        db_service = DatabaseService()
+        query = MagicMock()
+        query.execute.side_effect = lambda: threading.current_thread().name
+
+        thread_name = await db_service.run_query(query)
+        await db_service.shutdown()
+
+        query.execute.assert_called_once_with()
+        assert thread_name.startswith("supabase-query")
+
+
+class TestBulkWorkflowAccess:
+    """Test suite for multi-workflow reads and bulk state writes."""
+
+    @pytest.fixture(autouse=True)
+    def setup_database_service(self):
+        self.db_service = DatabaseService()
+        self.db_service.use_database = True
+        self.db_service.client = MagicMock()
+        self.db_service.run_query = AsyncMock()
+
+    @pytest.mark.unit
+    @pytest.mark.database
+    async def test_get_workflows_uses_chunked_in_filters(self):
+        """Many ids become a few in_() queries instead of one query per workflow."""
+        ids = [f"wf-{i}" for i in range(450)]
+        self.db_service.run_query.side_effect = [
+            MagicMock(data=[{"id": wid, "state": '{"blocks": {}}'} for wid in ids[i:i + 200]])
+            for i in range(0, 450, 200)
+        ]
+
+        workflows = await self.db_service.get_workflows(ids)
+
+        assert self.db_service.run_query.await_count == 3
+        in_filter = self.db_service.client.table.return_value.select.return_value.in_
+        assert [len(c.args[1]) for c in in_filter.call_args_list] == [200, 200, 50]
+        assert workflows["wf-7"]["state"] == {"blocks": {}}
+
+    @pytest.mark.unit
+    @pytest.mark.database
+    async def test_blocks_grouped_by_workflow(self):
+        """Blocks come back keyed by workflow, including workflows without blocks."""
+        self.db_service.run_query.return_value = MagicMock(data=[
+            {"id": "b1", "workflow_id": "wf-1"},
+            {"id": "b2", "workflow_id": "wf-1"}
+        ])
+
+        blocks = await self.db_service.get_blocks_for_workflows(["wf-1", "wf-2"])
+
+        assert [b["id"] for b in blocks["wf-1"]] == ["b1", "b2"]
+        assert blocks["wf-2"] == []
+
+    @pytest.mark.unit
+    @pytest.mark.database
+    async def test_update_workflow_states_writes_only_state_columns(self):
+        """Each state is a targeted update of state and updated_at, never a whole-row upsert."""
+        self.db_service.run_query.return_value = MagicMock(data=[{"id": "wf"}])
+
+        written = await self.db_service.update_workflow_states({"wf-1": {"blocks": {}}, "wf-2": {"blocks": {}}})
+
+        assert written == 2
+        table = self.db_service.client.table.return_value
+        table.upsert.assert_not_called()
+        assert [set(c.args[0]) for c in table.update.call_args_list] == [{"state", "updated_at"}] * 2
+        assert all(c.args[0]["state"] == '{"blocks": {}}' for c in table.update.call_args_list)
+        assert [c.args for c in table.update.return_value.eq.call_args_list] == [("id", "wf-1"), ("id", "wf-2")]
+
+    @pytest.mark.unit
+    @pytest.mark.database
+    async def test_bulk_state_access_reports_database_errors(self):
+        """Streaming falls back to mock data before any page; log writes report what was persisted."""
+        self.db_service.run_query.side_effect = Exception("connection reset")
+        self.db_service.mock_workflows = {"wf-1": {"name": "One", "state": {"blocks": {}}}}
+
+        pages = [page async for page in self.db_service.iter_workflow_states()]
+        written = await self.db_service.insert_validation_logs([{"workflow_id": "wf-1"}])
+
+        assert pages == [[{"id": "wf-1", "name": "One", "state": {"blocks": {}}}]]
+        assert written == 0
+        assert self.db_service.mock_validation_logs == []
+
+    @pytest.mark.unit
+    @pytest.mark.database
+    async def test_state_stream_raises_after_database_pages(self):
+        """An error after the first page is raised, not turned into a short stream."""
+        self.db_service.run_query.side_effect = [
+            MagicMock(data=[{"id": "wf-1", "state": "{}"}, {"id": "wf-2", "state": "{}"}]),
+            Exception("connection reset")
+        ]
+
+        pages = []
+        with pytest.raises(Exception, match="connection reset"):
+            async for page in self.db_service.iter_workflow_states(page_size=2):
+                pages.append(page)
+
+        assert [row["id"] for row in pages[0]] == ["wf-1", "wf-2"]
+
+    @pytest.mark.unit
+    @pytest.mark.database
+    async def test_workflow_with_blocks_is_one_embedded_select(self):
+        """Workflow and blocks come back from a single PostgREST request."""
+        self.db_service.run_query.return_value = MagicMock(data=[{
+            "id": "wf-1",
+            "state": '{"blocks": {}}',
+            "workflow_blocks": [{"id": "b1", "workflow_id": "wf-1"}]
+        }])
+
+        workflow = await self.db_service.get_workflow_with_blocks("wf-1")
+
+        self.db_service.run_query.assert_awaited_once()
+        self.db_service.client.table.return_value.select.assert_called_once_with("*, workflow_blocks(*)")
+        assert workflow["blocks"] == [{"id": "b1", "workflow_id": "wf-1"}]
+        assert "workflow_blocks" not in workflow
+        assert workflow["state"] == {"blocks": {}}
+
+    @pytest.mark.unit
+    @pytest.mark.database
+    async def test_workflows_with_blocks_for_many_ids(self):
+        """The multi-id variant embeds blocks per workflow in chunked in_() queries."""
+        self.db_service.run_query.return_value = MagicMock(data=[
+            {"id": "wf-1", "workflow_blocks": [{"id": "b1"}]},
+            {"id": "wf-2", "workflow_blocks": []}
+        ])
+
+        workflows = await self.db_service.get_workflows_with_blocks(["wf-1", "wf-2", "wf-1"])
+
+        self.db_service.run_query.assert_awaited_once()
+        in_filter = self.db_service.client.table.return_value.select.return_value.in_
+        in_filter.assert_called_once_with("id", ["wf-1", "wf-2"])
+        assert workflows["wf-1"]["blocks"] == [{"id": "b1"}]
+        assert workflows["wf-2"]["blocks"] == []
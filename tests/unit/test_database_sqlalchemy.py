@@ -0,0 +1,115 @@
+"""
+Unit tests for the SQLAlchemy database backend
+"""
+import pytest
+import json
+import sys
+import os
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock, patch
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.models.database import Workflow, WorkflowBlock
+from src.utils.database_hybrid import DatabaseService, create_database_service
+from src.utils.database_sqlalchemy import (
+    SQLAlchemyDatabaseService, WORKFLOWS_WITH_BLOCKS_BY_IDS, _copy_records, _model_to_dict
+)
+
+
+class TestBackendSelection:
+    """Test suite for create_database_service."""
+
+    @pytest.mark.unit
+    @pytest.mark.database
+    def test_supabase_is_the_default_backend(self):
+        """Without DATABASE_BACKEND the Supabase/mock service is used."""
+        with patch.dict(os.environ, {}, clear=True):
+            service = create_database_service()
+
+        assert type(service) is DatabaseService
+        assert service.supports_copy is False
+
+    @pytest.mark.unit
+    @pytest.mark.database
+    async def test_sqlalchemy_backend_without_engine_uses_mock_data(self):
+        """Selecting SQLAlchemy with no DATABASE_URL still serves the mock workflows."""
+        with patch.dict(os.environ, {"DATABASE_BACKEND": "sqlalchemy"}, clear=True), \
+             patch("src.models.connection.engine", None):
+            service = create_database_service()
+
+        assert isinstance(service, SQLAlchemyDatabaseService)
+        assert service.use_sqlalchemy is False
+        workflow = await service.get_workflow_with_blocks("sample-workflow-123")
+        assert [block["id"] for block in workflow["blocks"]] == ["starter_1", "agent_1"]
+
+
+class TestRowConversion:
+    """Test suite for ORM rows and COPY records."""
+
+    @pytest.mark.unit
+    def test_model_rows_match_supabase_shape(self):
+        """Numeric columns come back as floats like PostgREST JSON."""
+        block = WorkflowBlock(id="b1", workflow_id="wf-1", type="agent", name="Agent",
+                              position_x=Decimal("12.5"), position_y=Decimal("0"))
+
+        row = _model_to_dict(block)
+
+        assert row["position_x"] == 12.5
+        assert row["workflow_id"] == "wf-1"
+        assert set(row) == {column.key for column in WorkflowBlock.__table__.columns}
+
+    @pytest.mark.unit
+    def test_copy_records_coerce_prepared_rows(self):
+        """Prepared rows are coerced to COPY codec types with column defaults filled."""
+        records = _copy_records(Workflow.__table__, [{
+            "id": "wf-1",
+            "user_id": "u1",
+            "name": "Bot",
+            "state": json.dumps({"blocks": {}}),
+            "variables": {"a": 1},
+            "last_synced": "2024-01-04T10:00:00Z",
+            "created_at": datetime(2024, 1, 4),
+            "updated_at": "2024-01-04T10:00:00"
+        }])
+
+        row = dict(zip([column.key for column in Workflow.__table__.columns], records[0]))
+        assert row["state"] == '{"blocks": {}}'
+        assert row["variables"] == '{"a": 1}'
+        assert row["last_synced"] == datetime(2024, 1, 4, 10)
+        assert row["color"] == "#3972F6"
+        assert row["collaborators"] == "[]"
+        assert row["deployed_state"] is None
+
+    @pytest.mark.unit
+    def test_blocks_are_loaded_with_selectinload(self):
+        """Multi-workflow reads use one expanding IN bind and a selectinload for blocks."""
+        sql = str(WORKFLOWS_WITH_BLOCKS_BY_IDS)
+        strategies = [
+            load.strategy for option in WORKFLOWS_WITH_BLOCKS_BY_IDS._with_options for load in option.context
+        ]
+
+        assert "IN (__[POSTCOMPILE_workflow_ids])" in sql
+        assert strategies == [(("lazy", "selectin"),)]
+
+
+class TestCopyBulkLoad:
+    """Test suite for COPY-based CSV bulk writes."""
+
+    @pytest.mark.unit
+    async def test_bulk_writes_use_copy_when_supported(self):
+        """The bulk migration hands prepared rows to copy_upsert instead of PostgREST."""
+        from src.services.csv_processor import CSVProcessor
+
+        processor = CSVProcessor()
+        processor.db = MagicMock(supports_copy=True, use_sqlalchemy=True, copy_upsert=AsyncMock(return_value=1))
+        block = {"id": "b1", "workflow_id": "wf-1", "type": "agent", "name": "Agent",
+                 "position_x": 1, "position_y": 2}
+
+        await processor._bulk_upsert_blocks([block])
+
+        table, rows = processor.db.copy_upsert.await_args.args
+        assert table == "workflow_blocks"
+        assert rows[0]["id"] == "b1"
+        processor.db.client.table.assert_not_called()
@@ -0,0 +1,112 @@
+"""
+Unit tests for request deadlines and deadline-aware state generation
+"""
+import pytest
+import asyncio
+import sys
+import os
+from unittest.mock import AsyncMock, MagicMock
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.utils.deadline import Deadline
+
+
+class TestDeadline:
+    """Test suite for Deadline."""
+
+    @pytest.mark.unit
+    def test_no_budget_means_no_deadline(self):
+        """Missing or non-positive budgets leave the request unbounded."""
+        assert Deadline.from_budget(None) is None
+        assert Deadline.from_budget(0) is None
+        assert Deadline.from_budget(250).budget_ms == 250
+
+    @pytest.mark.unit
+    async def test_run_records_timings_and_times_out(self):
+        """Steps within budget return; slow steps raise and are recorded."""
+        deadline = Deadline(200)
+
+        assert await deadline.run("fast", asyncio.sleep(0, result="ok")) == "ok"
+        with pytest.raises(asyncio.TimeoutError):
+            await deadline.run("slow", asyncio.sleep(1), reserve_ms=150)
+
+        assert set(deadline.timings_ms) == {"fast", "slow"}
+        assert deadline.timed_out == ["slow"]
+        assert deadline.timings_ms["slow"] < 200
+
+    @pytest.mark.unit
+    async def test_exhausted_budget_skips_step(self):
+        """A step with no budget left is not started at all."""
+        deadline = Deadline(10)
+        started = False
+
+        async def step():
+            nonlocal started
+            started = True
+
+        with pytest.raises(asyncio.TimeoutError):
+            await deadline.run("ai_generation", step(), reserve_ms=10)
+        assert started is False
+
+
+class TestDeadlineAwareGeneration:
+    """Test suite for StateGenerator tier degradation."""
+
+    @pytest.fixture(autouse=True)
+    def setup_generator(self):
+        from src.services.state_generator import StateGenerator
+
+        self.generator = StateGenerator()
+        self.generator.fallback_reserve_ms = 20
+        self.generator.db = MagicMock()
+        self.generator.db.get_workflow_with_blocks = AsyncMock(
+            side_effect=lambda wid: {"id": wid, "name": "Bot", "blocks": [{"id": "b1", "type": "starter"}]}
+        )
+        self.lookup = MagicMock()
+        self.lookup.generate_lookup_key = MagicMock(return_value="key")
+        self.lookup.log_ai_usage = AsyncMock()
+        self.lookup.store_workflow_pattern_with_embedding = AsyncMock()
+        self.generator.lookup_service = self.lookup
+
+    @pytest.mark.unit
+    async def test_slow_ai_generation_degrades_to_fallback(self):
+        """A cache miss with a slow model is served by the rule-based tier in budget."""
+        async def slow_ai(workflow_id, workflow_data=None, emit=None):
+            await asyncio.sleep(1)
+            return {"blocks": {}}
+
+        self.generator.use_ai = True
+        self.generator._generate_ai_state = slow_ai
+        self.lookup.find_similar_workflows_hybrid = AsyncMock(return_value=None)
+
+        state = await self.generator.generate_workflow_state("wf-1", deadline=Deadline(150))
+
+        tiers = state["metadata"]["generation_tiers"]
+        assert tiers["served_by"] == "fallback"
+        assert tiers["timed_out"] == ["ai_generation"]
+        assert {"fetch", "lookup", "ai_generation", "fallback"} <= set(tiers["tier_timings_ms"])
+        assert tiers["elapsed_ms"] < 500
+
+    @pytest.mark.unit
+    async def test_slow_ai_adaptation_serves_cached_adaptation(self):
+        """A weak cache hit keeps the rule-based adaptation when AI refinement is too slow."""
+        async def slow_adapt(state, input_data, similarity_score):
+            await asyncio.sleep(1)
+            return state
+
+        self.generator.use_ai = True
+        self.generator._ai_adapt_state = slow_adapt
+        self.lookup.find_similar_workflows_hybrid = AsyncMock(
+            return_value=({"blocks": {}, "metadata": {}}, 0.8, "semantic")
+        )
+        self.lookup.adapt_cached_state = AsyncMock(
+            return_value={"blocks": {}, "metadata": {"adapted_from_cache": True}}
+        )
+
+        state = await self.generator.generate_workflow_state("wf-1", deadline=Deadline(150))
+
+        assert state["metadata"]["adapted_from_cache"] is True
+        tiers = state["metadata"]["generation_tiers"]
+        assert tiers["served_by"] == "cached_adaptation"
+        assert tiers["timed_out"] == ["ai_adaptation"]
@@ -0,0 +1,92 @@
+"""
+Unit tests for the persistent embedding cache
+"""
+import pytest
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.services.embedding_cache import DiskEmbeddingStore, EmbeddingCache, embedding_key
+
+DIM = 4
+
+
+class TestEmbeddingCache:
+    """Test suite for EmbeddingCache."""
+
+    @pytest.mark.unit
+    @pytest.mark.cache
+    def test_keys_are_content_addressed_per_model(self):
+        """Identical text shares a key; a different model does not."""
+        assert embedding_key("crypto bot", "m1") == embedding_key("crypto bot", "m1")
+        assert embedding_key("crypto bot", "m1") != embedding_key("crypto bot", "m2")
+
+    @pytest.mark.unit
+    @pytest.mark.cache
+    def test_memory_tier_counts_hits_and_misses(self):
+        """Memory-only cache returns stored vectors and tracks counters."""
+        cache = EmbeddingCache(dim=DIM)
+
+        assert cache.get("alpha", "m") is None
+        cache.set("alpha", "m", [1.0, 0.0, 0.0, 0.0])
+
+        assert cache.get("alpha", "m") == [1.0, 0.0, 0.0, 0.0]
+        stats = cache.stats()
+        assert stats["memory_hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["disk_path"] is None
+
+    @pytest.mark.unit
+    @pytest.mark.cache
+    def test_disk_tier_survives_restart(self, tmp_path):
+        """Saved vectors are served from the memory-mapped file by a new instance."""
+        cache = EmbeddingCache(path=str(tmp_path), dim=DIM, disk_entries=8)
+        cache.set("alpha", "m", [0.5, 0.25, 0.0, 1.0])
+        cache.save()
+
+        reopened = EmbeddingCache(path=str(tmp_path), dim=DIM, disk_entries=8)
+
+        assert reopened.get("alpha", "m") == [0.5, 0.25, 0.0, 1.0]
+        assert reopened.stats()["disk_hits"] == 1
+        assert reopened.get("alpha", "m") == [0.5, 0.25, 0.0, 1.0]
+        assert reopened.stats()["memory_hits"] == 1
+
+    @pytest.mark.unit
+    @pytest.mark.cache
+    def test_disk_slot_is_replaced_by_colliding_key(self, tmp_path):
+        """With one slot every key collides; the previous key reads as a miss, never the new vector."""
+        cache = EmbeddingCache(path=str(tmp_path), dim=DIM, disk_entries=1)
+        for i, text in enumerate(["a", "b", "c"]):
+            cache.set(text, "m", [float(i)] * DIM)
+        cache.memory.clear()
+
+        assert cache.get("a", "m") is None
+        assert cache.get("c", "m") == [2.0] * DIM
+        assert cache.stats()["disk_evictions"] == 2
+        assert cache.stats()["disk_entries"] == 1
+
+    @pytest.mark.unit
+    @pytest.mark.cache
+    def test_disk_tier_is_shared_between_processes(self, tmp_path):
+        """Two stores on one path (as two API workers) see each other's writes without a save."""
+        worker_a = DiskEmbeddingStore(str(tmp_path), dim=DIM, capacity=64)
+        worker_b = DiskEmbeddingStore(str(tmp_path), dim=DIM, capacity=64)
+        key_a, key_b = embedding_key("alpha", "m"), embedding_key("beta", "m")
+
+        worker_a.set(key_a, [1.0] * DIM)
+        worker_b.set(key_b, [2.0] * DIM)
+
+        assert worker_b.get(key_a) == [1.0] * DIM
+        assert worker_a.get(key_b) == [2.0] * DIM
+        assert len(worker_a) == len(worker_b) == 2
+
+    @pytest.mark.unit
+    @pytest.mark.cache
+    def test_dim_mismatch_disables_disk_tier(self, tmp_path):
+        """A slot file written for another embedding size is not reused."""
+        DiskEmbeddingStore(str(tmp_path), dim=DIM, capacity=4).close()
+
+        cache = EmbeddingCache(path=str(tmp_path), dim=DIM * 2, disk_entries=4)
+
+        assert cache.disk is None
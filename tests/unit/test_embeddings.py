@@ -0,0 +1,127 @@
+"""
+Tests for embedding providers.
+
+Covers the deterministic local hashed n-gram provider, OpenAI request
+batching, provider selection and batched embedding in the lookup service.
+"""
+
+import math
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from src.services.embeddings import (
+    HashedNgramEmbeddingProvider, OpenAIEmbeddingProvider, create_embedding_provider, EMBEDDING_DIM
+)
+
+
+def cosine(a, b):
+    return sum(x * y for x, y in zip(a, b))
+
+
+class TestHashedNgramEmbeddingProvider:
+    """Test suite for the local embedding provider."""
+
+    @pytest.mark.unit
+    async def test_vectors_are_deterministic_unit_length_1536(self):
+        """Same text, same normalised 1536-dim vector."""
+        provider = HashedNgramEmbeddingProvider()
+        first, second = await provider.embed_many(["Trading bot with agent", "Trading bot with agent"])
+
+        assert len(first) == EMBEDDING_DIM
+        assert first == second
+        assert math.isclose(math.sqrt(sum(v * v for v in first)), 1.0, rel_tol=1e-9)
+
+    @pytest.mark.unit
+    async def test_related_texts_score_higher_than_unrelated(self):
+        """Shared n-grams give higher cosine similarity."""
+        provider = HashedNgramEmbeddingProvider()
+        base, related, unrelated = await provider.embed_many([
+            "Workflow type: trading_bot | Block types: starter, agent, api",
+            "Workflow type: trading_bot | Block types: starter, agent",
+            "Quarterly newsletter for gardening enthusiasts",
+        ])
+
+        assert cosine(base, related) > 0.7
+        assert cosine(base, related) > cosine(base, unrelated) + 0.4
+
+    @pytest.mark.unit
+    async def test_empty_text_is_zero_vector(self):
+        """Empty input doesn't divide by zero."""
+        vector = await HashedNgramEmbeddingProvider().embed("")
+        assert not any(vector)
+
+
+class TestOpenAIEmbeddingProvider:
+    """Test suite for OpenAI request batching."""
+
+    @pytest.mark.unit
+    async def test_embed_many_batches_requests_and_keeps_order(self):
+        """Inputs are chunked per request and results follow input order."""
+        client = MagicMock()
+
+        async def create(model, input):
+            items = [MagicMock(index=i, embedding=[float(len(text))]) for i, text in enumerate(input)]
+            return MagicMock(data=list(reversed(items)))
+
+        client.embeddings.create = AsyncMock(side_effect=create)
+        provider = OpenAIEmbeddingProvider(client, batch_size=2)
+
+        vectors = await provider.embed_many(["a", "bb", "ccc", "dddd", "eeeee"])
+
+        assert vectors == [[1.0], [2.0], [3.0], [4.0], [5.0]]
+        assert client.embeddings.create.await_count == 3
+
+
+class TestProviderSelection:
+    """Test suite for create_embedding_provider."""
+
+    @pytest.mark.unit
+    def test_auto_prefers_openai_and_falls_back_to_local(self, monkeypatch):
+        """Auto mode uses OpenAI with a client, local hashing without one."""
+        monkeypatch.delenv("EMBEDDING_PROVIDER", raising=False)
+
+        assert create_embedding_provider(MagicMock()).name == "openai"
+        assert create_embedding_provider(None).name == "local"
+
+        monkeypatch.setenv("EMBEDDING_PROVIDER", "none")
+        assert create_embedding_provider(MagicMock()) is None
+
+    @pytest.mark.unit
+    def test_database_never_gets_implicit_local_vectors(self, monkeypatch):
+        """With a database, local embeddings must be chosen explicitly."""
+        monkeypatch.delenv("EMBEDDING_PROVIDER", raising=False)
+        assert create_embedding_provider(None, use_database=True) is None
+        assert create_embedding_provider(MagicMock(), use_database=True).name == "openai"
+
+        monkeypatch.setenv("EMBEDDING_PROVIDER", "openai")
+        assert create_embedding_provider(None, use_database=True) is None
+
+        monkeypatch.setenv("EMBEDDING_PROVIDER", "local")
+        assert create_embedding_provider(None, use_database=True).name == "local"
+
+
+class TestBatchedLookupEmbeddings:
+    """Test suite for EnhancedLookupService.generate_embeddings."""
+
+    @pytest.mark.unit
+    async def test_batch_is_one_provider_call_and_primes_single_lookups(self):
+        """Bulk embedding dedupes texts and later single calls reuse the results."""
+        from src.services.enhanced_lookup_service import EnhancedLookupService
+        from src.services.embedding_cache import get_embedding_cache
+
+        get_embedding_cache().clear()
+        db = MagicMock()
+        db.use_database = False
+        service = EnhancedLookupService(db)
+        service.embedding_provider.embed_many = AsyncMock(
+            side_effect=lambda texts: [[float(i)] for i, _ in enumerate(texts)]
+        )
+
+        vectors = await service.generate_embeddings(["alpha", "beta", "alpha"])
+        single = await service.generate_embedding("beta")
+
+        assert vectors == [[0.0], [1.0], [0.0]]
+        assert single == [1.0]
+        service.embedding_provider.embed_many.assert_awaited_once_with(["alpha", "beta"])
+        get_embedding_cache().clear()
@@ -0,0 +1,85 @@
+"""
+Unit tests for workflow graph analysis
+"""
+import pytest
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.services.graph_analysis import MAX_LISTED_BLOCKS, WorkflowGraph, analyze_graph
+from src.services.validation import WorkflowValidator
+
+
+def make_state(types, edges):
+    blocks = {
+        block_id: {"id": block_id, "type": block_type, "name": block_id,
+                   "position_x": 100 * i, "position_y": 100, "sub_blocks": {}}
+        for i, (block_id, block_type) in enumerate(types.items())
+    }
+    return {"blocks": blocks, "edges": [{"from": a, "to": b} for a, b in edges]}
+
+
+class TestGraphAnalysis:
+    """Test suite for analyze_graph."""
+
+    @pytest.mark.unit
+    def test_acyclic_graph(self):
+        """Reachability, topological order and dead ends on a DAG with a stray block."""
+        state = make_state(
+            {"start": "starter", "agent": "agent", "api": "api", "out": "output", "stray": "agent"},
+            [("start", "agent"), ("agent", "api"), ("agent", "out")]
+        )
+
+        graph = analyze_graph(state)
+
+        assert graph["nodes"] == 5 and graph["edges"] == 3
+        assert graph["unreachable_blocks"] == ["stray"]
+        assert graph["reachable_count"] == 4
+        assert not graph["has_cycles"]
+        assert graph["topological_order"] == ["start", "stray", "agent", "api", "out"]
+        assert graph["dead_ends"] == ["api", "stray"]
+
+    @pytest.mark.unit
+    def test_cycles_and_self_loops(self):
+        """Tarjan finds multi-block cycles and self-loops; no topological order is reported."""
+        state = make_state(
+            {"start": "starter", "a": "agent", "b": "agent", "c": "api"},
+            [("start", "a"), ("a", "b"), ("b", "a"), ("c", "c"), ("b", "ghost")]
+        )
+        state["edges"].append("not-an-edge")
+
+        graph = analyze_graph(state)
+
+        assert graph["edges"] == 4
+        assert graph["has_cycles"] and graph["cycle_count"] == 2
+        assert sorted(graph["cycles"]) == [["a", "b"], ["c"]]
+        assert graph["topological_order"] is None
+        assert graph["unreachable_blocks"] == ["c"]
+
+    @pytest.mark.unit
+    def test_long_chain_does_not_recurse(self):
+        """Traversals are iterative, so chains longer than the recursion limit are fine."""
+        count = sys.getrecursionlimit() * 3
+        types = {f"b{i}": "agent" for i in range(count)}
+        types["b0"] = "starter"
+        state = make_state(types, [(f"b{i}", f"b{i + 1}") for i in range(count - 1)])
+
+        graph = analyze_graph(state)
+        components = WorkflowGraph.from_state(state).strongly_connected_components()
+
+        assert graph["unreachable_count"] == 0
+        assert graph["topological_order"] == [f"b{i}" for i in range(MAX_LISTED_BLOCKS)]
+        assert len(components) == count
+
+    @pytest.mark.unit
+    @pytest.mark.validation
+    async def test_graph_metadata_in_connectivity_result(self):
+        """validate_state reports the graph analysis with the edge connectivity result."""
+        state = make_state({"start": "starter", "agent": "agent"}, [("start", "agent"), ("agent", "start")])
+
+        report = await WorkflowValidator().validate_state(state, "wf-1")
+
+        result = next(r for r in report.validation_results if r.validator_name == "validate_edge_connectivity")
+        assert result.metadata["graph"] == analyze_graph(state)
+        assert result.metadata["graph"]["cycles"] == [["start", "agent"]]
@@ -0,0 +1,139 @@
+"""
+Unit tests for incremental re-validation from state diffs
+"""
+import pytest
+import copy
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.services.validation import WorkflowValidator
+from src.services.incremental_validation import StateDiff, apply_diff
+
+STATE = {
+    "blocks": {
+        "starter_1": {"id": "starter_1", "type": "starter", "name": "Start", "position_x": 100, "position_y": 100,
+                      "sub_blocks": {"startWorkflow": "manual"}},
+        "agent_1": {"id": "agent_1", "type": "agent", "name": "Analyst", "position_x": 400, "position_y": 100,
+                    "sub_blocks": {"model": "gpt-4", "systemPrompt": "Summarise the market data"}},
+        "api_1": {"id": "api_1", "type": "api", "name": "Fetch", "position_x": 700, "position_y": 100,
+                  "sub_blocks": {"url": "https://api.example.com", "method": "GET",
+                                 "headers": {"Authorization": "key"}}}
+    },
+    "edges": [{"from": "starter_1", "to": "agent_1"}, {"from": "agent_1", "to": "api_1"}],
+    "subflows": {},
+    "variables": {},
+    "metadata": {"version": "1.0.0", "createdAt": "2024-01-04T10:00:00Z"}
+}
+
+
+def report_body(report):
+    body = report.dict()
+    body.pop("validated_at")
+    return body
+
+
+class TestIncrementalValidation:
+    """Test suite for WorkflowValidator.validate_diff."""
+
+    @pytest.fixture(autouse=True)
+    def setup_validator(self):
+        self.validator = WorkflowValidator()
+        self.state = copy.deepcopy(STATE)
+
+    async def assert_matches_full(self, report, diff):
+        full = await self.validator.validate_state(apply_diff(self.state, StateDiff(**diff)), "wf-1")
+        assert report_body(report) == report_body(full)
+
+    @pytest.mark.unit
+    @pytest.mark.validation
+    async def test_changed_block_reruns_only_affected_rules(self):
+        """Editing an agent re-runs block-level rules; schema and connectivity results are carried over."""
+        previous = await self.validator.validate_state(self.state, "wf-1")
+        agent = dict(self.state["blocks"]["agent_1"], sub_blocks={"model": "gpt-5", "systemPrompt": "short"})
+        diff = {"changed_blocks": {"agent_1": agent}}
+
+        report = await self.validator.validate_diff(previous, diff)
+
+        await self.assert_matches_full(report, diff)
+        reused = [new is old for new, old in zip(report.validation_results, previous.validation_results)]
+        assert reused == [True, False, True, False, True, True, False, False, False]
+        assert len(report.validation_results[3].warnings) == 2
+
+    @pytest.mark.unit
+    @pytest.mark.validation
+    async def test_graph_changes_are_tracked_across_diffs(self):
+        """Removed blocks leave dangling edges, and consecutive diffs build on the last report."""
+        report = await self.validator.validate_state(self.state, "wf-1")
+        diffs = [
+            {"removed_blocks": ["api_1"]},
+            {"added_blocks": {"tool_1": {"id": "tool_1", "type": "tool", "name": "Tool", "position_x": 100,
+                                         "position_y": 100, "sub_blocks": {}}},
+             "removed_edges": [{"from": "agent_1", "to": "api_1"}],
+             "added_edges": [{"from": "agent_1", "to": "tool_1"}, {"from": "tool_1"}]},
+            {"fields": {"variables": {"market_price": 1}}}
+        ]
+
+        for diff in diffs:
+            report = await self.validator.validate_diff(report, diff)
+            await self.assert_matches_full(report, diff)
+            self.state = apply_diff(self.state, StateDiff(**diff))
+
+        edge_result = report.validation_results[5]
+        assert edge_result.errors == ["Edge 2 missing 'from' or 'to' field"]
+        assert "trading_bot" in report.validation_results[6].metadata["detected_patterns"]
+        assert "Some blocks have identical positions (may overlap)" in report.validation_results[7].warnings
+
+    @pytest.mark.unit
+    @pytest.mark.validation
+    async def test_edge_edits_keep_graph_analysis_in_step(self):
+        """Back edges, cycles and lost starters update reachability, dead ends and ordering like a full pass."""
+        report = await self.validator.validate_diff(await self.validator.validate_state(self.state, "wf-1"), {})
+        diffs = [
+            {"removed_edges": [{"from": "agent_1", "to": "api_1"}], "added_edges": [{"from": "api_1", "to": "agent_1"}]},
+            {"added_edges": [{"from": "starter_1", "to": "api_1"}]},
+            {"added_edges": [{"from": "agent_1", "to": "api_1"}]},
+            {"removed_edges": [{"from": "api_1", "to": "agent_1"}]},
+            {"removed_blocks": ["starter_1"]}
+        ]
+
+        graphs = []
+        for diff in diffs:
+            report = await self.validator.validate_diff(report, diff)
+            await self.assert_matches_full(report, diff)
+            self.state = apply_diff(self.state, StateDiff(**diff))
+            graphs.append(report.validation_results[5].metadata["graph"])
+
+        assert graphs[0]["topological_order"] == ["starter_1", "api_1", "agent_1"]
+        assert graphs[2]["has_cycles"] and graphs[2]["cycles"] == [["agent_1", "api_1"]]
+        assert graphs[3]["topological_order"] == ["starter_1", "agent_1", "api_1"]
+        assert graphs[4]["unreachable_blocks"] == ["agent_1", "api_1"]
+
+    @pytest.mark.unit
+    @pytest.mark.validation
+    async def test_rule_errors_fall_back_to_full_validation(self):
+        """A block a rule can't check is reported exactly as validate_state reports it."""
+        previous = await self.validator.validate_state(self.state, "wf-1")
+        agent = dict(self.state["blocks"]["agent_1"], sub_blocks={"model": "gpt-4", "systemPrompt": 42})
+        diff = {"changed_blocks": {"agent_1": agent}}
+
+        report = await self.validator.validate_diff(previous, diff)
+
+        await self.assert_matches_full(report, diff)
+        assert report.validation_results[3].errors[0].startswith("Validator error:")
+
+    @pytest.mark.unit
+    @pytest.mark.validation
+    async def test_deserialized_report_needs_base_state(self):
+        """Reports rebuilt from JSON don't carry their state, so it must be passed in."""
+        report = await self.validator.validate_state(self.state, "wf-1")
+        restored = type(report)(**report.dict())
+        diff = {"removed_blocks": ["starter_1"]}
+
+        with pytest.raises(ValueError):
+            await self.validator.validate_diff(restored, diff)
+
+        report = await self.validator.validate_diff(restored, diff, base_state=self.state)
+        await self.assert_matches_full(report, diff)
+        assert report.validation_results[2].errors == ["Workflow must have at least one starter block"]
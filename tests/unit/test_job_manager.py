@@ -0,0 +1,145 @@
+"""
+Tests for the background job manager.
+
+Covers job lifecycle, progress reporting, bounded concurrency, cancellation
+and the /api/jobs endpoints.
+"""
+
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+
+from src.services.job_manager import (
+    JobManager, InMemoryJobStore,
+    JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED
+)
+
+
+class TestJobManager:
+    """Test suite for JobManager."""
+
+    @pytest.fixture
+    async def manager(self):
+        """Job manager with two workers and an in-memory store."""
+        manager = JobManager(max_concurrency=2, store=InMemoryJobStore())
+        yield manager
+        await manager.shutdown()
+
+    @pytest.mark.unit
+    async def test_job_runs_and_records_result_and_progress(self, manager):
+        """A submitted job returns immediately and finishes with its result."""
+        async def work(job):
+            for i in range(1, 5):
+                await job.report(i, 4, f"step {i}")
+            return {"answer": 42}
+
+        job = await manager.submit("demo", work, params={"size": 4})
+        assert job["status"] == "queued"
+
+        finished = await manager.wait(job["id"], timeout=2)
+
+        assert finished["status"] == JOB_SUCCEEDED
+        assert finished["result"] == {"answer": 42}
+        assert finished["progress"]["current"] == 4
+        assert finished["progress"]["percent"] == 100.0
+        assert finished["params"] == {"size": 4}
+
+    @pytest.mark.unit
+    async def test_concurrency_is_bounded(self, manager):
+        """No more than max_concurrency jobs run at once."""
+        state = {"active": 0, "peak": 0}
+
+        async def work(job):
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+            await asyncio.sleep(0.02)
+            state["active"] -= 1
+
+        jobs = [await manager.submit("demo", work) for _ in range(6)]
+        for job in jobs:
+            await manager.wait(job["id"], timeout=2)
+
+        assert state["peak"] == 2
+
+    @pytest.mark.unit
+    async def test_cancel_running_and_queued_jobs(self, manager):
+        """Running jobs are cancelled in place; queued jobs never start."""
+        started = []
+
+        async def work(job):
+            started.append(job.job_id)
+            await asyncio.sleep(10)
+
+        jobs = [await manager.submit("demo", work) for _ in range(3)]
+        await asyncio.sleep(0.02)
+
+        running = await manager.cancel(jobs[0]["id"])
+        queued = await manager.cancel(jobs[2]["id"])
+        await manager.cancel(jobs[1]["id"])
+
+        assert queued["status"] == JOB_CANCELLED
+        assert (await manager.wait(jobs[0]["id"], timeout=2))["status"] == JOB_CANCELLED
+        assert running["cancel_requested"] is True
+        assert jobs[2]["id"] not in started
+
+    @pytest.mark.unit
+    async def test_progress_reports_keep_a_cancel_set_elsewhere(self, manager):
+        """Progress updates only touch progress, so another worker's cancel flag survives."""
+        async def work(job):
+            await job.report(1, 3)
+            # Another process flags the shared record without touching this task
+            await manager.store.update(job.job_id, lambda record: record.update({"cancel_requested": True}))
+            await job.report(2, 3)
+            return "unreachable"
+
+        job = await manager.submit("demo", work)
+        finished = await manager.wait(job["id"], timeout=2)
+
+        assert finished["status"] == JOB_CANCELLED
+        assert finished["cancel_requested"] is True
+        assert finished["progress"]["current"] == 1
+
+    @pytest.mark.unit
+    async def test_failed_job_records_error(self, manager):
+        """Exceptions mark the job failed with the error message."""
+        async def work(job):
+            raise RuntimeError("boom")
+
+        job = await manager.submit("demo", work)
+        finished = await manager.wait(job["id"], timeout=2)
+
+        assert finished["status"] == JOB_FAILED
+        assert finished["error"] == "boom"
+
+
+class TestJobEndpoints:
+    """Test suite for the /api/jobs router."""
+
+    @pytest.mark.unit
+    async def test_get_job_status_and_missing_job(self, monkeypatch):
+        """GET /api/jobs/{id} returns the job record, 404 when unknown."""
+        from src.api import jobs as jobs_api
+
+        manager = JobManager(max_concurrency=1, store=InMemoryJobStore())
+        monkeypatch.setattr(jobs_api, "job_manager", manager)
+        app = FastAPI()
+        app.include_router(jobs_api.router)
+
+        async def work(job):
+            return "done"
+
+        job = await manager.submit("demo", work)
+        await manager.wait(job["id"], timeout=2)
+
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            found = await client.get(f"/api/jobs/{job['id']}")
+            missing = await client.get("/api/jobs/does-not-exist")
+
+        await manager.shutdown()
+
+        assert found.status_code == 200
+        assert found.json()["status"] == JOB_SUCCEEDED
+        assert found.json()["result"] == "done"
+        assert missing.status_code == 404
@@ -0,0 +1,63 @@
+"""
+Unit tests for lazy client construction and cold-start imports
+"""
+import pytest
+import subprocess
+import sys
+import os
+from unittest.mock import MagicMock
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.utils.lazy import LazyClient, module_available
+
+PROJECT_ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+
+
+class TestLazyClient:
+    """Test suite for LazyClient."""
+
+    @pytest.mark.unit
+    def test_client_is_built_once_on_first_use(self):
+        """Construction waits for the first attribute access and happens once."""
+        factory = MagicMock(return_value=MagicMock(table=MagicMock(return_value="query")))
+        client = LazyClient("Test", factory)
+
+        assert client.created is False
+        factory.assert_not_called()
+        assert client.table("workflow") == "query"
+        assert client.table("workflow_blocks") == "query"
+        factory.assert_called_once()
+        assert client.created is True
+
+    @pytest.mark.unit
+    def test_construction_error_is_reported_and_raised(self):
+        """on_error lets the owner switch to its fallback before the error propagates."""
+        errors = []
+        client = LazyClient("Test", MagicMock(side_effect=RuntimeError("bad key")), on_error=errors.append)
+
+        with pytest.raises(RuntimeError):
+            client.table("workflow")
+        assert [str(e) for e in errors] == ["bad key"]
+
+    @pytest.mark.unit
+    def test_module_available_does_not_import(self):
+        """Availability checks use the import system's finders only."""
+        assert module_available("json") is True
+        assert module_available("definitely_not_a_module_xyz") is False
+
+
+class TestColdStartImports:
+    """Test suite for import-time cost of the API."""
+
+    @pytest.mark.unit
+    def test_api_import_defers_heavy_modules(self):
+        """Importing the app doesn't load the ORM engine, numpy or AI/DB SDKs."""
+        deferred = ["sqlalchemy.ext.asyncio", "numpy", "anthropic", "openai", "supabase"]
+        probe = f"import sys, src.main; print([m for m in {deferred!r} if m in sys.modules])"
+
+        output = subprocess.run(
+            [sys.executable, "-c", probe], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        ).stdout
+
+        assert output.strip().splitlines()[-1] == "[]"
@@ -710,4 +710,119 @@ class TestEnhancedLookupService:
         assert "cache_performance" in stats
         assert "ai_usage" in stats
         assert "cost_analysis" in stats
-        assert stats["cache_performance"]["hit_rate"] == 0.75 
\ No newline at end of file
+        assert stats["cache_performance"]["hit_rate"] == 0.75 
+
+class TestStructuralL1Cache:
+    """Test suite for the in-process tier in front of workflow_lookup."""
+
+    @pytest.fixture(autouse=True)
+    def setup_lookup_service(self):
+        """Lookup service over a database whose RPC always finds a strong match."""
+        from src.services.enhanced_lookup_service import invalidate_structural_cache
+
+        invalidate_structural_cache()
+        self.db = MagicMock()
+        self.db.use_database = True
+        self.db.run_query = AsyncMock(return_value=MagicMock(data=[{
+            "lookup_id": "lookup-1",
+            "generated_state": {"blocks": {}, "edges": []},
+            "similarity_score": 0.95,
+            "usage_count": 3
+        }]))
+        self.lookup_service = EnhancedLookupService(self.db)
+        self.workflow = {
+            "workflow_type": "trading_bot",
+            "blocks": [{"type": "starter"}, {"type": "agent"}]
+        }
+        yield
+        invalidate_structural_cache()
+
+    @pytest.mark.unit
+    @pytest.mark.cache
+    async def test_repeat_lookup_is_served_without_database(self):
+        """The second identical lookup skips both the RPC and the usage UPDATE."""
+        first = await self.lookup_service.find_similar_workflows_structural(self.workflow)
+        calls_after_first = self.db.run_query.await_count
+        second = await self.lookup_service.find_similar_workflows_structural(self.workflow)
+
+        assert calls_after_first == 2  # RPC + usage_count update
+        assert self.db.run_query.await_count == calls_after_first
+        assert first == second
+        assert second[1] == 0.95
+
+    @pytest.mark.unit
+    @pytest.mark.cache
+    async def test_store_invalidates_lookup_key(self):
+        """Storing a pattern for the same key forces the next lookup to the database."""
+        await self.lookup_service.find_similar_workflows_structural(self.workflow)
+        await self.lookup_service.store_workflow_pattern_with_embedding(
+            self.workflow, {"blocks": {}, "edges": []}, 1.0
+        )
+        calls_before = self.db.run_query.await_count
+
+        await self.lookup_service.find_similar_workflows_structural(self.workflow)
+
+        assert self.db.run_query.await_count == calls_before + 2
+
+
+class TestParallelHybridSearch:
+    """Test suite for concurrent structural + semantic hybrid search."""
+
+    @pytest.fixture(autouse=True)
+    def setup_lookup_service(self):
+        db = MagicMock()
+        db.use_database = False
+        self.lookup_service = EnhancedLookupService(db)
+        self.lookup_service.hybrid_search_mode = "parallel"
+        self.workflow = {"workflow_type": "general", "blocks": []}
+
+    @pytest.mark.unit
+    @pytest.mark.cache
+    async def test_strong_structural_hit_cancels_semantic_branch(self):
+        """A >=0.9 structural match returns without waiting for embeddings."""
+        semantic_cancelled = asyncio.Event()
+
+        async def slow_semantic(workflow_data):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                semantic_cancelled.set()
+                raise
+
+        self.lookup_service.find_similar_workflows_structural = AsyncMock(
+            return_value=({"blocks": {}, "metadata": {}}, 0.95)
+        )
+        self.lookup_service.find_similar_workflows_semantic = slow_semantic
+
+        state, score, match_type = await asyncio.wait_for(
+            self.lookup_service.find_similar_workflows_hybrid(self.workflow), timeout=1
+        )
+
+        assert (score, match_type) == (0.95, "structural")
+        assert semantic_cancelled.is_set()
+        search_info = state["metadata"]["hybrid_search"]
+        assert search_info["mode"] == "parallel"
+        assert search_info["semantic_cancelled"] is True
+        assert search_info["semantic_ms"] is None
+
+    @pytest.mark.unit
+    @pytest.mark.cache
+    async def test_miss_costs_max_not_sum_of_branches(self):
+        """Both branches run concurrently and semantic wins over a weak structural match."""
+        async def weak_structural(workflow_data):
+            await asyncio.sleep(0.05)
+            return ({"blocks": {}}, 0.82)
+
+        async def strong_semantic(workflow_data):
+            await asyncio.sleep(0.05)
+            return ({"blocks": {"a": {}}}, 0.88)
+
+        self.lookup_service.find_similar_workflows_structural = weak_structural
+        self.lookup_service.find_similar_workflows_semantic = strong_semantic
+
+        state, score, match_type = await self.lookup_service.find_similar_workflows_hybrid(self.workflow)
+
+        assert (score, match_type) == (0.88, "semantic")
+        search_info = state["metadata"]["hybrid_search"]
+        assert search_info["structural_ms"] >= 50 and search_info["semantic_ms"] >= 50
+        assert search_info["total_ms"] < search_info["structural_ms"] + search_info["semantic_ms"]
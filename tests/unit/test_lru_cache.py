@@ -0,0 +1,72 @@
+"""
+Tests for the in-process LRU/TTL cache.
+
+Covers recency ordering, byte-budget and entry-count eviction, TTL expiry,
+targeted invalidation and hit/miss accounting.
+"""
+
+import pytest
+from unittest.mock import patch
+
+from src.utils.lru_cache import LRUTTLCache
+
+
+class TestLRUTTLCache:
+    """Test suite for LRUTTLCache."""
+
+    @pytest.mark.unit
+    def test_least_recently_used_entry_is_evicted_first(self):
+        """Reading an entry protects it from the next eviction."""
+        cache = LRUTTLCache(max_entries=2, size_of=lambda value: 1)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert "a" in cache
+        assert "b" not in cache
+        assert cache.stats()["evictions"] == 1
+
+    @pytest.mark.unit
+    def test_byte_budget_is_enforced(self):
+        """Values are evicted until the byte total fits the cap."""
+        cache = LRUTTLCache(max_bytes=100, size_of=len)
+        cache.set("a", "x" * 40)
+        cache.set("b", "x" * 40)
+        cache.set("c", "x" * 40)
+
+        assert len(cache) == 2
+        assert cache.current_bytes == 80
+        assert cache.set("huge", "x" * 101) is False
+        assert "huge" not in cache
+
+    @pytest.mark.unit
+    def test_entries_expire_after_ttl(self):
+        """Expired entries read as misses and are dropped."""
+        cache = LRUTTLCache(ttl_seconds=10)
+        with patch("src.utils.lru_cache.time.monotonic", return_value=1000.0):
+            cache.set("a", {"v": 1})
+        with patch("src.utils.lru_cache.time.monotonic", return_value=1005.0):
+            assert cache.get("a") == {"v": 1}
+        with patch("src.utils.lru_cache.time.monotonic", return_value=1011.0):
+            assert cache.get("a") is None
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["expirations"] == 1
+        assert stats["bytes"] == 0
+
+    @pytest.mark.unit
+    def test_invalidate_where_and_clear(self):
+        """Predicate invalidation drops matching entries only."""
+        cache = LRUTTLCache()
+        for i in range(5):
+            cache.set(i, {"even": i % 2 == 0})
+
+        removed = cache.invalidate_where(lambda key, value: value["even"])
+
+        assert removed == 3
+        assert sorted(k for k in range(5) if k in cache) == [1, 3]
+        assert cache.clear() == 2
+        assert cache.current_bytes == 0
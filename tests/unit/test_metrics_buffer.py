@@ -0,0 +1,113 @@
+"""
+Tests for the write-behind metrics buffer.
+
+Covers in-memory aggregation, batched flushes (one RPC + one insert),
+retry on failure, early flush on a full buffer and shutdown flush.
+"""
+
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from src.services.metrics_buffer import MetricsBuffer
+
+
+@pytest.fixture
+def db():
+    """Database service double that records run_query calls."""
+    db = MagicMock()
+    db.use_database = True
+    db.run_query = AsyncMock(return_value=MagicMock(data=[]))
+    return db
+
+
+class TestMetricsBuffer:
+    """Test suite for MetricsBuffer."""
+
+    @pytest.mark.unit
+    async def test_events_are_aggregated_and_flushed_in_one_batch(self, db):
+        """Many hits/misses become one increment RPC; rows become one insert."""
+        buffer = MetricsBuffer(db, flush_interval=60, max_buffered_rows=100)
+        for _ in range(5):
+            buffer.record_cache_event("structural_match", hit=True)
+        buffer.record_cache_event("overall", hit=False)
+        buffer.record_ai_usage({"provider": "openai", "operation_type": "embedding"})
+        buffer.record_ai_usage({"provider": "anthropic", "operation_type": "generation"})
+
+        assert db.run_query.await_count == 0
+
+        written = await buffer.flush()
+
+        assert written == {"cache_counters": 2, "ai_usage_rows": 2}
+        assert db.run_query.await_count == 2
+        rpc_name, rpc_args = db.client.rpc.call_args.args
+        assert rpc_name == "increment_cache_stats"
+        increments = {row["cache_type"]: row for row in rpc_args["p_increments"]}
+        assert increments["structural_match"]["hits"] == 5
+        assert increments["overall"]["misses"] == 1
+        assert len(db.client.table.return_value.insert.call_args.args[0]) == 2
+        assert buffer.pending() == {"cache_counters": 0, "ai_usage_rows": 0}
+
+    @pytest.mark.unit
+    async def test_failed_flush_keeps_counts_for_retry(self, db):
+        """Counts survive a failed flush and merge with new events."""
+        buffer = MetricsBuffer(db, flush_interval=60)
+        buffer.record_cache_event("overall", hit=True)
+        db.run_query.side_effect = RuntimeError("connection reset")
+        await buffer.flush()
+
+        buffer.record_cache_event("overall", hit=True)
+        db.run_query.side_effect = None
+        await buffer.flush()
+
+        increments = db.client.rpc.call_args.args[1]["p_increments"]
+        assert increments[0]["hits"] == 2
+
+    @pytest.mark.unit
+    async def test_full_buffer_triggers_early_flush(self, db):
+        """Reaching max_buffered_rows flushes without waiting for the interval."""
+        buffer = MetricsBuffer(db, flush_interval=60, max_buffered_rows=3)
+        for i in range(3):
+            buffer.record_ai_usage({"provider": "openai", "n": i})
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+        assert buffer.pending()["ai_usage_rows"] == 0
+        assert db.run_query.await_count == 1
+
+    @pytest.mark.unit
+    async def test_stop_flushes_remaining_metrics(self, db):
+        """Shutdown writes whatever is still buffered."""
+        buffer = MetricsBuffer(db, flush_interval=60)
+        buffer.start()
+        buffer.record_cache_event("semantic_match", hit=True)
+
+        await buffer.stop()
+
+        assert db.client.rpc.call_args.args[0] == "increment_cache_stats"
+        assert buffer.pending()["cache_counters"] == 0
+
+    @pytest.mark.unit
+    async def test_stop_waits_for_a_running_flush(self, db):
+        """A flush caught mid-write at shutdown completes instead of losing its swapped-out rows."""
+        buffer = MetricsBuffer(db, flush_interval=60, max_buffered_rows=1)
+        started = asyncio.Event()
+        completed = []
+
+        async def slow_insert(query):
+            started.set()
+            await asyncio.sleep(0.01)
+            completed.append(query)
+            return MagicMock(data=[])
+
+        db.run_query.side_effect = slow_insert
+        buffer.start()
+        buffer.record_ai_usage({"provider": "openai"})
+        await started.wait()
+
+        await buffer.stop()
+
+        assert len(completed) == 1
+        assert len(db.client.table.return_value.insert.call_args.args[0]) == 1
+        assert buffer.pending()["ai_usage_rows"] == 0
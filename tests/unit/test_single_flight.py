@@ -0,0 +1,201 @@
+"""
+Unit tests for single-flight request coalescing
+"""
+import pytest
+import asyncio
+import sys
+import os
+from unittest.mock import AsyncMock, MagicMock
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.utils.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    """Test suite for SingleFlight."""
+
+    @pytest.mark.unit
+    async def test_concurrent_callers_share_one_call(self):
+        """Callers with the same key run the function once and get equal copies."""
+        flights = SingleFlight()
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"blocks": {}}
+
+        results = await asyncio.gather(*(flights.do("wf-1", work) for _ in range(5)))
+
+        assert calls == 1
+        assert all(result == {"blocks": {}} for result in results)
+        assert len({id(result) for result in results}) == 5
+        assert flights.stats() == {"in_flight": 0, "leaders": 1, "coalesced": 4}
+
+    @pytest.mark.unit
+    async def test_different_keys_and_later_calls_run_separately(self):
+        """Only overlapping calls coalesce; finished keys run again."""
+        flights = SingleFlight()
+        work = AsyncMock(return_value="state")
+
+        await asyncio.gather(flights.do("a", work), flights.do("b", work))
+        await flights.do("a", work)
+
+        assert work.await_count == 3
+
+    @pytest.mark.unit
+    async def test_errors_propagate_to_every_caller(self):
+        """A failing leader fails its followers too."""
+        flights = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("claude unavailable")
+
+        results = await asyncio.gather(
+            flights.do("k", fail), flights.do("k", fail), return_exceptions=True
+        )
+
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert not flights.in_flight("k")
+
+    @pytest.mark.unit
+    async def test_cancelled_caller_does_not_cancel_shared_work(self):
+        """A disconnecting client leaves the computation running for others."""
+        flights = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        first = asyncio.create_task(flights.do("k", work))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(flights.do("k", work))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        assert await second == "done"
+
+
+class TestStateGeneratorCoalescing:
+    """Test suite for coalesced StateGenerator.generate_workflow_state."""
+
+    @pytest.mark.unit
+    async def test_lookalike_workflows_share_one_generation(self):
+        """Workflows with the same lookup key trigger one hybrid search and one store."""
+        from src.services.state_generator import StateGenerator
+
+        generator = StateGenerator()
+        generator.use_ai = False
+        generator.db = MagicMock()
+        generator.db.get_workflow_with_blocks = AsyncMock(
+            side_effect=lambda wid: {"id": wid, "name": "Bot", "blocks": [{"id": "b1", "type": "starter"}]}
+        )
+
+        lookup = MagicMock()
+        lookup.generate_lookup_key = MagicMock(return_value="same-key")
+        lookup.create_temp_record = AsyncMock(return_value="temp")
+        lookup.update_temp_record = AsyncMock()
+
+        async def slow_miss(input_data):
+            await asyncio.sleep(0.01)
+            return None
+
+        lookup.find_similar_workflows_hybrid = AsyncMock(side_effect=slow_miss)
+        lookup.store_workflow_pattern_with_embedding = AsyncMock()
+        lookup.log_ai_usage = AsyncMock()
+        lookup.adapt_cached_state = AsyncMock(
+            side_effect=lambda state, input_data, score: {**state, "metadata": dict(state["metadata"])}
+        )
+        generator.lookup_service = lookup
+
+        states = await asyncio.gather(
+            generator.generate_workflow_state("wf-1"),
+            generator.generate_workflow_state("wf-1"),
+            generator.generate_workflow_state("wf-2")
+        )
+
+        assert all("blocks" in state for state in states)
+        assert generator.workflow_flights.stats()["coalesced"] == 1
+        assert generator.lookup_flights.stats()["coalesced"] == 1
+        lookup.find_similar_workflows_hybrid.assert_awaited_once()
+        lookup.store_workflow_pattern_with_embedding.assert_awaited_once()
+        assert lookup.update_temp_record.await_count == 2
+        assert [state["metadata"]["workflowId"] for state in states] == ["wf-1", "wf-1", "wf-2"]
+        assert states[2]["metadata"]["coalesced_with"] == "wf-1"
+        lookup.adapt_cached_state.assert_awaited_once()
+
+
+    @pytest.mark.unit
+    async def test_deadline_followers_get_their_own_workflow_id(self):
+        """A deadline request joining another workflow's generation gets an adapted state for its own id."""
+        from src.services.state_generator import StateGenerator
+        from src.utils.deadline import Deadline
+
+        generator = StateGenerator()
+        generator.use_ai = False
+        generator.db = MagicMock()
+        generator.db.get_workflow_with_blocks = AsyncMock(
+            side_effect=lambda wid: {"id": wid, "name": "Bot", "blocks": [{"id": "b1", "type": "starter"}]}
+        )
+
+        lookup = MagicMock()
+        lookup.generate_lookup_key = MagicMock(return_value="same-key")
+        lookup.find_similar_workflows_hybrid = AsyncMock(return_value=None)
+
+        async def slow_store(input_data, state, generation_time):
+            await asyncio.sleep(0.01)
+
+        lookup.store_workflow_pattern_with_embedding = AsyncMock(side_effect=slow_store)
+        lookup.log_ai_usage = AsyncMock()
+        lookup.adapt_cached_state = AsyncMock(
+            side_effect=lambda state, input_data, score: {**state, "metadata": dict(state["metadata"])}
+        )
+        generator.lookup_service = lookup
+
+        state_a, state_b = await asyncio.gather(
+            generator.generate_workflow_state("wf-A", deadline=Deadline(5000)),
+            generator.generate_workflow_state("wf-B", deadline=Deadline(5000))
+        )
+
+        assert generator.generation_flights.stats()["coalesced"] == 1
+        lookup.store_workflow_pattern_with_embedding.assert_awaited_once()
+        assert state_a["metadata"]["workflowId"] == "wf-A"
+        assert state_b["metadata"]["workflowId"] == "wf-B"
+        assert state_b["metadata"]["coalesced_with"] == "wf-A"
+        lookup.adapt_cached_state.assert_awaited_once()
+
+
+class TestBatchGeneration:
+    """Test suite for StateGenerator.generate_workflow_states_batch."""
+
+    @pytest.mark.unit
+    async def test_each_lookup_key_is_generated_once(self):
+        """Workflows sharing a pattern reuse the first member's generation."""
+        from src.services.state_generator import StateGenerator
+
+        generator = StateGenerator()
+        generator.use_ai = False
+        lookup = MagicMock()
+        lookup.generate_lookup_key = MagicMock(
+            side_effect=lambda input_data: "bots" if input_data["workflow_id"] != "wf-3" else "other"
+        )
+        lookup.find_similar_workflows_hybrid = AsyncMock(return_value=None)
+        lookup.store_workflow_pattern_with_embedding = AsyncMock()
+        lookup.log_ai_usage = AsyncMock()
+        lookup.adapt_cached_state = AsyncMock(
+            side_effect=lambda state, input_data, score: {**state, "metadata": dict(state["metadata"])}
+        )
+        generator.lookup_service = lookup
+        workflows = {wid: {"id": wid, "name": "Bot"} for wid in ("wf-1", "wf-2", "wf-3")}
+
+        states = await generator.generate_workflow_states_batch(
+            workflows, {wid: [] for wid in workflows}, concurrency=2
+        )
+
+        assert set(states) == {"wf-1", "wf-2", "wf-3"}
+        assert lookup.find_similar_workflows_hybrid.await_count == 2
+        assert states["wf-2"]["metadata"]["batch_shared_with"] == "wf-1"
+        assert states["wf-2"]["metadata"]["workflowId"] == "wf-2"
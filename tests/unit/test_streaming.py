@@ -0,0 +1,109 @@
+"""
+Unit tests for streamed state generation
+"""
+import pytest
+import json
+import sys
+import os
+from unittest.mock import AsyncMock, MagicMock
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.utils.streaming import PartialBlockParser, format_stream_event
+
+AI_RESPONSE = (
+    'Here is the state:\n{"blocks": {'
+    '"starter_1": {"id": "starter_1", "type": "starter", "name": "Start {manual}"}, '
+    '"agent_1": {"id": "agent_1", "type": "agent", "subBlocks": {"prompt": "say \\"hi\\""}}'
+    '}, "edges": [{"source": "starter_1", "target": "agent_1"}], "metadata": {"x": {}}}'
+)
+
+
+class FakeStream:
+    """Async context manager mimicking AsyncAnthropic.messages.stream"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    @property
+    async def text_stream(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+class TestPartialBlockParser:
+    """Test suite for PartialBlockParser."""
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("chunk_size", [1, 7, len(AI_RESPONSE)])
+    def test_blocks_complete_regardless_of_chunking(self, chunk_size):
+        """Each block is emitted once, when its closing brace arrives."""
+        parser = PartialBlockParser()
+        completed = []
+        for i in range(0, len(AI_RESPONSE), chunk_size):
+            completed.extend(parser.feed(AI_RESPONSE[i:i + chunk_size]))
+
+        assert [block_id for block_id, _ in completed] == ["starter_1", "agent_1"]
+        assert parser.blocks["starter_1"]["name"] == "Start {manual}"
+        assert parser.blocks["agent_1"]["subBlocks"]["prompt"] == 'say "hi"'
+
+    @pytest.mark.unit
+    def test_first_block_available_before_response_ends(self):
+        """Partial output already yields finished blocks."""
+        parser = PartialBlockParser()
+        cut = AI_RESPONSE.index('"agent_1"')
+
+        assert [block_id for block_id, _ in parser.feed(AI_RESPONSE[:cut])] == ["starter_1"]
+
+    @pytest.mark.unit
+    def test_event_framing(self):
+        """SSE and NDJSON framings carry the same payload."""
+        assert format_stream_event("cache", {"hit": True}) == 'event: cache\ndata: {"hit": true}\n\n'
+        line = format_stream_event("cache", {"hit": True}, fmt="ndjson")
+        assert json.loads(line) == {"event": "cache", "data": {"hit": True}}
+
+
+class TestStreamedGeneration:
+    """Test suite for StateGenerator with an event callback."""
+
+    @pytest.mark.unit
+    @pytest.mark.ai
+    async def test_cache_decision_and_blocks_are_emitted(self):
+        """A cache miss streams the decision and each Claude block before returning."""
+        from src.services.state_generator import StateGenerator
+
+        generator = StateGenerator()
+        generator.use_ai = True
+        generator.client = MagicMock()
+        generator.client.messages.stream = MagicMock(
+            return_value=FakeStream([AI_RESPONSE[:60], AI_RESPONSE[60:]])
+        )
+        generator.db = MagicMock()
+        generator.db.get_workflow_with_blocks = AsyncMock(
+            side_effect=lambda wid: {"id": wid, "name": "Bot", "blocks": [{"id": "starter_1", "type": "starter"}]}
+        )
+        lookup = MagicMock()
+        lookup.create_temp_record = AsyncMock(return_value="temp")
+        lookup.update_temp_record = AsyncMock()
+        lookup.find_similar_workflows_hybrid = AsyncMock(return_value=None)
+        lookup.store_workflow_pattern_with_embedding = AsyncMock()
+        lookup.log_ai_usage = AsyncMock()
+        generator.lookup_service = lookup
+
+        events = []
+
+        async def emit(event, data):
+            events.append((event, data))
+
+        state = await generator.generate_workflow_state("wf-1", emit=emit)
+
+        names = [event for event, _ in events]
+        assert names == ["workflow", "cache", "block", "block"]
+        assert events[1][1]["action"] == "generate"
+        assert set(state["blocks"]) == {"starter_1", "agent_1"}
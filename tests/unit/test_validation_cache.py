@@ -0,0 +1,118 @@
+"""
+Unit tests for content-hash memoization of validation reports
+"""
+import pytest
+import copy
+import sys
+import os
+from datetime import datetime
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.services import validation_cache
+from src.services.validation import WorkflowValidator
+from src.services.validation_cache import ValidationReportCache, state_hash
+
+STATE = {
+    "blocks": {
+        "starter_1": {"id": "starter_1", "type": "starter", "name": "Start", "position_x": 100, "position_y": 100,
+                      "sub_blocks": {"startWorkflow": "manual"}},
+        "agent_1": {"id": "agent_1", "type": "agent", "name": "Analyst", "position_x": 400, "position_y": 100,
+                    "sub_blocks": {"model": "gpt-4", "systemPrompt": "Summarise the market data"}}
+    },
+    "edges": [{"from": "starter_1", "to": "agent_1"}],
+    "subflows": {},
+    "variables": {},
+    "metadata": {"version": "1.0.0", "createdAt": "2024-01-04T10:00:00Z", "updatedAt": "2024-01-04T10:00:00Z"}
+}
+
+
+def report_body(report):
+    body = report.dict()
+    body.pop("validated_at")
+    return body
+
+
+class TestStateHash:
+    """Test suite for the canonical state hash."""
+
+    @pytest.mark.unit
+    def test_volatile_metadata_is_ignored(self):
+        """Timestamp values don't change the hash; their presence and everything else does."""
+        touched = copy.deepcopy(STATE)
+        touched["metadata"].update(createdAt="2025-02-01T00:00:00Z", updatedAt="2025-03-01T00:00:00Z")
+        no_created = copy.deepcopy(STATE)
+        del no_created["metadata"]["createdAt"]
+        renamed = copy.deepcopy(STATE)
+        renamed["blocks"]["agent_1"]["name"] = "Researcher"
+
+        assert state_hash(touched) == state_hash(STATE)
+        assert state_hash(no_created) != state_hash(STATE)
+        assert state_hash(renamed) != state_hash(STATE)
+        assert STATE["metadata"]["updatedAt"] == "2024-01-04T10:00:00Z"
+
+    @pytest.mark.unit
+    def test_non_json_states_are_not_hashed(self):
+        state = copy.deepcopy(STATE)
+        state["variables"] = {"since": datetime(2024, 1, 4)}
+
+        assert state_hash(state) is None
+        assert state_hash(["not", "a", "state"]) is None
+
+
+class TestValidationReportCache:
+    """Test suite for cached WorkflowValidator.validate_state."""
+
+    @pytest.fixture(autouse=True)
+    def setup_validator(self):
+        self.validator = WorkflowValidator()
+        self.validator.report_cache = ValidationReportCache(max_entries=2)
+        self.state = copy.deepcopy(STATE)
+
+    @pytest.mark.unit
+    @pytest.mark.validation
+    async def test_identical_state_is_served_from_cache(self):
+        """Re-validating after an updatedAt bump skips the rules and matches an uncached run."""
+        first = await self.validator.validate_state(self.state, "wf-1")
+        resaved = copy.deepcopy(self.state)
+        resaved["metadata"]["updatedAt"] = "2024-02-01T09:30:00Z"
+
+        second = await self.validator.validate_state(resaved, "wf-2")
+
+        uncached = WorkflowValidator()
+        uncached.report_cache = None
+        expected = await uncached.validate_state(resaved, "wf-2")
+        assert report_body(second) == report_body(expected)
+        assert second.validation_results[0] is first.validation_results[0]
+        assert self.validator.report_cache.stats()["hits"] == 1
+
+        # Incremental re-validation still starts from the caller's state
+        report = await self.validator.validate_diff(second, {"fields": {"variables": {"x": 1}}})
+        assert report.summary["has_variables"]
+
+    @pytest.mark.unit
+    @pytest.mark.validation
+    async def test_key_includes_ruleset_version_and_engine(self, monkeypatch):
+        """Bumping the rule-set version or switching engines misses the cache."""
+        await self.validator.validate_state(self.state, "wf-1")
+
+        monkeypatch.setattr(validation_cache, "RULESET_VERSION", validation_cache.RULESET_VERSION + 1)
+        await self.validator.validate_state(self.state, "wf-1")
+        monkeypatch.undo()
+        self.validator.engine = "legacy"
+        await self.validator.validate_state(self.state, "wf-1")
+
+        assert self.validator.report_cache.stats()["hits"] == 0
+
+    @pytest.mark.unit
+    @pytest.mark.validation
+    async def test_cache_is_bounded(self):
+        """Least recently used reports are evicted past max_entries."""
+        for i in range(3):
+            state = copy.deepcopy(self.state)
+            state["blocks"]["agent_1"]["name"] = f"Agent {i}"
+            await self.validator.validate_state(state, f"wf-{i}")
+
+        stats = self.validator.report_cache.stats()
+        assert stats["entries"] == 2
+        assert stats["evictions"] == 1
@@ -0,0 +1,96 @@
+"""
+Unit tests for the compiled validation engine
+"""
+import pytest
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.services.validation import WorkflowValidator
+from src.services.validation_engine import build_index
+
+STATE = {
+    "blocks": {
+        "starter_1": {"id": "starter_1", "type": "starter", "name": "Start", "position_x": 0, "position_y": 0,
+                      "sub_blocks": {"startWorkflow": "webhook"}},
+        "agent_1": {"id": "agent_1", "type": "agent", "name": "Agent", "position_x": 0, "position_y": 0,
+                    "sub_blocks": {"model": "gpt-5", "systemPrompt": "short", "temperature": 3}},
+        "api_1": {"id": "api_1", "type": "api", "position_x": 2500, "position_y": 100,
+                  "sub_blocks": {"url": "ftp://x", "method": "brew", "headers": {}}},
+        "mystery": {"id": "mystery", "type": "widget", "position_x": "left", "position_y": 0,
+                    "description": "deploys a web3 contract"},
+        "tool_1": {"type": "tool", "name": "Tool", "sub_blocks": {}}
+    },
+    "edges": [
+        {"from": "agent_1", "to": "api_1"},
+        {"from": "api_1", "to": "ghost"},
+        {"from": "starter_1"},
+        "not-an-edge"
+    ],
+    "subflows": {},
+    "variables": {"MARKET": "BTC"},
+    "metadata": {"version": "1.0.0"}
+}
+
+
+async def reports(state):
+    compiled = WorkflowValidator()
+    legacy = WorkflowValidator()
+    legacy.engine = "legacy"
+    results = []
+    for validator in (compiled, legacy):
+        report = (await validator.validate_state(state, "wf-1")).dict()
+        report.pop("validated_at")
+        results.append(report)
+    return results
+
+
+class TestCompiledValidation:
+    """Test suite for compiled rules vs the per-validator path."""
+
+    @pytest.mark.unit
+    @pytest.mark.validation
+    async def test_report_matches_per_validator_path(self):
+        """Every result, message and summary field is identical."""
+        compiled, legacy = await reports(STATE)
+
+        assert compiled == legacy
+        assert compiled["summary"]["total_errors"] > 0
+        assert [r["validator_name"] for r in compiled["validation_results"]][0] == "validate_schema"
+
+    @pytest.mark.unit
+    @pytest.mark.validation
+    async def test_rule_errors_are_isolated(self):
+        """A rule that raises is reported under its validator name like before."""
+        state = {**STATE, "blocks": {"agent_1": {"id": "agent_1", "type": "agent",
+                                                  "sub_blocks": {"model": "gpt-4", "systemPrompt": 42}}}}
+
+        compiled, legacy = await reports(state)
+
+        assert compiled == legacy
+        failed = [r for r in compiled["validation_results"] if r["validator_name"] == "_validate_agent_configuration"]
+        assert failed and failed[0]["errors"][0].startswith("Validator error:")
+
+    @pytest.mark.unit
+    @pytest.mark.validation
+    @pytest.mark.parametrize("state", [
+        {"blocks": {"a": "not-a-dict"}},
+        {"blocks": {"a": {"type": ["unhashable"]}}, "edges": []},
+        {"blocks": {}, "edges": "nope"}
+    ])
+    async def test_malformed_states_use_per_validator_path(self, state):
+        """Shapes the index can't represent are validated exactly as before."""
+        assert build_index(state) is None
+
+        outcomes = []
+        for engine in ("compiled", "legacy"):
+            validator = WorkflowValidator()
+            validator.engine = engine
+            try:
+                report = (await validator.validate_state(state, "wf-1")).dict()
+                report.pop("validated_at")
+                outcomes.append(report)
+            except Exception as e:
+                outcomes.append(type(e))
+        assert outcomes[0] == outcomes[1]
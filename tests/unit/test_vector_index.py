@@ -0,0 +1,202 @@
+"""
+Tests for the local vector index.
+
+Covers exhaustive cosine top-k, IVF training/probing, upserts, memory-mapped
+persistence and the offline semantic path in EnhancedLookupService.
+"""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+np = pytest.importorskip("numpy")
+
+from src.services import vector_index as vector_index_module
+from src.services.vector_index import VectorIndex
+
+
+def random_vectors(count, dim=32, seed=0):
+    return np.random.default_rng(seed).normal(size=(count, dim)).astype(np.float32)
+
+
+class TestVectorIndex:
+    """Test suite for VectorIndex."""
+
+    @pytest.mark.unit
+    def test_exhaustive_search_returns_cosine_top_k(self):
+        """Results are ordered by cosine similarity and respect the threshold."""
+        vectors = random_vectors(50)
+        index = VectorIndex(dim=32)
+        for i, vector in enumerate(vectors):
+            index.add(f"v{i}", vector, {"n": i})
+
+        results = index.search(vectors[7] * 3.0, k=3)
+
+        assert results[0][0] == "v7"
+        assert results[0][1] == pytest.approx(1.0, abs=1e-5)
+        assert results[0][2] == {"n": 7}
+        assert results[0][1] >= results[1][1] >= results[2][1]
+        assert index.search(-vectors[7], k=3, threshold=0.99) == []
+
+    @pytest.mark.unit
+    def test_ivf_search_finds_exact_match_with_partial_scan(self):
+        """A trained index probes a subset of lists and still finds exact vectors."""
+        vectors = random_vectors(400)
+        index = VectorIndex(dim=32, lists=8, probes=2)
+        for i, vector in enumerate(vectors):
+            index.add(f"v{i}", vector)
+
+        assert index.train() is True
+        hits = sum(index.search(vectors[i], k=1)[0][0] == f"v{i}" for i in range(0, 400, 10))
+
+        assert hits == 40
+        assert index.stats()["lists"] == 8
+
+    @pytest.mark.unit
+    def test_small_index_stays_exhaustive(self):
+        """Training is skipped until lists would have enough members."""
+        index = VectorIndex(dim=32, lists=100)
+        for i, vector in enumerate(random_vectors(20)):
+            index.add(f"v{i}", vector)
+
+        assert index.train() is False
+        assert index.is_trained is False
+
+    @pytest.mark.unit
+    def test_save_and_load_memory_maps_vectors(self, tmp_path):
+        """A reloaded index is memory-mapped, searchable and still writable."""
+        vectors = random_vectors(200)
+        index = VectorIndex(dim=32, lists=4)
+        for i, vector in enumerate(vectors):
+            index.add(f"v{i}", vector, {"n": i})
+        index.train()
+        index.save(str(tmp_path))
+
+        loaded = VectorIndex.load(str(tmp_path))
+        assert loaded.stats()["memory_mapped"] is True
+        assert loaded.search(vectors[42], k=1)[0][0] == "v42"
+
+        loaded.add("v42", vectors[43], {"n": 43})
+        loaded.add("new", vectors[0] + 0.01)
+        loaded.save(str(tmp_path))
+
+        assert len(loaded) == 201
+        assert loaded.search(vectors[43], k=1)[0][2] == {"n": 43}
+
+
+    @pytest.mark.unit
+    def test_inserts_after_loading_keep_the_base_mapped(self, tmp_path):
+        """New rows go to a growable tail; the loaded rows stay memory-mapped and searchable."""
+        vectors = random_vectors(300)
+        index = VectorIndex(dim=32, lists=4)
+        for i, vector in enumerate(vectors[:200]):
+            index.add(f"v{i}", vector)
+        index.train()
+        index.save(str(tmp_path))
+
+        loaded = VectorIndex.load(str(tmp_path))
+        for i, vector in enumerate(vectors[200:], start=200):
+            loaded.add(f"v{i}", vector)
+        loaded.add("v5", vectors[250])
+
+        assert loaded.stats()["memory_mapped"] is True
+        assert len(loaded) == 300
+        assert all(loaded.search(vectors[i], k=1, probes=4)[0][0] == f"v{i}" for i in (7, 199, 200, 299))
+        assert {item_id for item_id, _, _ in loaded.search(vectors[250], k=2, probes=4)} == {"v5", "v250"}
+
+
+    @pytest.mark.unit
+    def test_remove_and_clear(self):
+        """Removed ids stop matching, the rest keep their payloads, and clear empties the index."""
+        vectors = random_vectors(200)
+        index = VectorIndex(dim=32, lists=4)
+        for i, vector in enumerate(vectors):
+            index.add(f"v{i}", vector, {"n": i})
+        index.train()
+
+        assert index.remove(["v3", "v150", "missing"]) == 2
+        assert len(index) == 198
+        assert index.search(vectors[3], k=1, probes=4)[0][0] != "v3"
+        assert index.search(vectors[151], k=1, probes=4)[0][2] == {"n": 151}
+
+        assert index.clear() == 198
+        assert index.search(vectors[0]) == []
+        assert index.is_trained is False
+
+
+class TestOfflineSemanticSearch:
+    """Test suite for semantic lookup without a database."""
+
+    @pytest.fixture(autouse=True)
+    def local_index(self, monkeypatch):
+        """Fresh process-wide index for each test."""
+        monkeypatch.setattr(vector_index_module, "_local_index", VectorIndex())
+        monkeypatch.delenv("VECTOR_INDEX_PATH", raising=False)
+
+    @pytest.mark.unit
+    async def test_stored_pattern_is_found_offline(self):
+        """Patterns stored in mock mode are returned by semantic search."""
+        from src.services.enhanced_lookup_service import EnhancedLookupService
+
+        db = MagicMock()
+        db.use_database = False
+        service = EnhancedLookupService(db)
+        service.openai_client = MagicMock()
+        embedding = random_vectors(1, dim=1536)[0].tolist()
+        service.generate_embedding = AsyncMock(return_value=embedding)
+
+        workflow = {"workflow_type": "trading_bot", "blocks": [{"type": "starter"}]}
+        state = {"blocks": {"starter_1": {}}, "edges": []}
+        await service.store_workflow_pattern_with_embedding(workflow, state, 1.0)
+
+        match = await service.find_similar_workflows_semantic(workflow)
+
+        assert match is not None
+        assert match[0] == state
+        assert match[1] == pytest.approx(1.0, abs=1e-5)
+
+    @pytest.mark.unit
+    async def test_cache_clear_removes_offline_patterns(self, monkeypatch):
+        """Clearing the cache offline also clears the local index, so patterns stop matching."""
+        from src.api import workflows as workflows_api
+        from src.services.enhanced_lookup_service import EnhancedLookupService
+
+        db = MagicMock()
+        db.use_database = False
+        db.mock_lookup_cache = {}
+        monkeypatch.setattr(workflows_api, "db_service", db)
+        service = EnhancedLookupService(db)
+        service.generate_embedding = AsyncMock(return_value=random_vectors(1, dim=1536)[0].tolist())
+
+        workflow = {"workflow_type": "trading_bot", "blocks": [{"type": "starter"}]}
+        await service.store_workflow_pattern_with_embedding(workflow, {"blocks": {}}, 1.0)
+        assert await service.find_similar_workflows_semantic(workflow) is not None
+
+        result = await workflows_api.clear_cache(older_than_days=30, workflow_type=None, confirm=True)
+
+        assert result["entries_deleted"] == 1
+        assert result["vector_index_entries_removed"] == 1
+        assert await service.find_similar_workflows_semantic(workflow) is None
+
+    @pytest.mark.unit
+    async def test_semantic_search_endpoint_uses_local_index_offline(self, monkeypatch):
+        """The semantic search endpoint returns local index matches without a database."""
+        from src.api import workflows as workflows_api
+        from src.services.enhanced_lookup_service import EnhancedLookupService
+
+        db = MagicMock()
+        db.use_database = False
+        monkeypatch.setattr(workflows_api, "db_service", db)
+        embedding = random_vectors(1, dim=1536)[0].tolist()
+        monkeypatch.setattr(EnhancedLookupService, "generate_embedding", AsyncMock(return_value=embedding))
+        vector_index_module._local_index.add("key-1", embedding, {
+            "lookup_key": "key-1",
+            "workflow_type": "trading_bot",
+            "semantic_description": "Trading bot with stop loss",
+            "generated_state": {"blocks": {}, "metadata": {"workflow_type": "trading_bot"}}
+        })
+
+        result = await workflows_api.semantic_workflow_search(query="crypto trading bot")
+
+        assert result["matches_found"] == 1
+        assert result["semantic_matches"][0]["semantic_description"] == "Trading bot with stop loss"
+        assert result["semantic_matches"][0]["workflow_type"] == "trading_bot"
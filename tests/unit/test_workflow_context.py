@@ -0,0 +1,86 @@
+"""
+Unit tests for the request-scoped workflow context
+"""
+import pytest
+import sys
+import os
+from unittest.mock import AsyncMock, MagicMock
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.services.workflow_context import WorkflowContext
+
+WORKFLOW = {"id": "wf-1", "name": "Crypto Trading Bot", "description": "Buys and sells"}
+BLOCKS = [
+    {"id": "b1", "type": "starter", "position_x": 0, "position_y": 0},
+    {"id": "b2", "type": "agent", "position_x": 200, "position_y": 0},
+    {"id": "b3", "type": "api", "position_x": 400, "position_y": 0}
+]
+
+
+def make_db():
+    db = MagicMock()
+    db.get_workflow_with_blocks = AsyncMock(return_value={**WORKFLOW, "blocks": list(BLOCKS)})
+    db.get_workflow = AsyncMock(return_value=dict(WORKFLOW))
+    db.get_workflow_blocks = AsyncMock(return_value=list(BLOCKS))
+    return db
+
+
+class TestWorkflowContext:
+    """Test suite for WorkflowContext."""
+
+    @pytest.mark.unit
+    async def test_rows_are_loaded_once(self):
+        """Repeated loads reuse the first joined read."""
+        db = make_db()
+        context = WorkflowContext("wf-1", db)
+
+        await context.load()
+        await context.load()
+
+        assert context.queries == 1
+        db.get_workflow_with_blocks.assert_awaited_once_with("wf-1")
+        assert context.workflow_data["blocks"] == BLOCKS
+        assert "blocks" not in context.workflow
+
+    @pytest.mark.unit
+    async def test_missing_workflow_yields_no_data(self):
+        """A missing workflow costs one query and yields no data."""
+        db = make_db()
+        db.get_workflow_with_blocks.return_value = None
+        context = WorkflowContext("missing", db)
+
+        assert await context.load() is None
+        assert await context.load() is None
+        assert context.workflow_data is None
+        assert context.queries == 1
+
+    @pytest.mark.unit
+    async def test_generation_and_pattern_analysis_share_one_read(self):
+        """generate-state steps reuse the context instead of re-reading the tables."""
+        from src.services.state_generator import StateGenerator
+
+        generator = StateGenerator()
+        generator.use_ai = False
+        db = make_db()
+        generator.db = db
+        lookup = MagicMock()
+        lookup.generate_lookup_key = MagicMock(return_value="key")
+        lookup.create_temp_record = AsyncMock(return_value="temp")
+        lookup.update_temp_record = AsyncMock()
+        lookup.find_similar_workflows_hybrid = AsyncMock(return_value=None)
+        lookup.store_workflow_pattern_with_embedding = AsyncMock()
+        lookup.log_ai_usage = AsyncMock()
+        generator.lookup_service = lookup
+        context = WorkflowContext("wf-1", db)
+
+        state = await generator.generate_workflow_state("wf-1", context=context)
+        pattern = await generator.analyze_workflow_pattern("wf-1", context=context)
+
+        assert "blocks" in state
+        assert pattern == context.workflow_type
+        assert context.lookup_key == "key"
+        lookup.generate_lookup_key.assert_called_once()
+        db.get_workflow_with_blocks.assert_awaited_once()
+        db.get_workflow.assert_not_awaited()
+        db.get_workflow_blocks.assert_not_awaited()